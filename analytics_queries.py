@@ -0,0 +1,131 @@
+# analytics_queries.py - Requêtes de lecture des dashboards sur la base SQLite
+"""
+Requêtes nommées exécutées par les endpoints de lecture GET /api/* de
+api_backend.py (via run_query) ; test_query_plans.py vérifie avec EXPLAIN
+QUERY PLAN qu'elles utilisent les index créés par les migrations.
+
+    /api/sessions?start=&end=            sessions_between_dates
+    /api/sessions/<id>                   session_journey, session_downloads, stored_journey
+    /api/clicks?start=&end= | ?page=     clicks_between_dates | clicks_for_page
+    /api/pages                           clicks_per_page
+    /api/downloads?extension=&start=&end= downloads_per_day
+    /api/journeys?start=&end=            journeys_between_dates
+"""
+import sqlite3
+
+# Chaque requête s'appuie sur un index créé par les migrations de api_backend.py
+DASHBOARD_QUERIES = {
+    # Parcours d'une session (idx_clicks_session_sequence, sans tri temporaire)
+    'session_journey': '''
+        SELECT page, file_clicked, timestamp, sequence_order
+        FROM detailed_clicks
+        WHERE session_id = ?
+        ORDER BY sequence_order
+    ''',
+    # Clics d'une période (idx_clicks_date)
+    'clicks_between_dates': '''
+        SELECT session_id, page, file_clicked, timestamp, sequence_order
+        FROM detailed_clicks
+        WHERE date BETWEEN ? AND ?
+    ''',
+    # Nombre de clics par page (idx_clicks_page, index couvrant)
+    'clicks_per_page': '''
+        SELECT page, COUNT(*) AS clicks
+        FROM detailed_clicks
+        GROUP BY page
+        ORDER BY clicks DESC
+    ''',
+    # Clics sur une page donnée (idx_clicks_page)
+    'clicks_for_page': '''
+        SELECT session_id, timestamp
+        FROM detailed_clicks
+        WHERE page = ?
+    ''',
+    # Téléchargements d'un type de fichier par jour (idx_downloads_extension_date, couvrant)
+    'downloads_per_day': '''
+        SELECT date, COUNT(*) AS downloads
+        FROM file_downloads
+        WHERE file_extension = ? AND date BETWEEN ? AND ?
+        GROUP BY date
+    ''',
+    # Téléchargements d'une session (idx_downloads_session_sequence)
+    'session_downloads': '''
+        SELECT file_name, timestamp
+        FROM file_downloads
+        WHERE session_id = ?
+        ORDER BY sequence_order
+    ''',
+    # Sessions d'une période (idx_sessions_date)
+    'sessions_between_dates': '''
+        SELECT session_id, start_time, country, city, user_ip
+        FROM user_sessions
+        WHERE date BETWEEN ? AND ?
+    ''',
+    # Parcours reconstruit côté serveur par sessionizer.py (idx_journeys_session_unique)
+    'stored_journey': '''
+        SELECT journey_path, total_clicks, session_duration
+        FROM user_journeys
+        WHERE session_id = ?
+    ''',
+    # Parcours d'une période, une ligne par session (idx_journeys_date)
+    'journeys_between_dates': '''
+        SELECT session_id, journey_path, total_clicks, session_duration, date
+        FROM user_journeys
+        WHERE date BETWEEN ? AND ?
+    ''',
+    # Rollups (rollups.py) : grain 'hour' ou 'day', buckets bornes incluses (clé primaire)
+    'clicks_per_page_rollup': '''
+        SELECT page, SUM(clicks) AS clicks
+        FROM rollup_clicks
+        WHERE grain = ? AND bucket BETWEEN ? AND ?
+        GROUP BY page
+        ORDER BY clicks DESC
+    ''',
+    'clicks_per_extension_rollup': '''
+        SELECT file_extension, SUM(clicks) AS clicks
+        FROM rollup_clicks
+        WHERE grain = ? AND bucket BETWEEN ? AND ?
+        GROUP BY file_extension
+        ORDER BY clicks DESC
+    ''',
+    'clicks_timeline_rollup': '''
+        SELECT bucket, SUM(clicks) AS clicks
+        FROM rollup_clicks
+        WHERE grain = ? AND bucket BETWEEN ? AND ?
+        GROUP BY bucket
+    ''',
+    'sessions_per_location_rollup': '''
+        SELECT country, city, SUM(sessions) AS sessions
+        FROM rollup_sessions
+        WHERE grain = ? AND bucket BETWEEN ? AND ?
+        GROUP BY country, city
+        ORDER BY sessions DESC
+    ''',
+    'downloads_per_file_rollup': '''
+        SELECT file_name, file_extension, SUM(downloads) AS downloads
+        FROM rollup_downloads
+        WHERE grain = ? AND bucket BETWEEN ? AND ?
+        GROUP BY file_name, file_extension
+        ORDER BY downloads DESC
+    ''',
+}
+
+
+def connect(database_path):
+    """Ouvre la base en lecture seule, lignes accessibles par nom de colonne"""
+    conn = sqlite3.connect(f'file:{database_path}?mode=ro', uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def run_query(conn, name, params=()):
+    """Exécute une requête nommée de DASHBOARD_QUERIES ; lignes en dictionnaires"""
+    cursor = conn.execute(DASHBOARD_QUERIES[name], params)
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+
+def query_plan(conn, name_or_sql, params=()):
+    """Retourne le détail de EXPLAIN QUERY PLAN pour une requête nommée ou du SQL brut"""
+    sql = DASHBOARD_QUERIES.get(name_or_sql, name_or_sql)
+    return [row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
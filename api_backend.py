@@ -1,12 +1,25 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import sqlite3
+import atexit
+import functools
 import json
-from datetime import datetime
+import queue
+from collections import Counter
+from datetime import datetime, timedelta
 import requests
 import re
+import time
 from urllib.parse import urlparse
+from analytics_queries import run_query
 from config_setup import Config
+from db_pool import ConnectionPool
+from geo_enrichment import enrich_event
+from metrics import CONTENT_TYPE, REGISTRY
+from parquet_store import ParquetEventWriter
+import rollups
+from sessionizer import CREATE_JOURNEY_INDEXES, Sessionizer, rebuild_journeys
+from write_queue import GroupCommitWriter
 
 app = Flask(__name__)
 CORS(app, origins=Config.ALLOWED_ORIGINS)  # CORS configuré avec les origines autorisées
@@ -14,6 +27,131 @@ CORS(app, origins=Config.ALLOWED_ORIGINS)  # CORS configuré avec les origines a
 # Configuration depuis le fichier config
 DATABASE_PATH = Config.DATABASE_PATH
 
+# Pool de connexions partagé par les handlers (WAL, PRAGMA réglés une seule fois)
+POOL = ConnectionPool(
+    DATABASE_PATH,
+    size=Config.DB_POOL_SIZE,
+    synchronous=Config.SQLITE_SYNCHRONOUS,
+    busy_timeout_ms=Config.SQLITE_BUSY_TIMEOUT_MS,
+)
+
+# Métriques exposées sur /api/metrics (agrégées en mémoire, voir metrics.py)
+EVENTS_RECEIVED = REGISTRY.counter('analytics_events_total', 'Événements acceptés par type', ('type',))
+EVENTS_REJECTED = REGISTRY.counter('analytics_events_rejected_total', 'Événements refusés à la validation')
+HANDLER_SECONDS = REGISTRY.histogram('analytics_handler_duration_seconds', 'Durée des handlers', ('handler',))
+HANDLER_ERRORS = REGISTRY.counter('analytics_handler_errors_total',
+                                  'Erreurs par handler (exception ou réponse 5xx)', ('handler',))
+COMMIT_SECONDS = REGISTRY.histogram('analytics_sqlite_commit_duration_seconds', 'Durée des commits SQLite', ('path',))
+BATCH_EVENTS = REGISTRY.histogram('analytics_write_batch_events', 'Événements par transaction groupée', ('path',),
+                                  buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000))
+REGISTRY.gauge('analytics_db_pool_connections', 'Connexions SQLite du pool',
+               lambda: {('open',): POOL.open_connections, ('idle',): POOL.idle_connections}, ('state',))
+REGISTRY.gauge('analytics_write_queue_pending', "Lots en attente du thread d'écriture", lambda: WRITER.pending)
+REGISTRY.gauge('analytics_write_queue_pending_events', "Événements en attente du thread d'écriture",
+               lambda: WRITER.pending_items)
+REGISTRY.gauge('analytics_sessions_open', 'Sessions suivies par le sessionizer', lambda: SESSIONIZER.open_sessions)
+REGISTRY.gauge('analytics_journeys_written_total', 'Parcours écrits par le sessionizer',
+               lambda: SESSIONIZER.written, type='counter')
+
+def instrumented(handler):
+    """Mesure la durée d'un handler et compte ses erreurs (exception ou réponse 5xx)"""
+    name = handler.__name__
+    
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        status = 500
+        try:
+            result = handler(*args, **kwargs)
+            status = result[1] if isinstance(result, tuple) else 200
+            return result
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - start, name)
+            if status >= 500:
+                HANDLER_ERRORS.inc(name)
+    return wrapper
+
+def record_write_batch(count, commit_seconds, error, path='group_commit'):
+    """Métriques d'une transaction groupée (taille, durée du commit, erreur)"""
+    BATCH_EVENTS.observe(count, path)
+    if commit_seconds is not None:
+        COMMIT_SECONDS.observe(commit_seconds, path)
+    if error is not None:
+        HANDLER_ERRORS.inc(f'{path}_writer')
+
+# Requêtes d'écriture : texte SQL constant pour réutiliser les requêtes préparées
+INSERT_SESSION_SQL = '''
+    INSERT OR REPLACE INTO user_sessions 
+    (session_id, user_ip, user_agent, start_time, country, city, 
+     latitude, longitude, timezone, language, screen_resolution, 
+     referrer, date, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_CLICK_SQL = '''
+    INSERT INTO detailed_clicks 
+    (session_id, element_id, element_type, element_class, element_text,
+     page, timestamp, sequence_order, x_coordinate, y_coordinate, date)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INCREMENT_CLICKS_SQL = '''
+    UPDATE user_sessions 
+    SET total_clicks = total_clicks + 1 
+    WHERE session_id = ?
+'''
+
+INSERT_DOWNLOAD_SQL = '''
+    INSERT INTO file_downloads 
+    (session_id, file_url, file_name, file_extension, element_text,
+     page, timestamp, sequence_order, date)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+END_SESSION_SQL = '''
+    UPDATE user_sessions 
+    SET end_time = ?, duration_seconds = ?
+    WHERE session_id = ?
+'''
+
+# Incrément agrégé : un seul UPDATE par session et par lot
+ADD_CLICKS_SQL = '''
+    UPDATE user_sessions 
+    SET total_clicks = total_clicks + ? 
+    WHERE session_id = ?
+'''
+
+SUPPORTED_EVENT_TYPES = ('session_start', 'click', 'file_download', 'session_end')
+
+# Migrations de schéma versionnées (PRAGMA user_version)
+# Chaque entrée : (version, [instructions SQL ou fonctions conn -> None]) ;
+# ne jamais modifier une migration publiée
+MIGRATIONS = [
+    (1, [
+        # Parcours d'une session dans l'ordre des clics
+        'CREATE INDEX IF NOT EXISTS idx_clicks_session_sequence ON detailed_clicks (session_id, sequence_order)',
+        # Filtres par jour et par page (l'index page couvre le comptage par page)
+        'CREATE INDEX IF NOT EXISTS idx_clicks_date ON detailed_clicks (date)',
+        'CREATE INDEX IF NOT EXISTS idx_clicks_page ON detailed_clicks (page)',
+        # Téléchargements par type de fichier et par jour (index couvrant)
+        'CREATE INDEX IF NOT EXISTS idx_downloads_extension_date ON file_downloads (file_extension, date)',
+        'CREATE INDEX IF NOT EXISTS idx_downloads_session_sequence ON file_downloads (session_id, sequence_order)',
+        'CREATE INDEX IF NOT EXISTS idx_custom_events_session ON custom_events (session_id)',
+        'CREATE INDEX IF NOT EXISTS idx_journeys_session ON user_journeys (session_id)',
+        'CREATE INDEX IF NOT EXISTS idx_sessions_date ON user_sessions (date)',
+    ]),
+    (2, [
+        # Agrégats horaires/journaliers maintenus à l'ingestion (rollups.py)
+        *rollups.CREATE_ROLLUP_TABLES,
+        rollups.rebuild_rollups,
+    ]),
+    (3, [
+        # Une ligne user_journeys par session, écrite par le sessionizer (sessionizer.py)
+        *CREATE_JOURNEY_INDEXES,
+        rebuild_journeys,
+    ]),
+]
+
 def init_database():
     """Initialise la base de données avec toutes les tables nécessaires"""
     conn = sqlite3.connect(DATABASE_PATH)
@@ -111,178 +249,441 @@ def init_database():
     ''')
     
     conn.commit()
+    migrate_database(conn)
     conn.close()
     print("✅ Base de données initialisée avec succès!")
 
+def migrate_database(conn):
+    """Applique les migrations dont la version dépasse PRAGMA user_version"""
+    current = conn.execute('PRAGMA user_version').fetchone()[0]
+    
+    for version, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        with conn:
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+        if Config.DEBUG:
+            print(f"🔧 Migration de schéma {version} appliquée")
+    
+    # Statistiques pour le planificateur de requêtes
+    conn.execute('PRAGMA optimize')
+
+def session_start_row(data, remote_addr, now):
+    # Localisation manquante complétée hors ligne depuis l'IP (aussi pour la copie Parquet)
+    enrich_event(data, remote_addr)
+    return (
+        data.get('session_id'),
+        remote_addr,
+        data.get('user_agent'),
+        data.get('start_time'),
+        data.get('country'),
+        data.get('city'),
+        data.get('latitude'),
+        data.get('longitude'),
+        data.get('timezone'),
+        data.get('language'),
+        data.get('screen_resolution'),
+        data.get('referrer'),
+        now.date(),
+        now
+    )
+
+def click_row(data, now):
+    return (
+        data.get('session_id'),
+        data.get('element_id'),
+        data.get('element_type'),
+        data.get('element_class'),
+        data.get('element_text'),
+        data.get('page'),
+        data.get('timestamp'),
+        data.get('sequence_order'),
+        data.get('x_coordinate'),
+        data.get('y_coordinate'),
+        now.date()
+    )
+
+def download_row(data, now):
+    return (
+        data.get('session_id'),
+        data.get('file_url'),
+        data.get('file_name'),
+        data.get('file_extension'),
+        data.get('element_text'),
+        data.get('page'),
+        data.get('timestamp'),
+        data.get('sequence_order'),
+        now.date()
+    )
+
+def session_end_row(data):
+    return (data.get('end_time'), data.get('duration_seconds', 0), data.get('session_id'))
+
+def update_rollups(conn, sessions=(), clicks=(), downloads=()):
+    """Met à jour les rollups pour des lignes brutes (format *_row), dans la transaction courante
+    
+    Les sessions doivent être passées avant leur INSERT OR REPLACE.
+    """
+    if sessions:
+        rollups.add_sessions(conn, [(row[0], row[3], row[12], row[4], row[5]) for row in sessions])
+    if clicks:
+        rollups.add_clicks(conn, [(row[6], row[10], row[5]) for row in clicks])
+    if downloads:
+        rollups.add_downloads(conn, [(row[6], row[8], row[2], row[3]) for row in downloads])
+
+def write_events(conn, items):
+    """Écrit un lot d'événements (event, remote_addr, received_at) sans commit
+
+    Un executemany par table, un seul UPDATE de total_clicks par session et
+    une mise à jour des rollups par lot.
+    """
+    sessions, clicks, downloads, session_ends = [], [], [], []
+    click_counts = Counter()
+    
+    for data, remote_addr, received_at in items:
+        event_type = data.get('type')
+        if event_type == 'session_start':
+            sessions.append(session_start_row(data, remote_addr, received_at))
+        elif event_type == 'click':
+            clicks.append(click_row(data, received_at))
+            click_counts[data.get('session_id')] += 1
+        elif event_type == 'file_download':
+            downloads.append(download_row(data, received_at))
+        elif event_type == 'session_end':
+            session_ends.append(session_end_row(data))
+    
+    update_rollups(conn, sessions, clicks, downloads)
+    
+    if sessions:
+        conn.executemany(INSERT_SESSION_SQL, sessions)
+    if clicks:
+        conn.executemany(INSERT_CLICK_SQL, clicks)
+        conn.executemany(ADD_CLICKS_SQL, [(count, sid) for sid, count in click_counts.items()])
+    if downloads:
+        conn.executemany(INSERT_DOWNLOAD_SQL, downloads)
+    if session_ends:
+        conn.executemany(END_SESSION_SQL, session_ends)
+
+# Copie des événements commités dans le magasin Parquet (lu par les dashboards)
+PARQUET_WRITER = ParquetEventWriter(
+    Config.PARQUET_STORE_PATH,
+    max_rows=Config.PARQUET_FLUSH_ROWS,
+    max_delay=Config.PARQUET_FLUSH_INTERVAL,
+) if Config.PARQUET_STORE_ENABLED else None
+
+if PARQUET_WRITER is not None:
+    atexit.register(PARQUET_WRITER.stop)
+
+def archive_events(items):
+    """Ajoute des événements (event, remote_addr, received_at) déjà commités au magasin Parquet"""
+    if PARQUET_WRITER is not None:
+        PARQUET_WRITER.append(items)
+
+# Parcours des sessions (user_journeys), écrits à la fermeture de chaque session ;
+# thread démarré au premier événement, quel que soit le serveur qui importe l'application
+SESSIONIZER = Sessionizer(
+    lambda: POOL.connection(),
+    timeout=Config.SESSION_TIMEOUT,
+    sweep_interval=Config.JOURNEY_SWEEP_INTERVAL,
+)
+atexit.register(lambda: SESSIONIZER.stop())
+
+def events_committed(items):
+    """Transmet des événements commités aux consommateurs en aval (Parquet, sessionizer)"""
+    archive_events(items)
+    SESSIONIZER.feed(items)
+
+# Thread d'écriture en commit groupé (démarré au premier lot reçu)
+WRITER = GroupCommitWriter(
+    POOL,
+    write_events,
+    max_batch=Config.GROUP_COMMIT_MAX_BATCH,
+    max_delay=Config.GROUP_COMMIT_MAX_DELAY_MS / 1000,
+    max_queue=Config.GROUP_COMMIT_MAX_QUEUE,
+    after_commit=events_committed,
+    on_batch=record_write_batch,
+)
+
+def validate_event(data):
+    """Retourne un message d'erreur si l'événement est invalide, sinon None"""
+    if not isinstance(data, dict) or not data:
+        return 'Aucune donnée reçue'
+    
+    event_type = data.get('type')
+    if not event_type or not data.get('session_id'):
+        return 'Type d\'événement et session_id requis'
+    if event_type not in SUPPORTED_EVENT_TYPES:
+        return f'Type d\'événement non supporté: {event_type}'
+    return None
+
 @app.route('/api/track', methods=['POST'])
+@instrumented
 def track_event():
-    """Endpoint principal pour recevoir les données de tracking"""
+    """Endpoint principal pour recevoir les données de tracking
+    
+    Accepte un événement ou un tableau d'événements (mode batch).
+    """
     try:
         data = request.get_json()
         
         if not data:
             return jsonify({'error': 'Aucune donnée reçue'}), 400
         
-        event_type = data.get('type')
-        session_id = data.get('session_id')
+        if isinstance(data, list):
+            return handle_batch(data)
+        
+        error = validate_event(data)
+        if error:
+            EVENTS_REJECTED.inc()
+            return jsonify({'error': error}), 400
+        EVENTS_RECEIVED.inc(data['type'])
         
-        if not event_type or not session_id:
-            return jsonify({'error': 'Type d\'événement et session_id requis'}), 400
+        if Config.GROUP_COMMIT_ENABLED:
+            body, status = enqueue_events([(data, request.remote_addr, datetime.now())])
+            return jsonify(body), status
         
         # Traitement selon le type d'événement
+        event_type = data.get('type')
         if event_type == 'session_start':
             return handle_session_start(data)
         elif event_type == 'click':
             return handle_click_event(data)
         elif event_type == 'file_download':
             return handle_file_download(data)
-        elif event_type == 'session_end':
-            return handle_session_end(data)
         else:
-            return jsonify({'error': f'Type d\'événement non supporté: {event_type}'}), 400
+            return handle_session_end(data)
             
     except Exception as e:
         if Config.DEBUG:
             print(f"Erreur dans track_event: {e}")
         return jsonify({'error': 'Erreur interne du serveur'}), 500
 
+@instrumented
+def handle_batch(events):
+    """Gère un tableau d'événements : les valides partent dans la file d'écriture"""
+    now = datetime.now()
+    accepted = []
+    rejected = []
+    
+    for index, data in enumerate(events):
+        error = validate_event(data)
+        if error:
+            rejected.append({'index': index, 'error': error})
+        else:
+            accepted.append((data, request.remote_addr, now))
+    
+    for event_type, count in Counter(data['type'] for data, _, _ in accepted).items():
+        EVENTS_RECEIVED.inc(event_type, amount=count)
+    if rejected:
+        EVENTS_REJECTED.inc(amount=len(rejected))
+    
+    body, status = enqueue_events(accepted)
+    body['rejected'] = rejected
+    if not accepted and rejected:
+        status = 400
+    return jsonify(body), status
+
+@instrumented
+def enqueue_events(items):
+    """Confie les événements au thread d'écriture et applique le mode d'acquittement
+    
+    - queued : réponse 202 dès la mise en file
+    - committed : réponse après le commit de la transaction qui contient les événements
+    Le mode par défaut (Config.TRACK_ACK_MODE) peut être surchargé par ?ack=.
+    """
+    ack_mode = request.args.get('ack', Config.TRACK_ACK_MODE)
+    
+    try:
+        ticket = WRITER.submit(items)
+    except queue.Full:
+        return {'error': 'File d\'écriture saturée, réessayez plus tard'}, 503
+    
+    if ack_mode == 'queued':
+        return {'status': 'accepted', 'queued': len(items)}, 202
+    
+    if not ticket.wait(Config.GROUP_COMMIT_ACK_TIMEOUT):
+        return {'error': 'Délai d\'écriture dépassé', 'queued': len(items)}, 504
+    if ticket.error:
+        if Config.DEBUG:
+            print(f"Erreur dans le thread d'écriture: {ticket.error}")
+        return {'error': 'Erreur lors de l\'enregistrement des événements'}, 500
+    return {'status': 'success', 'committed': len(items)}, 200
+
+@instrumented
 def handle_session_start(data):
     """Gère le démarrage d'une session"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute('''
-            INSERT OR REPLACE INTO user_sessions 
-            (session_id, user_ip, user_agent, start_time, country, city, 
-             latitude, longitude, timezone, language, screen_resolution, 
-             referrer, date, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data.get('session_id'),
-            request.remote_addr,
-            data.get('user_agent'),
-            data.get('start_time'),
-            data.get('country'),
-            data.get('city'),
-            data.get('latitude'),
-            data.get('longitude'),
-            data.get('timezone'),
-            data.get('language'),
-            data.get('screen_resolution'),
-            data.get('referrer'),
-            datetime.now().date(),
-            datetime.now()
-        ))
-        
-        conn.commit()
+        now = datetime.now()
+        row = session_start_row(data, request.remote_addr, now)
+        with POOL.connection() as conn:
+            update_rollups(conn, sessions=[row])
+            conn.execute(INSERT_SESSION_SQL, row)
+            with COMMIT_SECONDS.time('handler'):
+                conn.commit()
+        events_committed([(data, request.remote_addr, now)])
         return jsonify({'status': 'success', 'message': 'Session démarrée'})
         
     except Exception as e:
         if Config.DEBUG:
             print(f"Erreur dans handle_session_start: {e}")
         return jsonify({'error': 'Erreur lors du démarrage de session'}), 500
-    finally:
-        conn.close()
 
+@instrumented
 def handle_click_event(data):
     """Gère les événements de clic"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute('''
-            INSERT INTO detailed_clicks 
-            (session_id, element_id, element_type, element_class, element_text,
-             page, timestamp, sequence_order, x_coordinate, y_coordinate, date)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data.get('session_id'),
-            data.get('element_id'),
-            data.get('element_type'),
-            data.get('element_class'),
-            data.get('element_text'),
-            data.get('page'),
-            data.get('timestamp'),
-            data.get('sequence_order'),
-            data.get('x_coordinate'),
-            data.get('y_coordinate'),
-            datetime.now().date()
-        ))
-        
-        # Mettre à jour le compteur de clics dans la session
-        cursor.execute('''
-            UPDATE user_sessions 
-            SET total_clicks = total_clicks + 1 
-            WHERE session_id = ?
-        ''', (data.get('session_id'),))
-        
-        conn.commit()
+        now = datetime.now()
+        row = click_row(data, now)
+        with POOL.connection() as conn:
+            conn.execute(INSERT_CLICK_SQL, row)
+            update_rollups(conn, clicks=[row])
+            
+            # Mettre à jour le compteur de clics dans la session
+            conn.execute(INCREMENT_CLICKS_SQL, (data.get('session_id'),))
+            with COMMIT_SECONDS.time('handler'):
+                conn.commit()
+        events_committed([(data, request.remote_addr, now)])
         return jsonify({'status': 'success', 'message': 'Clic enregistré'})
         
     except Exception as e:
         if Config.DEBUG:
             print(f"Erreur dans handle_click_event: {e}")
         return jsonify({'error': 'Erreur lors de l\'enregistrement du clic'}), 500
-    finally:
-        conn.close()
 
+@instrumented
 def handle_file_download(data):
     """Gère les téléchargements de fichiers"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute('''
-            INSERT INTO file_downloads 
-            (session_id, file_url, file_name, file_extension, element_text,
-             page, timestamp, sequence_order, date)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            data.get('session_id'),
-            data.get('file_url'),
-            data.get('file_name'),
-            data.get('file_extension'),
-            data.get('element_text'),
-            data.get('page'),
-            data.get('timestamp'),
-            data.get('sequence_order'),
-            datetime.now().date()
-        ))
-        
-        conn.commit()
+        now = datetime.now()
+        row = download_row(data, now)
+        with POOL.connection() as conn:
+            conn.execute(INSERT_DOWNLOAD_SQL, row)
+            update_rollups(conn, downloads=[row])
+            with COMMIT_SECONDS.time('handler'):
+                conn.commit()
+        events_committed([(data, request.remote_addr, now)])
         return jsonify({'status': 'success', 'message': 'Téléchargement enregistré'})
         
     except Exception as e:
         if Config.DEBUG:
             print(f"Erreur dans handle_file_download: {e}")
         return jsonify({'error': 'Erreur lors de l\'enregistrement du téléchargement'}), 500
-    finally:
-        conn.close()
 
+@instrumented
 def handle_session_end(data):
     """Gère la fin d'une session"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
     try:
-        duration = data.get('duration_seconds', 0)
-        
-        cursor.execute('''
-            UPDATE user_sessions 
-            SET end_time = ?, duration_seconds = ?
-            WHERE session_id = ?
-        ''', (data.get('end_time'), duration, data.get('session_id')))
-        
-        conn.commit()
+        with POOL.connection() as conn:
+            conn.execute(END_SESSION_SQL, session_end_row(data))
+            with COMMIT_SECONDS.time('handler'):
+                conn.commit()
+        events_committed([(data, request.remote_addr, datetime.now())])
         return jsonify({'status': 'success', 'message': 'Session terminée'})
         
     except Exception as e:
         if Config.DEBUG:
             print(f"Erreur dans handle_session_end: {e}")
         return jsonify({'error': 'Erreur lors de la fin de session'}), 500
-    finally:
-        conn.close()
+
+def named_query(name, params=()):
+    """Lignes d'une requête nommée de analytics_queries, lues par le pool"""
+    with POOL.connection() as conn:
+        return run_query(conn, name, params)
+
+def date_range(days=7):
+    """Période (start, end) en AAAA-MM-JJ, bornes incluses ; par défaut les `days` derniers jours"""
+    end = request.args.get('end') or datetime.now().date().isoformat()
+    start = request.args.get('start') or (datetime.fromisoformat(end) - timedelta(days=days - 1)).date().isoformat()
+    # Lève ValueError si une borne n'est pas une date
+    return datetime.fromisoformat(start).date().isoformat(), datetime.fromisoformat(end).date().isoformat()
+
+def read_endpoint(handler):
+    """Réponse JSON d'un endpoint de lecture ; 400 si une date est invalide"""
+    @functools.wraps(handler)
+    def wrapper(*args, **kwargs):
+        try:
+            return jsonify(handler(*args, **kwargs))
+        except ValueError:
+            return jsonify({'error': 'Dates attendues au format AAAA-MM-JJ'}), 400
+    return wrapper
+
+@app.route('/api/sessions', methods=['GET'])
+@read_endpoint
+def sessions_between_dates():
+    """Sessions démarrées dans la période"""
+    return named_query('sessions_between_dates', date_range())
+
+@app.route('/api/sessions/<session_id>', methods=['GET'])
+@read_endpoint
+def session_detail(session_id):
+    """Clics et téléchargements d'une session, et son parcours reconstruit s'il existe"""
+    journey = named_query('stored_journey', (session_id,))
+    return {
+        'session_id': session_id,
+        'clicks': named_query('session_journey', (session_id,)),
+        'downloads': named_query('session_downloads', (session_id,)),
+        'journey': journey[0] if journey else None,
+    }
+
+@app.route('/api/clicks', methods=['GET'])
+@read_endpoint
+def clicks_list():
+    """Clics d'une page (?page=) ou de la période"""
+    page = request.args.get('page')
+    if page is not None:
+        return named_query('clicks_for_page', (page,))
+    return named_query('clicks_between_dates', date_range())
+
+@app.route('/api/pages', methods=['GET'])
+@read_endpoint
+def clicks_per_page():
+    """Nombre de clics par page, du plus cliqué au moins cliqué"""
+    return named_query('clicks_per_page')
+
+@app.route('/api/downloads', methods=['GET'])
+@read_endpoint
+def downloads_per_day():
+    """Téléchargements par jour d'un type de fichier (?extension=, pdf par défaut)"""
+    return named_query('downloads_per_day', (request.args.get('extension', 'pdf'), *date_range()))
+
+@app.route('/api/journeys', methods=['GET'])
+@read_endpoint
+def journeys_between_dates():
+    """Parcours reconstruits (sessionizer) des sessions de la période"""
+    return named_query('journeys_between_dates', date_range())
+
+@app.route('/api/stats', methods=['GET'])
+def rollup_stats():
+    """Statistiques agrégées de la période, lues dans les rollups (?grain=hour|day, day par défaut)"""
+    grain = request.args.get('grain', 'day')
+    if grain not in rollups.GRAINS:
+        return jsonify({'error': f"grain attendu parmi {', '.join(rollups.GRAINS)}"}), 400
+    try:
+        start, end = date_range()
+    except ValueError:
+        return jsonify({'error': 'Dates attendues au format AAAA-MM-JJ'}), 400
+    # Buckets horaires 'AAAA-MM-JJTHH' : la période couvre les journées entières
+    params = (grain, start, end) if grain == 'day' else (grain, f'{start}T00', f'{end}T23')
+    return jsonify({
+        'grain': grain,
+        'start': start,
+        'end': end,
+        'pages': named_query('clicks_per_page_rollup', params),
+        'extensions': named_query('clicks_per_extension_rollup', params),
+        'timeline': named_query('clicks_timeline_rollup', params),
+        'locations': named_query('sessions_per_location_rollup', params),
+        'downloads': named_query('downloads_per_file_rollup', params),
+    })
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Métriques au format texte Prometheus, pour un collecteur local"""
+    return REGISTRY.render(), 200, {'Content-Type': CONTENT_TYPE}
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -295,6 +696,7 @@ def health_check():
 
 if __name__ == '__main__':
     init_database()
+    SESSIONIZER.start()
     print(f"🚀 API Analytics démarrée sur http://localhost:{Config.API_PORT}")
     print(f"📊 Dashboard accessible sur http://localhost:{Config.DASHBOARD_PORT}")
     app.run(debug=Config.DEBUG, host='0.0.0.0', port=Config.API_PORT)
\ No newline at end of file
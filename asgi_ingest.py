@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Mode d'ingestion asynchrone (ASGI) de l'API analytics
+
+Même contrat que api_backend.py pour /api/track, /api/health et /api/metrics, servi par
+uvicorn. Les écritures SQLite sont regroupées par lots et exécutées sur un
+thread dédié (executor à un seul worker) : la boucle d'événements ne bloque
+jamais sur le disque. Le nombre de requêtes /api/track en cours est borné ;
+au-delà, la requête reçoit immédiatement un 503 avec Retry-After. Les
+événements en attente d'écriture sont bornés par GROUP_COMMIT_MAX_QUEUE
+(503 au-delà), y compris avec ?ack=queued.
+
+Usage: python asgi_ingest.py    (ou: uvicorn asgi_ingest:app --port 5000)
+"""
+
+import asyncio
+import contextlib
+import json
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import api_backend
+from api_backend import EVENTS_RECEIVED, EVENTS_REJECTED, HANDLER_ERRORS, HANDLER_SECONDS, validate_event, write_events
+from config_setup import Config
+from metrics import CONTENT_TYPE, REGISTRY
+
+# Messages du contrat historique, un par type d'événement
+SUCCESS_MESSAGES = {
+    'session_start': 'Session démarrée',
+    'click': 'Clic enregistré',
+    'file_download': 'Téléchargement enregistré',
+    'session_end': 'Session terminée',
+}
+
+
+class AsyncBatchWriter:
+    """Regroupe les lots des requêtes concurrentes en une transaction SQLite
+
+    Pendant qu'un lot s'écrit, les requêtes suivantes s'accumulent en file et
+    forment le lot suivant : plus la charge monte, plus les transactions sont
+    grosses, sans délai ajouté à faible charge. L'écriture (write_events +
+    commit) s'exécute dans `executor`.
+
+    La file est bornée à `max_queue` événements en attente d'écriture : avec
+    ?ack=queued une requête se termine dès la mise en file, le nombre de
+    requêtes en cours ne borne donc pas la mémoire.
+    """
+
+    def __init__(self, executor, max_batch=500, max_delay=0.0, max_queue=10000):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_queue = max_queue
+        self._queue = None
+        self._task = None
+        self._queued_items = 0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Écrit ce qui reste en file puis arrête la tâche"""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    @property
+    def pending(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    @property
+    def pending_items(self):
+        """Événements en file ou en cours d'écriture"""
+        return self._queued_items
+
+    def submit(self, items):
+        """Met des éléments en file ; retourne un Future résolu après le commit
+
+        Lève queue.Full si max_queue événements en attente seraient dépassés.
+        """
+        items = list(items)
+        if self._queued_items + len(items) > self.max_queue:
+            raise queue.Full
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((items, future))
+        self._queued_items += len(items)
+        return future
+
+    @staticmethod
+    def _write(items):
+        with api_backend.POOL.connection() as conn:
+            write_events(conn, items)
+            start = time.perf_counter()
+            conn.commit()
+            commit_seconds = time.perf_counter() - start
+        api_backend.record_write_batch(len(items), commit_seconds, None, path='asgi')
+        api_backend.events_committed(items)
+
+    async def _collect(self):
+        """Attend un premier lot, prend tout ce qui est déjà en file, puis attend
+        au plus `max_delay` (0 : commit groupé « naturel », sans délai ajouté)"""
+        batch = [await self._queue.get()]
+        count = len(batch[0][0])
+        deadline = time.monotonic() + self.max_delay
+        while count < self.max_batch:
+            try:
+                entry = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            batch.append(entry)
+            count += len(entry[0])
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            items = [item for entry_items, _ in batch for item in entry_items]
+            error = None
+            try:
+                await loop.run_in_executor(self.executor, self._write, items)
+            except Exception as e:
+                error = e
+                api_backend.record_write_batch(len(items), None, e, path='asgi')
+            self._queued_items -= len(items)
+            for _, future in batch:
+                if not future.done():
+                    if error is None:
+                        future.set_result(len(items))
+                    else:
+                        future.set_exception(error)
+                self._queue.task_done()
+
+
+# Thread unique d'écriture SQLite (un seul écrivain à la fois en WAL)
+EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite-writer')
+BATCHER = AsyncBatchWriter(
+    EXECUTOR,
+    max_batch=Config.GROUP_COMMIT_MAX_BATCH,
+    max_delay=Config.ASGI_BATCH_DELAY_MS / 1000,
+    max_queue=Config.GROUP_COMMIT_MAX_QUEUE,
+)
+
+IN_FLIGHT = {'current': 0, 'rejected': 0}
+
+REGISTRY.gauge('analytics_asgi_requests_in_flight', 'Requêtes /api/track en cours', lambda: IN_FLIGHT['current'])
+REGISTRY.gauge('analytics_asgi_requests_shed_total', 'Requêtes refusées (503) par saturation',
+               lambda: IN_FLIGHT['rejected'], type='counter')
+REGISTRY.gauge('analytics_asgi_write_pending', "Lots en attente d'écriture", lambda: BATCHER.pending)
+REGISTRY.gauge('analytics_asgi_write_pending_events', "Événements en attente d'écriture",
+               lambda: BATCHER.pending_items)
+
+
+def error_response(message, status):
+    return JSONResponse({'error': message}, status_code=status)
+
+
+async def track_event(request):
+    """Endpoint principal : un événement ou un tableau d'événements"""
+    if IN_FLIGHT['current'] >= Config.ASGI_MAX_IN_FLIGHT:
+        IN_FLIGHT['rejected'] += 1
+        return JSONResponse({'error': 'Serveur saturé, réessayez plus tard'}, status_code=503,
+                            headers={'Retry-After': '1'})
+
+    IN_FLIGHT['current'] += 1
+    start = time.perf_counter()
+    response = None
+    try:
+        response = await _track(request)
+        return response
+    except Exception as e:
+        if Config.DEBUG:
+            print(f"Erreur dans track_event: {e}")
+        response = error_response('Erreur interne du serveur', 500)
+        return response
+    finally:
+        IN_FLIGHT['current'] -= 1
+        HANDLER_SECONDS.observe(time.perf_counter() - start, 'asgi_track_event')
+        if response is None or response.status_code >= 500:
+            HANDLER_ERRORS.inc('asgi_track_event')
+
+
+async def _track(request):
+    try:
+        data = json.loads(await request.body())
+    except ValueError:
+        data = None
+    if not data:
+        return error_response('Aucune donnée reçue', 400)
+
+    remote_addr = request.client.host if request.client else None
+    now = datetime.now()
+
+    if isinstance(data, list):
+        accepted, rejected = [], []
+        for index, event in enumerate(data):
+            error = validate_event(event)
+            if error:
+                rejected.append({'index': index, 'error': error})
+            else:
+                accepted.append((event, remote_addr, now))
+                EVENTS_RECEIVED.inc(event['type'])
+        if rejected:
+            EVENTS_REJECTED.inc(amount=len(rejected))
+        body, status = await _enqueue(request, accepted)
+        body['rejected'] = rejected
+        if not accepted and rejected:
+            status = 400
+        return JSONResponse(body, status_code=status)
+
+    error = validate_event(data)
+    if error:
+        EVENTS_REJECTED.inc()
+        return error_response(error, 400)
+    EVENTS_RECEIVED.inc(data['type'])
+    body, status = await _enqueue(request, [(data, remote_addr, now)])
+    if status == 200:
+        body['message'] = SUCCESS_MESSAGES[data['type']]
+    return JSONResponse(body, status_code=status)
+
+
+async def _enqueue(request, items):
+    """Même sémantique d'acquittement que api_backend.enqueue_events"""
+    if not items:
+        return {'status': 'success', 'committed': 0}, 200
+    ack_mode = request.query_params.get('ack', Config.TRACK_ACK_MODE)
+    try:
+        future = BATCHER.submit(items)
+    except queue.Full:
+        IN_FLIGHT['rejected'] += 1
+        return {'error': 'File d\'écriture saturée, réessayez plus tard'}, 503
+    # Le résultat est toujours lu (ack=queued, délai dépassé) : pas d'exception « jamais récupérée »
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    if ack_mode == 'queued':
+        return {'status': 'accepted', 'queued': len(items)}, 202
+
+    try:
+        await asyncio.wait_for(asyncio.shield(future), Config.GROUP_COMMIT_ACK_TIMEOUT)
+    except asyncio.TimeoutError:
+        return {'error': 'Délai d\'écriture dépassé', 'queued': len(items)}, 504
+    except Exception as e:
+        if Config.DEBUG:
+            print(f"Erreur dans le thread d'écriture: {e}")
+        return {'error': 'Erreur lors de l\'enregistrement des événements'}, 500
+    return {'status': 'success', 'committed': len(items)}, 200
+
+
+async def health_check(request):
+    """Endpoint de vérification de santé de l'API"""
+    return JSONResponse({
+        'status': 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'version': '1.0.0',
+        'mode': 'asgi',
+        'in_flight': IN_FLIGHT['current'],
+        'pending_writes': BATCHER.pending,
+    })
+
+
+async def metrics(request):
+    """Métriques au format texte Prometheus, pour un collecteur local"""
+    return Response(REGISTRY.render(), headers={'Content-Type': CONTENT_TYPE})
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(EXECUTOR, api_backend.init_database)
+    BATCHER.start()
+    api_backend.SESSIONIZER.start()
+    yield
+    await BATCHER.stop()
+    await loop.run_in_executor(EXECUTOR, api_backend.SESSIONIZER.stop)
+    if api_backend.PARQUET_WRITER is not None:
+        api_backend.PARQUET_WRITER.stop()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/track', track_event, methods=['POST']),
+        Route('/api/health', health_check, methods=['GET']),
+        Route('/api/metrics', metrics, methods=['GET']),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=Config.ALLOWED_ORIGINS,
+                           allow_methods=['GET', 'POST', 'OPTIONS'], allow_headers=['*'])],
+    lifespan=lifespan,
+)
+
+
+if __name__ == '__main__':
+    print(f"🚀 API Analytics (ASGI) démarrée sur http://localhost:{Config.API_PORT}")
+    uvicorn.run(app, host='0.0.0.0', port=Config.API_PORT,
+                log_level='debug' if Config.DEBUG else 'warning',
+                backlog=Config.ASGI_BACKLOG, access_log=Config.DEBUG)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Compare le débit de /api/track entre le serveur Flask (api_backend.py) et le
+mode ASGI (asgi_ingest.py) sous la même charge
+
+Chaque serveur est lancé dans un sous-processus sur une base temporaire ; la
+charge est envoyée par `threads` clients HTTP keep-alive, un événement de clic
+par requête.
+
+Usage: python benchmark_ingest.py [requêtes] [threads]
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from load_generator import percentile
+
+SERVERS = [
+    ("Flask (api_backend.py)", [sys.executable, "api_backend.py"], {}),
+    ("Flask + commit groupé", [sys.executable, "api_backend.py"], {"GROUP_COMMIT_ENABLED": "True"}),
+    ("ASGI (asgi_ingest.py)", [sys.executable, "asgi_ingest.py"], {}),
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(command, extra_env, tmp):
+    port = free_port()
+    env = dict(os.environ, DEBUG="False", API_PORT=str(port),
+               DATABASE_PATH=os.path.join(tmp, f"bench_{port}.db"), **extra_env)
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/api/health", timeout=0.5).status_code == 200:
+                return process, url
+        except requests.RequestException:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"Serveur injoignable: {' '.join(command)}")
+
+
+def run_load(url, total, threads, batch=1):
+    """Retourne (requêtes/s, p50 ms, p99 ms, erreurs)"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    per_thread = total // threads
+
+    def worker(offset):
+        http = requests.Session()
+        local = []
+        failures = 0
+        for i in range(offset, offset + per_thread):
+            events = [{"type": "click", "session_id": f"bench_{i % 200}", "page": "pdf/thesis.pdf",
+                       "timestamp": "2025-07-01T10:00:00Z", "sequence_order": i * batch + j}
+                      for j in range(batch)]
+            start = time.perf_counter()
+            try:
+                body = events[0] if batch == 1 else events
+                ok = http.post(f"{url}/api/track", json=body, timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            local.append(time.perf_counter() - start)
+            failures += not ok
+        with lock:
+            latencies.extend(local)
+            errors.append(failures)
+
+    workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    return (len(latencies) / elapsed, percentile(latencies, 0.5) * 1000,
+            percentile(latencies, 0.99) * 1000, sum(errors))
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    batch = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    print(f"🏁 Benchmark ingestion /api/track ({total} requêtes, {threads} clients, {batch} évt/requête)")
+    print("=" * 82)
+    print(f"{'Serveur':<26} {'req/s':>9} {'évts/s':>9} {'p50 (ms)':>10} {'p99 (ms)':>10} {'erreurs':>9}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, command, extra_env in SERVERS:
+            process, url = start_server(command, extra_env, tmp)
+            try:
+                run_load(url, min(total, 200), threads, batch)  # chauffe
+                rate, p50, p99, errors = run_load(url, total, threads, batch)
+            finally:
+                process.terminate()
+                process.wait(10)
+            print(f"{name:<26} {rate:>9.0f} {rate * batch:>9.0f} {p50:>10.1f} {p99:>10.1f} {errors:>9}")
+
+
+if __name__ == "__main__":
+    main()
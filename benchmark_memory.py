@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Rapport mémoire des DataFrames des dashboards : types d'origine et types compacts
+(event_frames.compact_frames) sur des événements synthétiques
+
+Les DataFrames d'origine sont construits avec des chaînes en objets Python,
+comme avec la version de pandas de installation.py (pandas < 3).
+
+Usage: python benchmark_memory.py [événements]   (défaut : 1000000)
+"""
+
+import sys
+import time
+from contextlib import nullcontext
+
+import pandas as pd
+
+from dashboard_simple import process_data
+from dashboard_v6_simple import process_data_v6_simple
+from event_frames import compact_frames, memory_bytes
+from synthetic_data import generate_events, generate_v6_events
+
+
+def object_strings():
+    """Chaînes en objets Python même sous pandas 3 (chaînes Arrow par défaut)"""
+    try:
+        return pd.option_context('future.infer_string', False)
+    except (KeyError, pd.errors.OptionError):
+        return nullcontext()
+
+
+def report(label, frames):
+    frames = tuple(frame.astype({c: object for c in frame.columns if pd.api.types.is_string_dtype(frame[c].dtype)})
+                   for frame in frames)
+    start = time.perf_counter()
+    compact = compact_frames(*frames)
+    elapsed = time.perf_counter() - start
+
+    before = sum(memory_bytes(frame) for frame in frames)
+    after = sum(memory_bytes(frame) for frame in compact)
+    print(f"{label:<28} {before / 2**20:>10.1f} {after / 2**20:>10.1f} {before / after:>7.1f}x {elapsed:>8.2f}")
+    return before, after
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print(f"🧮 Mémoire des DataFrames ({size} événements)")
+    print("=" * 68)
+    print(f"{'DataFrames':<28} {'avant (Mo)':>10} {'après (Mo)':>10} {'gain':>8} {'conv. (s)':>8}")
+
+    with object_strings():
+        sessions_df, clicks_df = process_data(generate_events(size))
+    before, after = report("dashboard_simple", (sessions_df, clicks_df))
+    for name, frame in (("  sessions", sessions_df), ("  clics", clicks_df)):
+        report(name, (frame,))
+
+    with object_strings():
+        frames_v6 = process_data_v6_simple(generate_v6_events(size))
+    report("dashboard_v6_simple", frames_v6)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Benchmark de dashboard_simple.process_data sur des événements synthétiques
+
+Usage: python benchmark_process_data.py [tailles...]   (défaut : 10000 100000 1000000)
+"""
+
+import sys
+import time
+
+from synthetic_data import generate_events
+from dashboard_simple import process_data
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+
+    print("🏁 Benchmark process_data")
+    print("=" * 50)
+    for size in sizes:
+        events = generate_events(size)
+        start = time.perf_counter()
+        sessions_df, clicks_df = process_data(events)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>9} événements : {elapsed:8.3f} s  "
+              f"({len(sessions_df)} sessions, {len(clicks_df)} clics)")
+
+
+if __name__ == "__main__":
+    main()
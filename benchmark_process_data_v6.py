@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de process_data_v6_simple : boucle par session vs agrégation groupée
+
+La boucle est l'implémentation d'origine, recopiée telle quelle dans ce fichier.
+
+Usage: python benchmark_process_data_v6.py [tailles...]   (défaut : 1000 5000 20000)
+"""
+
+import sys
+import time
+
+import pandas as pd
+
+from synthetic_data import generate_v6_events
+from dashboard_v6_simple import process_data_v6_simple
+
+
+# Implémentation d'origine de dashboard_v6_simple.py, recopiée telle quelle (seul le nom change)
+def process_data_v6_loop(data):
+    """Traite les données JSON V6 de manière simplifiée"""
+    if not data:
+        return pd.DataFrame(), pd.DataFrame()
+    
+    # Convertit en DataFrame
+    df = pd.DataFrame(data)
+    
+    # Séparer les clics et les sessions
+    clicks_df = df[df['type'] == 'click'].copy() if 'click' in df['type'].values else pd.DataFrame()
+    
+    if not clicks_df.empty:
+        # Créer un DataFrame de sessions simplifié
+        sessions_data = []
+        
+        for session_id in clicks_df['session_id'].unique():
+            session_clicks = clicks_df[clicks_df['session_id'] == session_id]
+            
+            # Première et dernière activité
+            timestamps = pd.to_datetime(session_clicks['timestamp'])
+            session_start = timestamps.min()
+            session_end = timestamps.max()
+            
+            # Données de la session
+            first_click = session_clicks.iloc[0]
+            
+            session_data = {
+                'session_id': session_id,
+                'session_start': session_start,
+                'session_end': session_end,
+                'duration_seconds': (session_end - session_start).total_seconds(),
+                'click_count': len(session_clicks),
+                'client_ip': first_click.get('client_ip', 'Non spécifié'),
+                'ip_source': first_click.get('ip_source', 'Non spécifié'),
+                'gps_latitude': first_click.get('gps_latitude', 0),
+                'gps_longitude': first_click.get('gps_longitude', 0),
+                'gps_accuracy': first_click.get('gps_accuracy', 0),
+                'gps_source': first_click.get('gps_source', 'none'),
+                'geo_country': first_click.get('geo_country', 'Non spécifié'),
+                'geo_city': first_click.get('geo_city', 'Non spécifié'),
+                'geo_source': first_click.get('geo_source', 'Non spécifié')
+            }
+            
+            sessions_data.append(session_data)
+        
+        sessions_df = pd.DataFrame(sessions_data)
+    else:
+        sessions_df = pd.DataFrame()
+    
+    return sessions_df, clicks_df
+
+
+def timed(function, data):
+    start = time.perf_counter()
+    sessions_df, _ = function(data)
+    return time.perf_counter() - start, len(sessions_df)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 5_000, 20_000]
+
+    print("🏁 Benchmark process_data_v6_simple")
+    print("=" * 60)
+    for size in sizes:
+        data = generate_v6_events(size)
+        loop_time, sessions = timed(process_data_v6_loop, data)
+        grouped_time, _ = timed(process_data_v6_simple, data)
+        print(f"{size:>7} clics, {sessions:>6} sessions : boucle {loop_time:7.3f} s  "
+              f"groupby {grouped_time:7.3f} s  (x{loop_time / grouped_time:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Coût du rafraîchissement automatique de dashboard_simple.py avec N spectateurs inactifs
+
+Compare, pour les mêmes spectateurs qui laissent le dashboard ouvert sans
+interagir :
+- 'interval' (ancien comportement) : relance complète de l'application et
+  nouveau téléchargement d'analytics_data.json à chaque intervalle ;
+- 'change' : à chaque intervalle, vérification du signal de changement
+  (requête HEAD partagée) ; relance seulement si le fichier a changé.
+
+Un serveur HTTP local (processus séparé) sert un analytics_data.json
+synthétique et compte les octets envoyés (en-têtes compris). Chaque
+spectateur est une session AppTest ; un tick d'intervalle est simulé par une
+relance complète (mode 'interval') ou par l'appel du corps du fragment de
+surveillance (mode 'change'). Le temps CPU du processus du dashboard
+(time.process_time) et les octets sont mesurés sur les ticks, puis ramenés à
+une heure avec l'intervalle de production (5 s par défaut).
+
+Usage:
+    python benchmark_refresh.py [spectateurs] [événements] [ticks] [changements/heure]
+    (défaut : 5 spectateurs, 2000 événements, 12 ticks, 0 changement)
+"""
+
+import importlib
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from streamlit.testing.v1 import AppTest
+
+from synthetic_data import generate_events
+
+# Intervalle de production (s), utilisé pour ramener les mesures à l'heure
+PRODUCTION_INTERVAL = float(os.getenv('DASHBOARD_REFRESH_INTERVAL', '5'))
+
+# Intervalle réel des ticks simulés (s) : assez long pour expirer les caches à TTL
+TICK_INTERVAL = 0.5
+
+
+class CountingHandler(SimpleHTTPRequestHandler):
+    """Fichiers statiques (Last-Modified, Content-Length) avec compteur d'octets envoyés"""
+
+    def __init__(self, *args, sent=None, **kwargs):
+        self.sent = sent
+        super().__init__(*args, **kwargs)
+
+    def flush_headers(self):
+        self._add_sent(sum(len(chunk) for chunk in getattr(self, '_headers_buffer', [])))
+        super().flush_headers()
+
+    def copyfile(self, source, outputfile):
+        data = source.read()
+        outputfile.write(data)
+        self._add_sent(len(data))
+
+    def _add_sent(self, count):
+        with self.sent.get_lock():
+            self.sent.value += count
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(directory, port, sent):
+    handler = partial(CountingHandler, directory=directory, sent=sent)
+    ThreadingHTTPServer(('127.0.0.1', port.value), handler).serve_forever()
+
+
+def start_server(directory):
+    """Démarre le serveur dans un processus séparé ; retourne (processus, url, compteur)"""
+    port = multiprocessing.Value('i', 0)
+    sent = multiprocessing.Value('q', 0)
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port.value = probe.getsockname()[1]
+    process = multiprocessing.Process(target=serve, args=(directory, port, sent), daemon=True)
+    process.start()
+    url = f'http://127.0.0.1:{port.value}/analytics_data.json'
+    for _ in range(100):
+        try:
+            requests.head(url, timeout=1)
+            break
+        except requests.RequestException:
+            time.sleep(0.05)
+    return process, url, sent
+
+
+def write_data(path, events):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(events, f)
+
+
+def measure(mode, url, sent_counter, data_path, events, viewers, ticks, changes_per_hour):
+    """Octets envoyés et temps CPU pendant `ticks` intervalles d'inactivité"""
+    os.environ.update({
+        'DASHBOARD_REFRESH_MODE': mode,
+        'DASHBOARD_REFRESH_INTERVAL': str(TICK_INTERVAL),
+        'ANALYTICS_DATA_URL': url,
+    })
+    dashboard = importlib.reload(importlib.import_module('dashboard_simple'))
+    dashboard.web_signature.clear()
+    dashboard.DATA_CACHE.invalidate('analytics_data')
+
+    apps = [AppTest.from_file('dashboard_simple.py', default_timeout=60) for _ in range(viewers)]
+    for at in apps:
+        at.run()  # premier affichage, hors mesure
+    seen = [dashboard.source_signature()] * viewers
+
+    # Changements répartis sur les ticks : changements/heure ramenés à la durée simulée
+    change_every = round(3600 / PRODUCTION_INTERVAL / changes_per_hour) if changes_per_hour else 0
+    sent_before = sent_counter.value
+    cpu_before = time.process_time()
+    reruns = 0
+    for tick in range(1, ticks + 1):
+        time.sleep(TICK_INTERVAL)
+        if change_every and tick % change_every == 0:
+            events = events + generate_events(10, seed=tick)
+            write_data(data_path, events)
+        for index, at in enumerate(apps):
+            # Corps de refresh_watcher : relance seulement si le signal a changé
+            signature = dashboard.source_signature()
+            if signature != seen[index]:
+                at.run()
+                seen[index] = signature
+                reruns += 1
+    cpu = time.process_time() - cpu_before
+    sent = sent_counter.value - sent_before
+    return {'bytes': sent, 'cpu': cpu, 'reruns': reruns}
+
+
+def per_hour(value, ticks):
+    return value * (3600 / PRODUCTION_INTERVAL) / ticks
+
+
+def main():
+    args = [int(arg) for arg in sys.argv[1:]]
+    viewers, n_events, ticks, changes_per_hour = args + [5, 2000, 12, 0][len(args):]
+
+    directory = tempfile.mkdtemp(prefix='refresh_bench_')
+    data_path = os.path.join(directory, 'analytics_data.json')
+    events = generate_events(n_events)
+    write_data(data_path, events)
+    process, url, sent_counter = start_server(directory)
+
+    print("🔄 Coût du rafraîchissement automatique (spectateurs inactifs)")
+    print("=" * 62)
+    print(f"{viewers} spectateurs, {n_events} événements "
+          f"({os.path.getsize(data_path) / 1024:.0f} Ko), {ticks} ticks, "
+          f"{changes_per_hour} changement(s)/heure, intervalle de {PRODUCTION_INTERVAL:g} s")
+    results = {}
+    try:
+        for mode in ('interval', 'change'):
+            results[mode] = measure(mode, url, sent_counter, data_path, events, viewers, ticks, changes_per_hour)
+            write_data(data_path, events)
+    finally:
+        process.terminate()
+
+    print(f"\n{'mode':<10} {'Mo/heure':>10} {'CPU s/heure':>12} {'reruns/heure':>13}")
+    for mode, result in results.items():
+        print(f"{mode:<10} {per_hour(result['bytes'], ticks) / 1e6:>10.1f} "
+              f"{per_hour(result['cpu'], ticks):>12.1f} {per_hour(result['reruns'], ticks):>13.0f}")
+    before, after = results['interval'], results['change']
+    print(f"\n📉 Octets : x{before['bytes'] / max(after['bytes'], 1):.0f} de moins, "
+          f"CPU : x{before['cpu'] / max(after['cpu'], 1e-9):.1f} de moins")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
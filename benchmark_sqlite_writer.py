@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark des écritures SQLite de l'API : connexion par événement, pool WAL
+et commit groupé
+
+Usage: python benchmark_sqlite_writer.py [nombre_evenements] [threads]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+os.environ.setdefault("DEBUG", "False")
+
+from api_backend import INSERT_CLICK_SQL, INCREMENT_CLICKS_SQL, write_events
+from db_pool import ConnectionPool
+from write_queue import GroupCommitWriter
+
+
+def click_params(i):
+    return (
+        f"bench_session_{i % 100}", "link", "a", "nav", "Lien",
+        "pdf/thesis.pdf", datetime.now().isoformat(), i, 100, 200,
+        datetime.now().date(),
+    )
+
+
+def create_schema(path):
+    """Crée les tables utilisées par le benchmark avec le schéma de l'API"""
+    import api_backend
+    previous = api_backend.DATABASE_PATH
+    api_backend.DATABASE_PATH = path
+    try:
+        api_backend.init_database()
+    finally:
+        api_backend.DATABASE_PATH = previous
+
+
+def write_legacy(path, i):
+    """Chemin historique : une connexion, un commit et une fermeture par événement"""
+    conn = sqlite3.connect(path)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(INSERT_CLICK_SQL, click_params(i))
+        cursor.execute(INCREMENT_CLICKS_SQL, (f"bench_session_{i % 100}",))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def write_pooled(pool, i):
+    """Nouveau chemin : connexion du pool, requêtes préparées réutilisées"""
+    with pool.connection() as conn:
+        conn.execute(INSERT_CLICK_SQL, click_params(i))
+        conn.execute(INCREMENT_CLICKS_SQL, (f"bench_session_{i % 100}",))
+        conn.commit()
+
+
+def write_grouped(writer, i):
+    """Commit groupé (ack=queued) : l'événement part dans la file sans attendre"""
+    event = {"type": "click", "session_id": f"bench_session_{i % 100}",
+             "page": "pdf/thesis.pdf", "sequence_order": i}
+    writer.submit([(event, "127.0.0.1", datetime.now())])
+
+
+def run(write, total, threads):
+    """Exécute `total` écritures réparties sur `threads` threads, retourne (évts/s, erreurs)"""
+    errors = []
+    per_thread = total // threads
+
+    def worker(offset):
+        for i in range(offset, offset + per_thread):
+            try:
+                write(i)
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+
+    workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    return (per_thread * threads - len(errors)) / elapsed, len(errors)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    print(f"🏁 Benchmark écritures SQLite ({total} clics, {threads} threads)")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, "legacy.db")
+        create_schema(legacy_db)
+        before, before_errors = run(lambda i: write_legacy(legacy_db, i), total, threads)
+
+        pooled_db = os.path.join(tmp, "pooled.db")
+        create_schema(pooled_db)
+        pool = ConnectionPool(pooled_db, size=threads)
+        after, after_errors = run(lambda i: write_pooled(pool, i), total, threads)
+        pool.close_all()
+
+        grouped_db = os.path.join(tmp, "grouped.db")
+        create_schema(grouped_db)
+        pool = ConnectionPool(grouped_db, size=1)
+        writer = GroupCommitWriter(pool, write_events, max_delay=0.005, max_queue=total)
+        start = time.perf_counter()
+        _, grouped_errors = run(lambda i: write_grouped(writer, i), total, threads)
+        # Le débit compte jusqu'au dernier commit, file vidée
+        writer.stop()
+        grouped = (total - grouped_errors) / (time.perf_counter() - start)
+        pool.close_all()
+
+    print(f"Avant (connexion par événement): {before:10.0f} évts/s  erreurs: {before_errors}")
+    print(f"Après (pool WAL)               : {after:10.0f} évts/s  erreurs: {after_errors}")
+    print(f"Commit groupé                  : {grouped:10.0f} évts/s  erreurs: {grouped_errors}")
+    print(f"Gain pool: x{after / before:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks des traitements des dashboards sur des événements synthétiques
+
+Cas mesurés, pour 1k, 10k, 100k et 1M événements (synthetic_data) :
+- dashboard_simple : process_data, analyze_user_journey, extract_filename_from_page ;
+- dashboard_v6_simple : process_data_v6_simple ;
+- dashboard : construction des DataFrames de get_analytics_data
+  (incremental_loader.build_frames puis event_frames.compact_frames).
+
+Pour chaque cas : temps d'exécution (meilleur de plusieurs passes) et pic
+mémoire Python (tracemalloc, passe séparée ; les tampons Arrow n'y figurent
+pas). Les résultats sont écrits en JSON dans benchmark_results.json et
+comparés à la référence benchmark_baseline.json si elle existe ; le code de
+sortie vaut 1 si un cas régresse de plus de REGRESSION_THRESHOLD.
+
+Usage:
+    python benchmark_suite.py [tailles...]            (mesure et comparaison)
+    python benchmark_suite.py baseline [tailles...]   (enregistre la référence)
+"""
+
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from dashboard_simple import analyze_user_journey, extract_filename_from_page, process_data
+from dashboard_v6_simple import process_data_v6_simple
+from event_frames import compact_frames
+from incremental_loader import build_frames
+from page_classifier import classify_page
+from synthetic_data import generate_events, generate_v6_events
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+RESULTS_PATH = 'benchmark_results.json'
+BASELINE_PATH = 'benchmark_baseline.json'
+
+# Régression signalée au-delà de ce rapport (temps ou pic mémoire) avec la référence
+REGRESSION_THRESHOLD = 1.25
+
+# Temps minimal (s) pour comparer les temps : en dessous, le bruit domine
+MIN_COMPARABLE_SECONDS = 0.05
+
+
+def _clicks_and_sessions(events):
+    sessions_df, clicks_df = process_data(events)
+    return clicks_df, sessions_df
+
+
+def _pages(events):
+    classify_page.cache_clear()  # cache LRU vide : coût d'un premier affichage
+    return [event.get('page', '') for event in events if event.get('type') == 'click']
+
+
+def _extract_filenames(pages):
+    return [extract_filename_from_page(page) for page in pages]
+
+
+def _analytics_frames(events):
+    return compact_frames(*build_frames(events))
+
+
+# Cas : nom -> (générateur d'événements, préparation hors mesure, fonction mesurée)
+CASES = {
+    'process_data': (generate_events, lambda events: (events,), process_data),
+    'analyze_user_journey': (generate_events, _clicks_and_sessions, analyze_user_journey),
+    'extract_filename_from_page': (generate_events, lambda events: (_pages(events),), _extract_filenames),
+    'process_data_v6_simple': (generate_v6_events, lambda events: (events,), process_data_v6_simple),
+    'get_analytics_data.frames': (generate_events, lambda events: (events,), _analytics_frames),
+}
+
+
+def repeats_for(size):
+    return 5 if size <= 10_000 else 3 if size <= 100_000 else 1
+
+
+def measure(setup, function, events, repeats):
+    """(meilleur temps en s, pic mémoire en octets) de function(*setup(events))"""
+    times = []
+    for _ in range(repeats):
+        args = setup(events)
+        gc.collect()
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+
+    args = setup(events)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def run_suite(sizes=SIZES, cases=None):
+    """Exécute les cas pour chaque taille ; retourne le document de résultats"""
+    cases = cases or list(CASES)
+    results = []
+    for size in sizes:
+        datasets = {}
+        for name in cases:
+            generator, setup, function = CASES[name]
+            if generator not in datasets:
+                datasets[generator] = generator(size)
+            seconds, peak = measure(setup, function, datasets[generator], repeats_for(size))
+            results.append({'case': name, 'events': size, 'seconds': seconds,
+                            'peak_mb': peak / 2**20, 'repeats': repeats_for(size)})
+            print(f"{name:<28} {size:>9} {seconds:>10.4f} {peak / 2**20:>10.1f}")
+        del datasets
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {'python': platform.python_version(), 'pandas': pd.__version__,
+                        'numpy': np.__version__, 'machine': platform.machine(),
+                        'cpus': os.cpu_count()},
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """Lignes de comparaison (cas, taille, rapport temps, rapport mémoire, régression)"""
+    reference = {(r['case'], r['events']): r for r in baseline['results']}
+    rows = []
+    for result in current['results']:
+        ref = reference.get((result['case'], result['events']))
+        if ref is None:
+            continue
+        time_ratio = result['seconds'] / ref['seconds'] if ref['seconds'] else float('inf')
+        memory_ratio = result['peak_mb'] / ref['peak_mb'] if ref['peak_mb'] else float('inf')
+        slower = time_ratio > threshold and max(result['seconds'], ref['seconds']) >= MIN_COMPARABLE_SECONDS
+        rows.append((result['case'], result['events'], time_ratio, memory_ratio,
+                     slower or memory_ratio > threshold))
+    return rows
+
+
+def save(document, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+
+
+def main():
+    args = sys.argv[1:]
+    record_baseline = bool(args) and args[0] == 'baseline'
+    sizes = [int(arg) for arg in args[record_baseline:]] or SIZES
+
+    print("🏁 Suite de benchmarks des dashboards")
+    print("=" * 62)
+    print(f"{'cas':<28} {'événements':>9} {'temps (s)':>10} {'pic (Mo)':>10}")
+    document = run_suite(sizes)
+
+    if record_baseline:
+        save(document, BASELINE_PATH)
+        print(f"💾 Référence enregistrée dans {BASELINE_PATH}")
+        return 0
+
+    save(document, RESULTS_PATH)
+    print(f"💾 Résultats enregistrés dans {RESULTS_PATH}")
+    if not os.path.exists(BASELINE_PATH):
+        print("ℹ️ Pas de référence : python benchmark_suite.py baseline")
+        return 0
+
+    with open(BASELINE_PATH, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\n📊 Comparaison avec {BASELINE_PATH} ({baseline['created']})")
+    regressions = 0
+    for case, size, time_ratio, memory_ratio, regressed in compare(document, baseline):
+        regressions += regressed
+        print(f"{'⚠️' if regressed else '  '} {case:<28} {size:>9} temps x{time_ratio:5.2f}  mémoire x{memory_ratio:5.2f}")
+    print(f"{'❌' if regressions else '✅'} {regressions} régression(s) au-delà de x{REGRESSION_THRESHOLD}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,6 +22,9 @@ class Config:
     
     # Configuration de la base de données
     DATABASE_PATH = os.getenv("DATABASE_PATH", "advanced_analytics.db")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 4))
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # NORMAL suffit en mode WAL
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
     
     # Port pour l'API
     API_PORT = int(os.getenv("API_PORT", 5000))
@@ -36,11 +39,37 @@ class Config:
     # Configuration du tracking
     TRACKING_ENDPOINT = os.getenv("TRACKING_ENDPOINT", "/api/track")
     GEOLOCATION_ENABLED = os.getenv("GEOLOCATION_ENABLED", "True").lower() == "true"
-    SESSION_TIMEOUT = int(os.getenv("SESSION_TIMEOUT", 1800))
+    SESSION_TIMEOUT = int(os.getenv("SESSION_TIMEOUT", 1800))  # inactivité avant fermeture d'une session
+    JOURNEY_SWEEP_INTERVAL = float(os.getenv("JOURNEY_SWEEP_INTERVAL", 5))  # écriture des parcours (secondes)
+    
+    # Écriture en commit groupé (/api/track)
+    GROUP_COMMIT_ENABLED = os.getenv("GROUP_COMMIT_ENABLED", "False").lower() == "true"
+    GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", 500))
+    GROUP_COMMIT_MAX_DELAY_MS = int(os.getenv("GROUP_COMMIT_MAX_DELAY_MS", 50))
+    GROUP_COMMIT_MAX_QUEUE = int(os.getenv("GROUP_COMMIT_MAX_QUEUE", 10000))
+    GROUP_COMMIT_ACK_TIMEOUT = float(os.getenv("GROUP_COMMIT_ACK_TIMEOUT", 5))
+    TRACK_ACK_MODE = os.getenv("TRACK_ACK_MODE", "committed")  # committed | queued
+    
+    # Mode d'ingestion ASGI (asgi_ingest.py)
+    ASGI_MAX_IN_FLIGHT = int(os.getenv("ASGI_MAX_IN_FLIGHT", 256))  # au-delà : 503 immédiat
+    ASGI_BACKLOG = int(os.getenv("ASGI_BACKLOG", 2048))
+    ASGI_BATCH_DELAY_MS = int(os.getenv("ASGI_BATCH_DELAY_MS", 0))  # attente max pour grossir un lot
+    
+    # Copie des événements dans le magasin Parquet partitionné par date (parquet_store.py)
+    PARQUET_STORE_ENABLED = os.getenv("PARQUET_STORE_ENABLED", "False").lower() == "true"
+    PARQUET_STORE_PATH = os.getenv("ANALYTICS_PARQUET_PATH", "analytics_parquet")
+    PARQUET_FLUSH_ROWS = int(os.getenv("PARQUET_FLUSH_ROWS", 5000))
+    PARQUET_FLUSH_INTERVAL = float(os.getenv("PARQUET_FLUSH_INTERVAL", 60))
     
     # Configuration géolocalisation (optionnel)
     IPAPI_KEY = os.getenv("IPAPI_KEY", "")
     
+    # Géolocalisation hors ligne des sessions par plages IP (geo_enrichment.py)
+    GEOIP_DATABASE_PATH = os.getenv("GEOIP_DATABASE_PATH", "ip_ranges.csv")
+    GEOIP_CACHE_SIZE = int(os.getenv("GEOIP_CACHE_SIZE", 65536))
+    GEOIP_CACHE_TTL = int(os.getenv("GEOIP_CACHE_TTL", 86400))  # secondes
+    GEOIP_NEGATIVE_TTL = int(os.getenv("GEOIP_NEGATIVE_TTL", 3600))  # IP absentes de la base
+    
     # Mode debug
     DEBUG = os.getenv("DEBUG", "True").lower() == "true"
 
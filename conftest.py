@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Fixtures partagées : api_backend branché sur une base SQLite temporaire
+"""
+
+from contextlib import ExitStack, contextmanager
+
+import pytest
+
+import api_backend
+from db_pool import ConnectionPool
+from sessionizer import Sessionizer
+from write_queue import GroupCommitWriter
+
+
+@contextmanager
+def backend_database(db_path, **writer_options):
+    """Branche api_backend (DATABASE_PATH, POOL, WRITER, SESSIONIZER) sur `db_path` le temps du bloc
+
+    `writer_options` est transmis au GroupCommitWriter (on_batch, after_commit...).
+    Retourne (pool, writer) ; le writer est arrêté et le pool fermé en sortie.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        pool = ConnectionPool(db_path, size=2)
+        writer = GroupCommitWriter(pool, api_backend.write_events, max_delay=0.01, **writer_options)
+        monkeypatch.setattr(api_backend, 'DATABASE_PATH', db_path)
+        monkeypatch.setattr(api_backend, 'POOL', pool)
+        monkeypatch.setattr(api_backend, 'WRITER', writer)
+        monkeypatch.setattr(api_backend, 'SESSIONIZER', Sessionizer(pool.connection))
+        api_backend.init_database()
+        try:
+            yield pool, writer
+        finally:
+            writer.stop()
+            api_backend.SESSIONIZER.stop()
+            pool.close_all()
+
+
+@pytest.fixture(scope='session')
+def api_database():
+    """backend_database, pour les fixtures d'une autre portée que la fonction"""
+    return backend_database
+
+
+@pytest.fixture
+def make_backend(tmp_path):
+    """Fabrique : make_backend(**writer_options) -> (client Flask, chemin de la base)"""
+    with ExitStack() as stack:
+        def make(**writer_options):
+            db_path = str(tmp_path / 'analytics.db')
+            stack.enter_context(backend_database(db_path, **writer_options))
+            return api_backend.app.test_client(), db_path
+        yield make
+
+
+@pytest.fixture
+def client(make_backend):
+    """Client Flask et chemin de la base temporaire"""
+    return make_backend()
@@ -2,70 +2,81 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import datetime
-import requests
+import os
 import time
 
+from event_frames import compact_frames
+from incremental_loader import load_with_fallback
+from paged_table import PagedFrame, paged_table, session_paged_frame
+from parquet_store import PERIOD_OPTIONS, load_frames, period_bounds
+from shared_cache import get_cache
+
 # Streamlit Cloud: aucune dépendance à config_setup.py nécessaire
 APP_TITLE = "Tracking nexgate Christelle"
 
 st.set_page_config(page_title=APP_TITLE, page_icon="📊", layout="wide")
 
-@st.cache_data(ttl=60)
-def get_analytics_data():
+# Sources de données (surchargeables pour tester contre un serveur HTTP local)
+PRIMARY_URL = os.getenv('ANALYTICS_PRIMARY_URL', 'https://christellelusso.nexgate.ch/analytics_data.json')
+MIRROR_URL = os.getenv('ANALYTICS_MIRROR_URL', (
+    'https://raw.githubusercontent.com/christelle-git/dashboard_streamlit_nexgate/'
+    'streamlit-deploy/analytics_data.json'
+))
+# Magasin Parquet alimenté par api_backend.py (utilisé s'il existe)
+PARQUET_PATH = os.getenv('ANALYTICS_PARQUET_PATH', 'analytics_parquet')
+
+# Données partagées par toutes les sessions : la dernière version est servie
+# sans attendre pendant qu'une seule mise à jour tourne en arrière-plan
+DATA_CACHE = get_cache('dashboard')
+
+
+def fetch_analytics_data():
     """Tente de charger les données depuis Nexgate, puis depuis le miroir GitHub en fallback.
-    Retourne: (sessions_df, clicks_df, source_str)
+    Le chargement est incrémental (GET conditionnel, seuls les nouveaux événements sont parsés).
+    Retourne: (sessions_df, clicks_df, source_str) ; lève l'erreur si aucune source ne répond
     """
-    primary_url = 'https://christellelusso.nexgate.ch/analytics_data.json'
-    mirror_url = (
-        'https://raw.githubusercontent.com/christelle-git/dashboard_streamlit_nexgate/'
-        'streamlit-deploy/analytics_data.json'
-    )
+    sessions_df, clicks_df, source, err = load_with_fallback([
+        (PRIMARY_URL, "nexgate"),
+        (MIRROR_URL, "github_mirror"),
+    ])
+    if source == "none":
+        raise err
+    # Types compacts (catégories, float32, int16) : moins de mémoire par session Streamlit
+    sessions_df, clicks_df = compact_frames(sessions_df, clicks_df)
+    return sessions_df, clicks_df, source
 
-    data = None
-    source = ""
 
-    # Source principale: Nexgate
+def get_analytics_data():
+    """Données du cache partagé (DATA_CACHE), éventuellement périmées
+    Retourne: (sessions_df, clicks_df, source_str)
+    """
     try:
-        resp = requests.get(primary_url, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        source = "nexgate"
-    except Exception:
-        # Fallback: miroir GitHub
-        try:
-            resp2 = requests.get(mirror_url, timeout=10)
-            resp2.raise_for_status()
-            data = resp2.json()
-            source = "github_mirror"
-        except Exception as err2:
-            st.error("Impossible de charger les données (Nexgate et miroir GitHub indisponibles).")
-            st.caption(str(err2))
-            return pd.DataFrame(), pd.DataFrame(), "none"
-
-    sessions = []
-    clicks = []
-            for entry in data:
-        t = entry.get('type')
-        if t == 'session_start':
-            sessions.append({
-                        'session_id': entry.get('session_id', ''),
-                        'timestamp': entry.get('timestamp', ''),
-                        'country': entry.get('country', ''),
-                        'city': entry.get('city', ''),
-                'client_ip': entry.get('client_ip', ''),
-                        'latitude': entry.get('latitude', 0),
-                        'longitude': entry.get('longitude', 0)
-                    })
-        elif t == 'click':
-            clicks.append({
-                'session_id': entry.get('session_id', ''),
-                'timestamp': entry.get('timestamp', ''),
-                'page': entry.get('page', ''),
-                'file_clicked': entry.get('file_clicked', ''),
-                'sequence_order': entry.get('sequence_order', 0)
-            })
-
-    return pd.DataFrame(sessions), pd.DataFrame(clicks), source
+        cached = DATA_CACHE.get('analytics_data', fetch_analytics_data)
+    except Exception as err:
+        st.error("Impossible de charger les données (Nexgate et miroir GitHub indisponibles).")
+        st.caption(str(err))
+        return pd.DataFrame(), pd.DataFrame(), "none"
+    if cached.stale:
+        st.caption(f"⏳ Données chargées il y a {cached.age:.0f} s, mise à jour en arrière-plan")
+    return cached.value
+
+
+@st.cache_data(ttl=60)
+def get_parquet_data(start, end):
+    """Lit le magasin Parquet local : seules les partitions de la période sont ouvertes
+    Retourne: (sessions_df, clicks_df, source_str)
+    """
+    sessions_df, clicks_df = compact_frames(*load_frames(PARQUET_PATH, start, end))
+    return sessions_df, clicks_df, "parquet"
+
+
+def click_details(clicks_df):
+    """Détail des clics (plus récents en premier), la colonne Date triée chronologiquement"""
+    details = clicks_df[['timestamp', 'page', 'file_clicked']].copy()
+    details['__ts'] = pd.to_datetime(details['timestamp'])
+    details = details.sort_values('__ts', ascending=False, kind='stable')
+    details['Date'] = details['__ts'].dt.strftime('%d/%m/%Y %H:%M')
+    return PagedFrame(details[['Date', 'page', 'file_clicked']].fillna(''), sort_keys={'Date': details['__ts']})
 
 
 def main():
@@ -77,13 +88,23 @@ def main():
     with c_refresh:
         if st.button("🔄 Rafraîchir les données"):
             st.cache_data.clear()
+            DATA_CACHE.invalidate('analytics_data')
             st.rerun()
 
-    sessions_df, clicks_df, source = get_analytics_data()
+    if os.path.isdir(PARQUET_PATH):
+        start, end = period_bounds(st.sidebar.selectbox("📅 Période", list(PERIOD_OPTIONS)))
+        sessions_df, clicks_df, source = get_parquet_data(start, end)
+    else:
+        sessions_df, clicks_df, source = get_analytics_data()
+        with st.sidebar.expander("🗄️ Cache des données"):
+            for line in DATA_CACHE.describe():
+                st.caption(line)
 
     # Bandeau d'information source
     if source == "nexgate":
         st.success("Source des données: serveur Nexgate (production)")
+    elif source == "parquet":
+        st.success(f"Source des données: magasin Parquet local ({PARQUET_PATH})")
     elif source == "github_mirror":
         st.warning("Source des données: miroir GitHub (Nexgate indisponible)")
     else:
@@ -127,9 +148,9 @@ def main():
                 fig.update_xaxes(title="Fichier")
                 fig.update_yaxes(title="Nombre de clics")
                 st.plotly_chart(fig, use_container_width=True)
-            details = clicks_df.copy()
-            details['Date'] = pd.to_datetime(details['timestamp']).dt.strftime('%d/%m/%Y %H:%M')
-            st.dataframe(details[['Date', 'page', 'file_clicked']].fillna(''), use_container_width=True)
+            # Détail des clics paginé : seule la page visible est envoyée au navigateur
+            details = session_paged_frame('click_details', clicks_df, click_details)
+            paged_table(details, key="clics")
 
     # Onglet Parcours Utilisateurs (simplifié)
     with tab3:
@@ -2,12 +2,20 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import datetime
+import hashlib
 import json
 import requests
 import time
 import os
 import re
 from collections import Counter
+from event_frames import compact_frames
+from file_catalog import CATALOG_COLUMNS, load_catalog
+from page_classifier import MAIN_PAGE, classify_page, classify_pages
+from paged_table import PagedFrame, paged_table
+from parquet_store import PERIOD_OPTIONS, period_bounds, read_event_records
+from render_timing import RenderTimer
+from shared_cache import get_cache
 
 st.set_page_config(
     page_title="Dashboard Analytics Simplifié",
@@ -15,38 +23,116 @@ st.set_page_config(
     layout="wide"
 )
 
-# Auto-refresh toutes les 5 secondes
-if 'last_refresh' not in st.session_state:
-    st.session_state.last_refresh = time.time()
+# Rafraîchissement automatique :
+# - 'change' (défaut) : toutes les REFRESH_INTERVAL secondes, un signal léger (en-têtes
+#   d'une requête HEAD, ou fichiers du magasin Parquet), partagé par tous les spectateurs,
+#   est comparé à celui du dernier rendu ; l'application n'est relancée que s'il a changé ;
+# - 'interval' : relance complète et nouveau téléchargement à chaque intervalle (ancien comportement).
+REFRESH_MODE = os.getenv('DASHBOARD_REFRESH_MODE', 'change')
+REFRESH_INTERVAL = float(os.getenv('DASHBOARD_REFRESH_INTERVAL', '5'))
 
-current_time = time.time()
-if current_time - st.session_state.last_refresh > 5:
-    st.session_state.last_refresh = current_time
-    st.rerun()
+DATA_URL = os.getenv('ANALYTICS_DATA_URL', 'https://christellelusso.nexgate.ch/analytics_data.json')
 
-@st.cache_data(ttl=5, show_spinner=False)
-def get_analytics_data():
-    """Récupère les données depuis le serveur web"""
+def _interval_bucket():
+    return int(time.time() // REFRESH_INTERVAL)
+
+@st.cache_data(ttl=REFRESH_INTERVAL, show_spinner=False)
+def web_signature():
+    """Signal de changement du fichier distant : (ETag, Last-Modified, taille) d'une requête HEAD
+
+    Si HEAD échoue (serveur injoignable compris) ou ne fournit aucun de ces
+    en-têtes : l'intervalle courant, pour retenter le chargement à chaque intervalle.
+    """
+    try:
+        response = requests.head(DATA_URL, timeout=5, allow_redirects=True)
+    except requests.RequestException:
+        return _interval_bucket()
+    validators = tuple(response.headers.get(name) for name in ('ETag', 'Last-Modified', 'Content-Length'))
+    return validators if response.ok and any(validators) else _interval_bucket()
+
+@st.cache_data(ttl=REFRESH_INTERVAL, show_spinner=False)
+def parquet_signature():
+    """Signal de changement du magasin Parquet : nombre, taille totale et date des fichiers"""
+    count = size = latest = 0
+    for directory, _, filenames in os.walk(PARQUET_PATH):
+        for filename in filenames:
+            stat = os.stat(os.path.join(directory, filename))
+            count += 1
+            size += stat.st_size
+            latest = max(latest, stat.st_mtime_ns)
+    return count, size, latest
+
+def source_signature():
+    """Signal de changement de la source de données affichée"""
+    if REFRESH_MODE == 'interval':
+        return _interval_bucket()
+    return parquet_signature() if os.path.isdir(PARQUET_PATH) else web_signature()
+
+@st.fragment(run_every=REFRESH_INTERVAL)
+def refresh_watcher(seen):
+    """Relance l'application si la source a changé depuis le dernier rendu
+
+    Sans changement, seul ce fragment vide s'exécute : ni téléchargement ni retraitement.
+    """
+    if source_signature() != seen:
+        st.rerun()
+
+# Dernier fichier téléchargé, partagé par toutes les sessions : quand la signature
+# change, il reste servi pendant l'unique retéléchargement en arrière-plan
+DATA_CACHE = get_cache('dashboard_simple', soft_ttl=None)
+
+def fetch_analytics_data():
+    """Télécharge analytics_data.json ; lève une exception en cas d'échec"""
+    response = requests.get(DATA_URL, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+def get_analytics_data(signature):
+    """Récupère les données depuis le serveur web
+
+    `signature` (source_signature) est la version attendue : le fichier n'est
+    retéléchargé que lorsqu'elle change, une fois pour tous les spectateurs,
+    et la version précédente est servie en attendant.
+    Retourne (données, statut, signature des données servies).
+    """
     # Essaie d'abord le serveur web avec les vraies données
     try:
-        response = requests.get('https://christellelusso.nexgate.ch/analytics_data.json', timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            return data, "✅ Données récupérées depuis le serveur web (nexgate.ch)"
-        else:
-            st.error(f"Erreur HTTP: {response.status_code}")
-            return [], "❌ Erreur lors de la récupération des données"
+        cached = DATA_CACHE.get('analytics_data', fetch_analytics_data, version=signature)
+        status = "✅ Données récupérées depuis le serveur web (nexgate.ch)"
+        if cached.stale:
+            status += f" (mise à jour en cours, périmées depuis {cached.staleness:.0f} s)"
+        return cached.value, status, cached.version
+    except requests.HTTPError as e:
+        st.error(f"Erreur HTTP: {e.response.status_code}")
+        return [], "❌ Erreur lors de la récupération des données", signature
     except Exception as e:
         # En cas d'erreur, essaie l'API Flask locale
         try:
             st.warning(f"⚠️ Serveur web inaccessible ({e}). Tentative avec l'API locale...")
             response = requests.get('http://localhost:5001/api/health', timeout=5)
             if response.status_code == 200:
-                return [], "🔄 API locale disponible - Utilisez le dashboard complet (./start_all.sh)"
+                return [], "🔄 API locale disponible - Utilisez le dashboard complet (./start_all.sh)", signature
             else:
-                return [], "❌ Serveur web et API locale indisponibles"
+                return [], "❌ Serveur web et API locale indisponibles", signature
         except:
-            return [], "❌ Serveur web indisponible (bloqué par proxy/VPN). Utilisez le dashboard à la maison ou désactivez le proxy."
+            return [], "❌ Serveur web indisponible (bloqué par proxy/VPN). Utilisez le dashboard à la maison ou désactivez le proxy.", signature
+
+# Magasin Parquet alimenté par api_backend.py (utilisé s'il existe)
+PARQUET_PATH = os.getenv('ANALYTICS_PARQUET_PATH', 'analytics_parquet')
+
+# Colonnes lues dans le magasin Parquet (projection) : celles utilisées par process_data
+PARQUET_COLUMNS = [
+    'session_id', 'timestamp', 'page', 'file_clicked', 'sequence_order',
+    'country', 'city', 'client_ip', 'latitude', 'longitude',
+    'session_duration', 'click_count', 'duration_seconds',
+    'gps_latitude', 'gps_longitude', 'geo_country', 'geo_city',
+]
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def get_parquet_data(start, end, signature):
+    """Récupère les événements de la période depuis le magasin Parquet local (relu quand `signature` change)"""
+    data = read_event_records(PARQUET_PATH, start, end, columns=PARQUET_COLUMNS)
+    return data, f"✅ {len(data)} événements lus depuis le magasin Parquet ({PARQUET_PATH})"
 
 def get_test_data():
     """Retourne des données de test pour le développement"""
@@ -89,91 +175,71 @@ def get_test_data():
         }
     ]
 
-@st.cache_data(ttl=300, show_spinner=False)  # Cache 5 minutes pour la liste des fichiers
+@st.cache_data(ttl=300, show_spinner=False)  # Cache 5 minutes pour le catalogue
+def get_file_catalog():
+    """Catalogue des fichiers du site (pdf/, drawing/, pages HTML), indexé par nom de fichier"""
+    try:
+        return load_catalog()
+    except OSError as e:
+        st.error(f"Erreur lors de la construction du catalogue de fichiers: {e}")
+        return pd.DataFrame(columns=CATALOG_COLUMNS)
+
 def get_available_files():
     """Récupère la liste des fichiers disponibles sur le site"""
-    try:
-        # Récupère la page principale pour extraire les liens
-        response = requests.get('https://christellelusso.nexgate.ch/', timeout=10)
-        if response.status_code == 200:
-            html_content = response.text
-            
-            # Extrait tous les liens vers des fichiers
-            file_patterns = [
-                r'href=["\']([^"\']*\.(?:jpg|jpeg|png|gif|pdf|doc|docx|txt))["\']',
-                r'src=["\']([^"\']*\.(?:jpg|jpeg|png|gif|pdf|doc|docx|txt))["\']'
-            ]
-            
-            found_files = set()
-            for pattern in file_patterns:
-                matches = re.findall(pattern, html_content, re.IGNORECASE)
-                for match in matches:
-                    # Nettoie le chemin et extrait le nom de fichier
-                    if match.startswith('/'):
-                        match = match[1:]
-                    if match.startswith('http'):
-                        # URL complète, extrait le nom de fichier
-                        filename = os.path.basename(match)
-                    else:
-                        # Chemin relatif
-                        filename = os.path.basename(match)
-                    
-                    if filename and '.' in filename:
-                        found_files.add(filename)
-            
-            # Ajoute aussi les fichiers connus des dossiers drawing et pdf
-            known_files = [
-                # Images du dossier drawing
-                "BD_criterium.jpg", "books_stack_cp.jpg", "crazy_love_cp_clean.jpg", 
-                "dense_cp.JPG", "finger_noze_2.jpg", "flying_to_the_moon.png", 
-                "funny_games.png", "joke_maths_cp.jpg", "lenny_cp.jpg", 
-                "massue_tot_cp.jpg", "mystic.jpg", "navier_stokes_green_tv_cp.jpg", 
-                "paperPhys_cp.jpg", "pastel.png", "pop_art.png", "run_run.JPG", 
-                "school_cp.jpg", "sparkling.jpg", "sport_training.jpg", "wake_up.jpg",
-                # PDFs du dossier pdf
-                "abstract_lusso.pdf", "canum.pdf", "controle1.pdf", "controle2.pdf", 
-                "controle3.pdf", "devoir.pdf", "documentation_pres.pdf", "efrei_2025.pdf", 
-                "gdt.pdf", "indus_pres.pdf", "poster_ihp.pdf", "poster_roscoff.pdf", 
-                "presentation_christelle.pdf", "presentation_ljll.pdf", 
-                "S4SM_algebre_TD1_2012.pdf", "S4SM-algebre-TD2-2012.pdf", 
-                "S4SM-algebre-TD3.pdf", "S4SM-algebre-TD4-2012.pdf", "S4SM-exam-2012.pdf", 
-                "td1_algebre.pdf", "td1.pdf", "td2_algebre.pdf", "td2.pdf", 
-                "td3_algebre_copie.pdf", "td3_algebre.pdf", "td3.pdf", "td4_algebre.pdf", 
-                "td4.pdf", "td5_algebre.pdf", "td6_algebre.pdf", "td7_algebre.pdf", 
-                "thesis.pdf"
-            ]
-            
-            # Combine les fichiers trouvés et connus
-            all_files = list(found_files.union(set(known_files)))
-            all_files.sort()
-            
-            return all_files
-            
-    except Exception as e:
-        st.error(f"Erreur lors de la récupération des fichiers: {e}")
-        # Fallback vers la liste de base
-        return [
-            "BD_criterium.jpg", "books_stack_cp.jpg", "crazy_love_cp_clean.jpg", 
-            "dense_cp.JPG", "finger_noze_2.jpg", "flying_to_the_moon.png", 
-            "funny_games.png", "joke_maths_cp.jpg", "lenny_cp.jpg", 
-            "massue_tot_cp.jpg", "mystic.jpg", "navier_stokes_green_tv_cp.jpg", 
-            "paperPhys_cp.jpg", "pastel.png", "pop_art.png", "run_run.JPG", 
-            "school_cp.jpg", "sparkling.jpg", "sport_training.jpg", "wake_up.jpg",
-            "abstract_lusso.pdf", "canum.pdf", "controle1.pdf", "controle2.pdf", 
-            "controle3.pdf", "devoir.pdf", "documentation_pres.pdf", "efrei_2025.pdf", 
-            "gdt.pdf", "indus_pres.pdf", "poster_ihp.pdf", "poster_roscoff.pdf", 
-            "presentation_christelle.pdf", "presentation_ljll.pdf", 
-            "S4SM_algebre_TD1_2012.pdf", "S4SM-algebre-TD2-2012.pdf", 
-            "S4SM-algebre-TD3.pdf", "S4SM-algebre-TD4-2012.pdf", "S4SM-exam-2012.pdf", 
-            "td1_algebre.pdf", "td1.pdf", "td2_algebre.pdf", "td2.pdf", 
-            "td3_algebre_copie.pdf", "td3_algebre.pdf", "td3.pdf", "td4_algebre.pdf", 
-            "td4.pdf", "td5_algebre.pdf", "td6_algebre.pdf", "td7_algebre.pdf", 
-            "thesis.pdf"
-        ]
+    return sorted(get_file_catalog().index)
+
+def file_clicks_table(catalog, file_type, click_counts):
+    """Fichiers d'un type avec leur nombre de clics, joints par nom de fichier"""
+    files = catalog[catalog['type'] == file_type]
+    table = pd.DataFrame({
+        'Fichier': files.index,
+        'Nombre de Clics': click_counts.reindex(files.index, fill_value=0).astype(int).to_numpy(),
+        'Taille (Ko)': (files['size'] / 1024).round(1).to_numpy(),
+        'Modifié le': pd.to_datetime(files['last_modified'], utc=True).dt.strftime('%Y-%m-%d').to_numpy(),
+    })
+    return table.sort_values(['Nombre de Clics', 'Fichier'], ascending=[False, True])
+
+# Champs repris des événements session_end : (champ du résumé, colonne source, défaut)
+SESSION_END_FIELDS = [
+    ('session_duration', 'session_duration', 0),
+    ('click_count', 'click_count', 0),
+    ('end_timestamp', 'timestamp', ''),
+    ('client_ip', 'client_ip', ''),
+    ('country', 'country', ''),
+    ('city', 'city', ''),
+    ('latitude', 'latitude', 0),
+    ('longitude', 'longitude', 0),
+]
+
+# Colonnes ajoutées aux sessions : (colonne, champ du résumé, défaut si pas de session_end)
+SESSION_END_COLUMNS = [
+    ('session_duration_from_end', 'session_duration', 0),
+    ('click_count_from_end', 'click_count', 0),
+    ('end_timestamp_from_end', 'end_timestamp', ''),
+    ('client_ip_from_end', 'client_ip', ''),
+]
+
+def summarize_session_ends(df):
+    """Une ligne par session ayant un session_end, indexée par session_id
+    
+    Garde les valeurs du dernier session_end de chaque session ; les sessions
+    sont dans l'ordre de leur premier session_end.
+    """
+    if 'session_end' not in df['type'].values:
+        return None
+    
+    end_rows = df[df['type'] == 'session_end']
+    last = end_rows.drop_duplicates('session_id', keep='last').set_index('session_id')
+    order = pd.Index(end_rows['session_id'].drop_duplicates(), name='session_id')
+    
+    summary = pd.DataFrame(index=order)
+    for field, source, default in SESSION_END_FIELDS:
+        summary[field] = last[source].reindex(order) if source in last.columns else default
+    return summary
 
 def process_data(data):
     """Traite les données JSON en DataFrames"""
-    if not data:
+    if data is None or len(data) == 0:
         return pd.DataFrame(), pd.DataFrame()
     
     # Convertit en DataFrame
@@ -183,24 +249,7 @@ def process_data(data):
     clicks_df = df[df['type'] == 'click'].copy() if 'click' in df['type'].values else pd.DataFrame()
     
     # Traiter les événements session_end pour enrichir les données
-    session_end_df = df[df['type'] == 'session_end'].copy() if 'session_end' in df['type'].values else pd.DataFrame()
-    
-    # Si on a des événements session_end, on peut les utiliser pour enrichir les sessions
-    if not session_end_df.empty:
-        # Créer un mapping session_id -> données de fin de session
-        session_end_mapping = {}
-        for _, row in session_end_df.iterrows():
-            session_id = row['session_id']
-            session_end_mapping[session_id] = {
-                'session_duration': row.get('session_duration', 0),
-                'click_count': row.get('click_count', 0),
-                'end_timestamp': row.get('timestamp', ''),
-                'client_ip': row.get('client_ip', ''),
-                'country': row.get('country', ''),
-                'city': row.get('city', ''),
-                'latitude': row.get('latitude', 0),
-                'longitude': row.get('longitude', 0)
-            }
+    session_end_summary = summarize_session_ends(df)
     
     # Traitement des données
     if not clicks_df.empty:
@@ -208,9 +257,7 @@ def process_data(data):
         clicks_per_session = clicks_df.groupby('session_id').size().reset_index(name='click_count')
         
         # Adapter aux données classiques ET V6 de l'hébergeur
-        agg_columns = {
-            'timestamp': ['min', 'max']  # début et fin de session
-        }
+        agg_columns = {}
         
         # PRIORITÉ 1: Colonnes classiques (qui existent dans vos données)
         if 'country' in clicks_df.columns:
@@ -234,15 +281,14 @@ def process_data(data):
         if 'longitude' not in agg_columns and 'gps_longitude' in clicks_df.columns:
             agg_columns['gps_longitude'] = 'first'
         
-        sessions_df = clicks_df.groupby('session_id').agg(agg_columns).reset_index()
-        
-        # Renommer les colonnes
-        new_columns = ['session_id', 'session_start', 'session_end']
-        for col in agg_columns.keys():
-            if col != 'timestamp':
-                new_columns.append(col)
-        
-        sessions_df.columns = new_columns
+        # Début et fin de session : un seul tri des timestamps puis premier/dernier par session
+        # (min/max sur des chaînes passerait par une boucle Python par groupe)
+        ordered = clicks_df[['session_id', 'timestamp']].sort_values('timestamp', kind='stable')
+        sessions_df = ordered.groupby('session_id')['timestamp'].agg(['first', 'last'])
+        sessions_df.columns = ['session_start', 'session_end']
+        if agg_columns:
+            sessions_df = sessions_df.join(clicks_df.groupby('session_id').agg(agg_columns))
+        sessions_df = sessions_df.reset_index()
         
         # Créer des colonnes compatibles avec l'ancien format
         # Si on a déjà les colonnes classiques, les utiliser directement
@@ -256,41 +302,29 @@ def process_data(data):
             sessions_df['longitude'] = sessions_df['gps_longitude']
         
         # Enrichir avec les données session_end si disponibles
-        if 'session_end_mapping' in locals() and session_end_mapping:
-            # Ajouter les colonnes de session_end
-            sessions_df['session_duration_from_end'] = sessions_df['session_id'].map(
-                lambda x: session_end_mapping.get(x, {}).get('session_duration', 0)
-            )
-            sessions_df['click_count_from_end'] = sessions_df['session_id'].map(
-                lambda x: session_end_mapping.get(x, {}).get('click_count', 0)
-            )
-            sessions_df['end_timestamp_from_end'] = sessions_df['session_id'].map(
-                lambda x: session_end_mapping.get(x, {}).get('end_timestamp', '')
-            )
-            sessions_df['client_ip_from_end'] = sessions_df['session_id'].map(
-                lambda x: session_end_mapping.get(x, {}).get('client_ip', '')
-            )
+        if session_end_summary is not None:
+            # Jointure par session_id ; valeur par défaut pour les sessions sans session_end
+            has_end = sessions_df['session_id'].isin(session_end_summary.index)
+            for column, field, default in SESSION_END_COLUMNS:
+                sessions_df[column] = sessions_df['session_id'].map(session_end_summary[field]).where(has_end, default)
             
             # Utiliser les données de session_end pour les sessions qui n'ont pas de clics
-            sessions_created = 0
-            for session_id, end_data in session_end_mapping.items():
-                if session_id not in sessions_df['session_id'].values:
-                    # Créer une nouvelle session basée sur session_end
-                    new_session = {
-                        'session_id': session_id,
-                        'session_start': None,
-                        'session_end': end_data['end_timestamp'],
-                        'client_ip': end_data['client_ip'],
-                        'country': end_data['country'],
-                        'city': end_data['city'],
-                        'latitude': end_data['latitude'],
-                        'longitude': end_data['longitude'],
-                        'session_duration_from_end': end_data['session_duration'],
-                        'click_count_from_end': end_data['click_count'],
-                        'end_timestamp_from_end': end_data['end_timestamp']
-                    }
-                    sessions_df = pd.concat([sessions_df, pd.DataFrame([new_session])], ignore_index=True)
-                    sessions_created += 1
+            orphans = session_end_summary[~session_end_summary.index.isin(sessions_df['session_id'])]
+            if not orphans.empty:
+                new_sessions = pd.DataFrame({
+                    'session_id': orphans.index,
+                    'session_start': None,
+                    'session_end': orphans['end_timestamp'].values,
+                    'client_ip': orphans['client_ip'].values,
+                    'country': orphans['country'].values,
+                    'city': orphans['city'].values,
+                    'latitude': orphans['latitude'].values,
+                    'longitude': orphans['longitude'].values,
+                    'session_duration_from_end': orphans['session_duration'].values,
+                    'click_count_from_end': orphans['click_count'].values,
+                    'end_timestamp_from_end': orphans['end_timestamp'].values
+                })
+                sessions_df = pd.concat([sessions_df, new_sessions], ignore_index=True)
         
         # Calculer la durée de session (en secondes)
         sessions_df['session_start'] = pd.to_datetime(sessions_df['session_start'])
@@ -316,132 +350,341 @@ def process_data(data):
 
 def extract_filename_from_page(page_path):
     """Extrait le nom du fichier depuis le chemin de la page"""
-    if not page_path or page_path == '/':
-        return 'Page principale'
-    
-    # Enlève le '/' du début
-    if page_path.startswith('/'):
-        page_path = page_path[1:]
-    
-    # Extensions de fichiers à détecter (majuscules et minuscules)
-    file_extensions = [
-        '.jpg', '.jpeg', '.png', '.gif', '.pdf', '.doc', '.docx', '.txt', '.html', '.htm',
-        '.JPG', '.JPEG', '.PNG', '.GIF', '.PDF', '.DOC', '.DOCX', '.TXT', '.HTML', '.HTM'
-    ]
-    
-    # Vérifie si c'est un fichier avec extension
-    for ext in file_extensions:
-        if page_path.endswith(ext):
-            # Extrait juste le nom du fichier sans le chemin
-            filename = os.path.basename(page_path)
-            return filename
-    
-    # Si c'est un chemin vers un dossier (comme pdf/thesis.pdf)
-    if '/' in page_path:
-        filename = os.path.basename(page_path)
-        # Vérifie si le nom extrait a une extension
-        for ext in file_extensions:
-            if filename.endswith(ext):
-                return filename
-        return page_path
-    
-    # Si c'est une URL complète, extrait le nom de fichier
-    if page_path.startswith('http'):
-        try:
-            from urllib.parse import urlparse
-            parsed = urlparse(page_path)
-            filename = os.path.basename(parsed.path)
-            if filename:
-                return filename
-        except:
-            pass
-    
-    # Sinon c'est probablement un lien interne
-    return f'Lien: {page_path}'
+    return classify_page(page_path)[0]
+
+# Extensions qui font d'un clic un clic sur fichier (recherche insensible à la casse)
+JOURNEY_FILE_PATTERN = re.compile(r'\.(?:jpg|jpeg|png|gif|pdf|doc|docx|txt)', re.IGNORECASE)
+
+JOURNEY_COLUMNS = ['session_id', 'ville', 'parcours', 'fichiers_cliques', 'nombre_clics', 'duree_estimee']
 
 def analyze_user_journey(clicks_df, sessions_df):
-    """Analyse les parcours utilisateur"""
-    # Groupe par session et crée les parcours
-    journey_data = []
+    """Analyse les parcours utilisateur
+    
+    Un seul tri des clics (session, ordre), puis un groupby : le coût est
+    linéaire en nombre de clics. La ville est jointe par session_id.
+    """
+    journey_parts = []
     common_paths = []
+    sessions_with_clicks = set()
     
-    # Traite d'abord les sessions avec des clics
-    for session_id in clicks_df['session_id'].unique():
-        session_clicks = clicks_df[clicks_df['session_id'] == session_id]
+    if not clicks_df.empty and 'session_id' in clicks_df.columns:
+        clicks = clicks_df
         
-        # Trie par sequence_order si la colonne existe, sinon par timestamp
-        if 'sequence_order' in session_clicks.columns:
-            session_clicks = session_clicks.sort_values('sequence_order')
-        elif 'timestamp' in session_clicks.columns:
-            session_clicks = session_clicks.sort_values('timestamp')
+        # Sessions dans l'ordre de leur premier clic, clics triés par sequence_order (sinon timestamp)
+        session_rank = pd.Series(pd.factorize(clicks['session_id'])[0], index=clicks.index)
+        sort_key = 'sequence_order' if 'sequence_order' in clicks.columns else 'timestamp' if 'timestamp' in clicks.columns else None
+        if sort_key:
+            clicks = clicks.assign(_session_rank=session_rank).sort_values(['_session_rank', sort_key], kind='stable')
+            session_rank = clicks['_session_rank']
+        sessions_with_clicks = set(clicks['session_id'].unique())
         
-        if len(session_clicks) >= 1:  # Inclut les sessions avec 1 seul clic
-            # Crée le chemin du parcours
-            path = []
-            files_clicked = []
-            
-            for _, click in session_clicks.iterrows():
-                if click['page']:
-                    path.append(click['page'])
-                # Vérifie si la colonne file_clicked existe
-                if 'file_clicked' in click and click['file_clicked']:
-                    files_clicked.append(click['file_clicked'])
-                # Sinon, essaie d'extraire le fichier depuis la page
-                elif click['page'] and any(ext in click['page'].lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.pdf', '.doc', '.docx', '.txt']):
-                    filename = extract_filename_from_page(click['page'])
-                    if filename != 'Page principale':
-                        files_clicked.append(filename)
-            
-            if path:
-                journey_str = ' → '.join(path)
-                files_str = ', '.join(files_clicked) if files_clicked else 'Aucun fichier'
-                
-                # Récupère la ville depuis sessions_df
-                city = 'Non spécifié'
-                if not sessions_df.empty and 'session_id' in sessions_df.columns and 'city' in sessions_df.columns:
-                    session_info = sessions_df[sessions_df['session_id'] == session_id]
-                    if not session_info.empty:
-                        city = session_info.iloc[0]['city'] if pd.notna(session_info.iloc[0]['city']) else 'Non spécifié'
-                
-                journey_data.append({
-                    'session_id': session_id,
-                    'ville': city,
-                    'parcours': journey_str,
-                    'fichiers_cliques': files_str,
-                    'nombre_clics': len(session_clicks),
-                    'duree_estimee': f"{len(session_clicks) * 30}s"  # Estimation basique
-                })
-                
-                common_paths.append(journey_str)
+        pages = clicks['page'] if 'page' in clicks.columns else pd.Series('', index=clicks.index)
+        has_page = pages.notna() & (pages.astype(str) != '')
+        
+        # Fichier cliqué : colonne file_clicked si renseignée, sinon déduit de la page
+        if 'file_clicked' in clicks.columns:
+            file_clicked = clicks['file_clicked']
+            has_file_clicked = file_clicked.notna() & (file_clicked.astype(str) != '')
+        else:
+            file_clicked = pd.Series(None, index=clicks.index, dtype=object)
+            has_file_clicked = pd.Series(False, index=clicks.index)
+        
+        page_is_file = has_page & pages.astype(str).str.contains(JOURNEY_FILE_PATTERN)
+        page_files = pages[page_is_file & ~has_file_clicked]
+        derived_files = classify_pages(page_files)['filename'].astype(object)
+        derived_files = derived_files[derived_files != MAIN_PAGE]
+        files = pd.concat([file_clicked[has_file_clicked], derived_files]).reindex(clicks.index).dropna()
+        
+        # Une ligne par session ayant au moins une page
+        grouped = pd.DataFrame({
+            'session_id': clicks['session_id'].groupby(session_rank).first(),
+            'parcours': pages[has_page].astype(str).groupby(session_rank[has_page]).agg(' → '.join),
+            'fichiers_cliques': files.astype(str).groupby(session_rank[files.index]).agg(', '.join),
+            'nombre_clics': session_rank.groupby(session_rank).size(),
+        })
+        grouped = grouped[grouped['parcours'].notna()]
+        grouped['fichiers_cliques'] = grouped['fichiers_cliques'].fillna('Aucun fichier')
+        grouped['duree_estimee'] = (grouped['nombre_clics'] * 30).astype(str) + 's'  # Estimation basique
+        
+        # Récupère la ville depuis sessions_df (jointure par hachage)
+        if not sessions_df.empty and 'session_id' in sessions_df.columns and 'city' in sessions_df.columns:
+            cities = sessions_df.drop_duplicates('session_id').set_index('session_id')['city']
+            grouped['ville'] = grouped['session_id'].map(cities).fillna('Non spécifié')
+        else:
+            grouped['ville'] = 'Non spécifié'
+        
+        journey_parts.append(grouped[JOURNEY_COLUMNS])
+        common_paths = grouped['parcours'].tolist()
     
     # Ajoute les sessions sans clics
     if not sessions_df.empty:
-        sessions_with_clicks = set(clicks_df['session_id'].unique())
         sessions_without_clicks = sessions_df[~sessions_df['session_id'].isin(sessions_with_clicks)]
         
-        for _, session in sessions_without_clicks.iterrows():
-            city = session.get('city', 'Non spécifié') if pd.notna(session.get('city')) else 'Non spécifié'
-            
-            journey_data.append({
-                'session_id': session['session_id'],
-                'ville': city,
+        if not sessions_without_clicks.empty:
+            if 'city' in sessions_without_clicks.columns:
+                cities = sessions_without_clicks['city'].fillna('Non spécifié')
+            else:
+                cities = 'Non spécifié'
+            journey_parts.append(pd.DataFrame({
+                'session_id': sessions_without_clicks['session_id'],
+                'ville': cities,
                 'parcours': 'Aucun parcours (session sans clics)',
                 'fichiers_cliques': 'Aucun fichier',
                 'nombre_clics': 0,
                 'duree_estimee': '0s'
-            })
+            }))
     
-    journey_df = pd.DataFrame(journey_data)
+    journey_df = pd.concat(journey_parts, ignore_index=True) if journey_parts else pd.DataFrame()
     
     # Trouve les parcours les plus communs
-    if common_paths:
-        path_counts = Counter(common_paths)
-        top_paths = path_counts.most_common(10)
-    else:
-        top_paths = []
+    top_paths = Counter(common_paths).most_common(10)
     
     return journey_df, top_paths
 
+def data_version(data, *extra):
+    """Empreinte des événements chargés (liste ou DataFrame) : nombre et dernier événement
+    (le fichier et le magasin Parquet ne sont qu'allongés)"""
+    if not len(data):
+        last = None
+    elif isinstance(data, pd.DataFrame):
+        last = data.iloc[-1].to_dict()
+    else:
+        last = data[-1]
+    payload = json.dumps([len(data), last, *extra], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def memoized(name, version, compute):
+    """Résultat de compute() conservé dans la session tant que la version des données ne change pas"""
+    memo = st.session_state.setdefault('_tab_memo', {})
+    entry = memo.get(name)
+    if entry is None or entry[0] != version:
+        entry = memo[name] = (version, compute())
+    return entry[1]
+
+def lazy_tabs(labels, key):
+    """Onglets et, pour chacun, s'il faut le calculer
+
+    Avec le suivi de l'onglet ouvert de st.tabs (key, on_change="rerun", tab.open),
+    seul l'onglet affiché est calculé. Sur un Streamlit qui ne le propose pas,
+    retombe sur des onglets simples, tous calculés comme avant.
+    """
+    try:
+        tabs = st.tabs(labels, key=key, on_change="rerun")
+    except TypeError:
+        tabs = st.tabs(labels)
+        return tabs, [True] * len(tabs)
+    return tabs, [tab.open for tab in tabs]
+
+def tab_refresh_button(name):
+    """Bouton qui recalcule un onglet : seul son fragment est relancé"""
+    if st.button("🔄 Recalculer cet onglet", key=f"refresh_{name}"):
+        st.session_state.get('_tab_memo', {}).pop(name, None)
+
+def unique_values(location_data, column):
+    """Valeurs distinctes renseignées d'une colonne, triées ; None si la colonne manque"""
+    if column not in location_data.columns:
+        return None
+    values = location_data[column].dropna().unique()
+    return sorted(v for v in values if v != 'Non spécifié' and v is not None)
+
+def geolocation_tables(sessions_df, timer):
+    """Données de l'onglet Géolocalisation
+
+    Retourne (sessions avec date et heure de Paris, pays, villes, avertissements).
+    """
+    warnings = []
+    
+    # Prépare les données pour l'affichage
+    location_data = sessions_df.copy()
+    
+    # Ajoute des colonnes manquantes si nécessaire
+    if 'country' not in location_data.columns:
+        location_data['country'] = 'Non spécifié'
+    if 'city' not in location_data.columns:
+        location_data['city'] = 'Non spécifié'
+    if 'latitude' not in location_data.columns:
+        location_data['latitude'] = 0
+    if 'longitude' not in location_data.columns:
+        location_data['longitude'] = 0
+    
+    # Créer des colonnes Date et Heure en UTC+2 (Paris)
+    with timer.stage("conversions de fuseau horaire"):
+        # Essayer session_start d'abord pour les sessions qui ont un session_start
+        if 'session_start' in location_data.columns:
+            try:
+                # Filtrer les sessions qui ont un session_start valide
+                mask = location_data['session_start'].notna()
+                if mask.any():
+                    location_data.loc[mask, 'date'] = pd.to_datetime(location_data.loc[mask, 'session_start'], utc=True).dt.tz_convert('Europe/Paris').dt.date
+                    location_data.loc[mask, 'time'] = pd.to_datetime(location_data.loc[mask, 'session_start'], utc=True).dt.tz_convert('Europe/Paris').dt.time
+            except Exception as e:
+                warnings.append(f"❌ Erreur avec session_start: {e}")
+    
+        # Essayer end_timestamp_from_end pour les sessions qui n'ont pas encore de date/heure
+        if 'end_timestamp_from_end' in location_data.columns:
+            try:
+                # Filtrer les sessions qui n'ont pas encore de date/heure et qui ont un end_timestamp_from_end
+                mask = (location_data['date'].isna() | (location_data['date'] == 'Non spécifié')) & location_data['end_timestamp_from_end'].notna()
+                if mask.any():
+                    location_data.loc[mask, 'date'] = pd.to_datetime(location_data.loc[mask, 'end_timestamp_from_end'], utc=True).dt.tz_convert('Europe/Paris').dt.date
+                    location_data.loc[mask, 'time'] = pd.to_datetime(location_data.loc[mask, 'end_timestamp_from_end'], utc=True).dt.tz_convert('Europe/Paris').dt.time
+            except Exception as e:
+                warnings.append(f"❌ Erreur avec end_timestamp_from_end: {e}")
+    
+        # Essayer timestamp pour les sessions qui n'ont pas encore de date/heure
+        if 'timestamp' in location_data.columns:
+            try:
+                # Filtrer les sessions qui n'ont pas encore de date/heure et qui ont un timestamp
+                mask = (location_data['date'].isna() | (location_data['date'] == 'Non spécifié')) & location_data['timestamp'].notna()
+                if mask.any():
+                    location_data.loc[mask, 'date'] = pd.to_datetime(location_data.loc[mask, 'timestamp'], utc=True).dt.tz_convert('Europe/Paris').dt.date
+                    location_data.loc[mask, 'time'] = pd.to_datetime(location_data.loc[mask, 'timestamp'], utc=True).dt.tz_convert('Europe/Paris').dt.time
+            except Exception as e:
+                warnings.append(f"❌ Erreur avec timestamp: {e}")
+    
+    # Remplir les valeurs manquantes par défaut
+    if 'date' not in location_data.columns:
+        location_data['date'] = 'Non spécifié'
+    else:
+        location_data['date'] = location_data['date'].fillna('Non spécifié')
+    
+    if 'time' not in location_data.columns:
+        location_data['time'] = 'Non spécifié'
+    else:
+        location_data['time'] = location_data['time'].fillna('Non spécifié')
+    
+    # Affiche les sessions avec géolocalisation, Date et Heure
+    display_columns = ['date', 'time', 'session_id', 'country', 'city', 'client_ip']
+    available_columns = [col for col in display_columns if col in location_data.columns]
+    location_display = location_data[available_columns].copy()
+    
+    # Renomme les colonnes pour l'affichage
+    column_mapping = {
+        'date': 'Date',
+        'time': 'Heure',
+        'session_id': 'Session ID',
+        'country': 'Pays',
+        'city': 'Ville',
+        'client_ip': 'IP Utilisateur'
+    }
+    location_display.columns = [column_mapping.get(col, col) for col in location_display.columns]
+    
+    # Trier par ordre chronologique (plus récent en premier)
+    try:
+        # Créer une colonne datetime pour le tri
+        location_display['datetime_sort'] = pd.to_datetime(location_display['Date'].astype(str) + ' ' + location_display['Heure'].astype(str), errors='coerce')
+        # Trier par datetime décroissant (plus récent en premier)
+        location_display = location_display.sort_values('datetime_sort', ascending=False)
+        # Supprimer la colonne de tri temporaire
+        location_display = location_display.drop('datetime_sort', axis=1)
+    except Exception as e:
+        warnings.append(f"⚠️ Impossible de trier chronologiquement: {e}")
+    
+    return location_display, unique_values(location_data, 'country'), unique_values(location_data, 'city'), warnings
+
+def file_tracking_tables(clicks_df, timer):
+    """Tableaux (images, PDFs) du catalogue avec leur nombre de clics"""
+    # Catalogue des fichiers du site
+    with timer.stage("get_file_catalog"):
+        catalog = get_file_catalog()
+    
+    if not clicks_df.empty:
+        # Extrait les noms de fichiers depuis les pages cliquées (une fois par page distincte)
+        click_counts = classify_pages(clicks_df['page'])['filename'].astype(object).value_counts()
+    else:
+        click_counts = pd.Series(dtype=int)
+    
+    return file_clicks_table(catalog, 'Image', click_counts), file_clicks_table(catalog, 'PDF', click_counts)
+
+def show_unique_values(title, values, empty_message):
+    st.subheader(title)
+    if values is None:
+        st.write("Données non disponibles")
+    elif values:
+        for value in values:
+            st.write(f"• {value}")
+    else:
+        st.write(empty_message)
+
+@st.fragment
+def geolocation_tab(sessions_df, version, timer):
+    st.subheader("🌍 Géolocalisation des Sessions")
+    
+    if sessions_df.empty:
+        st.info("Aucune donnée de session disponible")
+        return
+    
+    tab_refresh_button('geolocation')
+    
+    def compute():
+        location_display, countries, cities, warnings = geolocation_tables(sessions_df, timer)
+        return PagedFrame(location_display), countries, cities, warnings
+    
+    location_table, countries, cities, warnings = memoized('geolocation', version, compute)
+    for warning in warnings:
+        st.write(warning)
+    
+    # Seule la page visible est envoyée au navigateur
+    paged_table(location_table, key="sessions")
+    
+    # Liste des pays et villes uniques
+    col1, col2 = st.columns(2)
+    with col1:
+        show_unique_values("🌍 Pays Uniques", countries, "Aucun pays spécifié")
+    with col2:
+        show_unique_values("🏙️ Villes Uniques", cities, "Aucune ville spécifiée")
+
+@st.fragment
+def file_tracking_tab(clicks_df, version, timer):
+    st.subheader("📊 Tracking par fichier")
+    tab_refresh_button('files')
+    images_df, pdfs_df = memoized('files', version, lambda: file_tracking_tables(clicks_df, timer))
+    
+    # Affiche les tableaux séparés
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("🖼️ Images")
+        if not images_df.empty:
+            st.dataframe(images_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("Aucune image trouvée")
+    
+    with col2:
+        st.subheader("📄 PDFs")
+        if not pdfs_df.empty:
+            st.dataframe(pdfs_df, use_container_width=True, hide_index=True)
+        else:
+            st.info("Aucun PDF trouvé")
+    
+    if clicks_df.empty:
+        st.info("Aucun clic enregistré pour le moment")
+
+@st.fragment
+def journey_tab(clicks_df, sessions_df, version, timer):
+    st.subheader("🛤️ Analyse des Parcours Utilisateurs")
+    tab_refresh_button('journeys')
+    
+    def compute():
+        with timer.stage("analyze_user_journey"):
+            return analyze_user_journey(clicks_df, sessions_df)
+    journey_df, top_paths = memoized('journeys', version, compute)
+    
+    if not journey_df.empty:
+        # Parcours les plus communs
+        st.subheader("🏆 Parcours les Plus Fréquents")
+        if top_paths:
+            paths_data = pd.DataFrame(top_paths, columns=['Parcours', 'Fréquence'])
+            fig = px.bar(paths_data.head(5), x='Fréquence', y='Parcours', 
+                        orientation='h', title="Top 5 des Parcours")
+            st.plotly_chart(fig, use_container_width=True)
+        
+        # Détails des parcours
+        st.subheader("📋 Détails des Parcours")
+        st.dataframe(journey_df, use_container_width=True)
+    else:
+        st.info("Aucune session disponible")
+
 def main():
     st.set_page_config(
         page_title="Tracking nexgate Christelle",
@@ -452,12 +695,27 @@ def main():
     st.title("📊 Tracking nexgate Christelle")
     st.markdown("---")
     
-    # Récupération des données
-    data, status = get_analytics_data()
+    # Temps de rendu par étape (DASHBOARD_TIMING=1 ou ?timing=1)
+    timer = RenderTimer()
+    
+    # Récupération des données (rechargées seulement si la source a changé)
+    signature = source_signature()
+    if os.path.isdir(PARQUET_PATH):
+        start, end = period_bounds(st.sidebar.selectbox("📅 Période", list(PERIOD_OPTIONS)))
+        with timer.stage("get_parquet_data"):
+            data, status = get_parquet_data(start, end, signature)
+        served = signature
+        version = data_version(data, start, end)
+    else:
+        with timer.stage("get_analytics_data"):
+            data, status, served = get_analytics_data(signature)
+        version = data_version(data)
     st.info(status)
     
-    # Traitement des données
-    sessions_df, clicks_df = process_data(data)
+    # Traitement des données (types compacts : catégories, float32, int16), refait
+    # seulement quand les données changent
+    with timer.stage("process_data"):
+        sessions_df, clicks_df = memoized('frames', version, lambda: compact_frames(*process_data(data)))
     
     # Métriques principales
     col1, col2 = st.columns(2)
@@ -470,252 +728,35 @@ def main():
         total_sessions = len(sessions_df) if not sessions_df.empty else 0
         st.metric("Sessions Totales", total_sessions)
     
-    # Onglets
-    tab1, tab2, tab3 = st.tabs(["🌍 Géolocalisation", "📊 Tracking par fichier", "🛤️ Parcours Utilisateurs"])
+    # Onglets : seul l'onglet ouvert est calculé (changement d'onglet = rerun), chacun
+    # dans un fragment relançable seul ; ses calculs sont mémorisés par version des données
+    (tab1, tab2, tab3), (open1, open2, open3) = lazy_tabs(
+        ["🌍 Géolocalisation", "📊 Tracking par fichier", "🛤️ Parcours Utilisateurs"], key="onglet")
     
-    with tab1:
-        st.subheader("🌍 Géolocalisation des Sessions")
-        
-        if not sessions_df.empty:
-            # Prépare les données pour l'affichage
-            location_data = sessions_df.copy()
-            
-            # Ajoute des colonnes manquantes si nécessaire
-            if 'country' not in location_data.columns:
-                location_data['country'] = 'Non spécifié'
-            if 'city' not in location_data.columns:
-                location_data['city'] = 'Non spécifié'
-            if 'latitude' not in location_data.columns:
-                location_data['latitude'] = 0
-            if 'longitude' not in location_data.columns:
-                location_data['longitude'] = 0
-            
-            # Créer des colonnes Date et Heure en UTC+2 (Paris)
-            
-            # Essayer session_start d'abord pour les sessions qui ont un session_start
-            if 'session_start' in location_data.columns:
-                try:
-                    # Filtrer les sessions qui ont un session_start valide
-                    mask = location_data['session_start'].notna()
-                    if mask.any():
-                        location_data.loc[mask, 'date'] = pd.to_datetime(location_data.loc[mask, 'session_start'], utc=True).dt.tz_convert('Europe/Paris').dt.date
-                        location_data.loc[mask, 'time'] = pd.to_datetime(location_data.loc[mask, 'session_start'], utc=True).dt.tz_convert('Europe/Paris').dt.time
-                except Exception as e:
-                    st.write(f"❌ Erreur avec session_start: {e}")
-            
-            # Essayer end_timestamp_from_end pour les sessions qui n'ont pas encore de date/heure
-            if 'end_timestamp_from_end' in location_data.columns:
-                try:
-                    # Filtrer les sessions qui n'ont pas encore de date/heure et qui ont un end_timestamp_from_end
-                    mask = (location_data['date'].isna() | (location_data['date'] == 'Non spécifié')) & location_data['end_timestamp_from_end'].notna()
-                    if mask.any():
-                        location_data.loc[mask, 'date'] = pd.to_datetime(location_data.loc[mask, 'end_timestamp_from_end'], utc=True).dt.tz_convert('Europe/Paris').dt.date
-                        location_data.loc[mask, 'time'] = pd.to_datetime(location_data.loc[mask, 'end_timestamp_from_end'], utc=True).dt.tz_convert('Europe/Paris').dt.time
-                except Exception as e:
-                    st.write(f"❌ Erreur avec end_timestamp_from_end: {e}")
-            
-            # Essayer timestamp pour les sessions qui n'ont pas encore de date/heure
-            if 'timestamp' in location_data.columns:
-                try:
-                    # Filtrer les sessions qui n'ont pas encore de date/heure et qui ont un timestamp
-                    mask = (location_data['date'].isna() | (location_data['date'] == 'Non spécifié')) & location_data['timestamp'].notna()
-                    if mask.any():
-                        location_data.loc[mask, 'date'] = pd.to_datetime(location_data.loc[mask, 'timestamp'], utc=True).dt.tz_convert('Europe/Paris').dt.date
-                        location_data.loc[mask, 'time'] = pd.to_datetime(location_data.loc[mask, 'timestamp'], utc=True).dt.tz_convert('Europe/Paris').dt.time
-                except Exception as e:
-                    st.write(f"❌ Erreur avec timestamp: {e}")
-            
-            # Remplir les valeurs manquantes par défaut
-            if 'date' not in location_data.columns:
-                location_data['date'] = 'Non spécifié'
-            else:
-                location_data['date'] = location_data['date'].fillna('Non spécifié')
-            
-            if 'time' not in location_data.columns:
-                location_data['time'] = 'Non spécifié'
-            else:
-                location_data['time'] = location_data['time'].fillna('Non spécifié')
-            
-            # Affiche les sessions avec géolocalisation, Date et Heure
-            display_columns = ['date', 'time', 'session_id', 'country', 'city', 'client_ip']
-            available_columns = [col for col in display_columns if col in location_data.columns]
-            location_display = location_data[available_columns].copy()
-            
-            # Renomme les colonnes pour l'affichage
-            column_mapping = {
-                'date': 'Date',
-                'time': 'Heure',
-                'session_id': 'Session ID',
-                'country': 'Pays',
-                'city': 'Ville',
-                'client_ip': 'IP Utilisateur'
-            }
-            location_display.columns = [column_mapping.get(col, col) for col in location_display.columns]
-            
-            # Trier par ordre chronologique (plus récent en premier)
-            try:
-                # Créer une colonne datetime pour le tri
-                location_display['datetime_sort'] = pd.to_datetime(location_display['Date'].astype(str) + ' ' + location_display['Heure'].astype(str), errors='coerce')
-                # Trier par datetime décroissant (plus récent en premier)
-                location_display = location_display.sort_values('datetime_sort', ascending=False)
-                # Supprimer la colonne de tri temporaire
-                location_display = location_display.drop('datetime_sort', axis=1)
-            except Exception as e:
-                st.write(f"⚠️ Impossible de trier chronologiquement: {e}")
-            
-            st.dataframe(location_display, use_container_width=True)
-            
-            # Liste des pays et villes uniques
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                if 'country' in location_data.columns:
-                    unique_countries = location_data['country'].dropna().unique()
-                    unique_countries = [c for c in unique_countries if c != 'Non spécifié' and c is not None]
-                    if unique_countries:
-                        st.subheader("🌍 Pays Uniques")
-                        for country in sorted(unique_countries):
-                            st.write(f"• {country}")
-                    else:
-                        st.subheader("🌍 Pays Uniques")
-                        st.write("Aucun pays spécifié")
-                else:
-                    st.subheader("🌍 Pays Uniques")
-                    st.write("Données non disponibles")
-            
-            with col2:
-                if 'city' in location_data.columns:
-                    unique_cities = location_data['city'].dropna().unique()
-                    unique_cities = [c for c in unique_cities if c != 'Non spécifié' and c is not None]
-                    if unique_cities:
-                        st.subheader("🏙️ Villes Uniques")
-                        for city in sorted(unique_cities):
-                            st.write(f"• {city}")
-                    else:
-                        st.subheader("🏙️ Villes Uniques")
-                        st.write("Aucune ville spécifiée")
-                else:
-                    st.subheader("🏙️ Villes Uniques")
-                    st.write("Données non disponibles")
-        else:
-            st.info("Aucune donnée de session disponible")
+    if open1:
+        with tab1, timer.stage("onglet Géolocalisation"):
+            geolocation_tab(sessions_df, version, timer)
     
-    with tab2:
-        st.subheader("📊 Tracking par fichier")
-        
-        # Récupère la liste dynamique des fichiers
-        all_files = get_available_files()
-        
-        # Sépare les fichiers par type
-        image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.JPG', '.JPEG', '.PNG', '.GIF']
-        pdf_extensions = ['.pdf', '.PDF']
-        
-        image_files = []
-        pdf_files = []
-        
-        for file in all_files:
-            if any(file.endswith(ext) for ext in image_extensions):
-                image_files.append(file)
-            elif any(file.endswith(ext) for ext in pdf_extensions):
-                pdf_files.append(file)
-        
-        if not clicks_df.empty:
-            # Extrait les noms de fichiers depuis les pages cliquées
-            clicks_df['filename'] = clicks_df['page'].apply(extract_filename_from_page)
-            
-            # Compte les clics par fichier
-            file_clicks = clicks_df['filename'].value_counts().reset_index()
-            file_clicks.columns = ['Fichier', 'Nombre de Clics']
-            
-            # Crée les DataFrames pour images et PDFs
-            images_df = pd.DataFrame({'Fichier': image_files})
-            pdfs_df = pd.DataFrame({'Fichier': pdf_files})
-            
-            # Fusionne avec les clics existants pour les images
-            if not images_df.empty:
-                final_images_df = images_df.merge(file_clicks, on='Fichier', how='left')
-                final_images_df['Nombre de Clics'] = final_images_df['Nombre de Clics'].fillna(0).astype(int)
-                final_images_df = final_images_df.sort_values(['Nombre de Clics', 'Fichier'], ascending=[False, True])
-            else:
-                final_images_df = pd.DataFrame()
-            
-            # Fusionne avec les clics existants pour les PDFs
-            if not pdfs_df.empty:
-                final_pdfs_df = pdfs_df.merge(file_clicks, on='Fichier', how='left')
-                final_pdfs_df['Nombre de Clics'] = final_pdfs_df['Nombre de Clics'].fillna(0).astype(int)
-                final_pdfs_df = final_pdfs_df.sort_values(['Nombre de Clics', 'Fichier'], ascending=[False, True])
-            else:
-                final_pdfs_df = pd.DataFrame()
-            
-            # Affiche les tableaux séparés
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("🖼️ Images")
-                if not final_images_df.empty:
-                    st.dataframe(final_images_df, use_container_width=True)
-                else:
-                    st.info("Aucune image trouvée")
-            
-            with col2:
-                st.subheader("📄 PDFs")
-                if not final_pdfs_df.empty:
-                    st.dataframe(final_pdfs_df, use_container_width=True)
-                else:
-                    st.info("Aucun PDF trouvé")
-            
-        else:
-            # Si pas de clics, affiche juste les listes avec 0 clic
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("🖼️ Images")
-                if image_files:
-                    images_df = pd.DataFrame({
-                        'Fichier': image_files,
-                        'Nombre de Clics': [0] * len(image_files)
-                    })
-                    images_df = images_df.sort_values('Fichier')
-                    st.dataframe(images_df, use_container_width=True)
-                else:
-                    st.info("Aucune image trouvée")
-            
-            with col2:
-                st.subheader("📄 PDFs")
-                if pdf_files:
-                    pdfs_df = pd.DataFrame({
-                        'Fichier': pdf_files,
-                        'Nombre de Clics': [0] * len(pdf_files)
-                    })
-                    pdfs_df = pdfs_df.sort_values('Fichier')
-                    st.dataframe(pdfs_df, use_container_width=True)
-                else:
-                    st.info("Aucun PDF trouvé")
-            
-            st.info("Aucun clic enregistré pour le moment")
+    if open2:
+        with tab2, timer.stage("onglet Tracking par fichier"):
+            file_tracking_tab(clicks_df, version, timer)
     
-    with tab3:
-        st.subheader("🛤️ Analyse des Parcours Utilisateurs")
-        
-        journey_df, top_paths = analyze_user_journey(clicks_df, sessions_df)
-        
-        if not journey_df.empty:
-            # Parcours les plus communs
-            st.subheader("🏆 Parcours les Plus Fréquents")
-            if top_paths:
-                paths_data = pd.DataFrame(top_paths, columns=['Parcours', 'Fréquence'])
-                fig = px.bar(paths_data.head(5), x='Fréquence', y='Parcours', 
-                            orientation='h', title="Top 5 des Parcours")
-                st.plotly_chart(fig, use_container_width=True)
-            
-            # Détails des parcours
-            st.subheader("📋 Détails des Parcours")
-            st.dataframe(journey_df, use_container_width=True)
-        else:
-            st.info("Aucune session disponible")
+    if open3:
+        with tab3, timer.stage("onglet Parcours Utilisateurs"):
+            journey_tab(clicks_df, sessions_df, version, timer)
+    
+    refresh_watcher(served)
+    timer.finish()
+    
+    with st.sidebar.expander("🗄️ Cache des données"):
+        for line in DATA_CACHE.describe():
+            st.caption(line)
     
-    # Bouton de rafraîchissement
+    # Bouton de rafraîchissement : vérifie la source tout de suite
     if st.sidebar.button("🔄 Rafraîchir les données"):
+        web_signature.clear()
+        parquet_signature.clear()
+        DATA_CACHE.invalidate('analytics_data')
         st.rerun()
 
 if __name__ == "__main__":
@@ -1,12 +1,18 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import numpy as np
 import plotly.graph_objects as go
 from datetime import datetime
 import json
+import os
 import requests
 import time
 
+from event_frames import compact_frames
+from gps_grid import MAX_RAW_POINTS, ZOOM_PRESETS, bin_points, marker_sizes, use_grid, visible
+from parquet_store import PERIOD_OPTIONS, period_bounds, read_event_records
+
 st.set_page_config(
     page_title="Dashboard Analytics V6 - Version Simplifiée",
     page_icon="📍",
@@ -25,6 +31,21 @@ def get_analytics_data_v6():
     except Exception as e:
         return [], f"❌ Serveur web indisponible ({e})"
 
+# Magasin Parquet alimenté par api_backend.py (utilisé s'il existe)
+PARQUET_PATH = os.getenv('ANALYTICS_PARQUET_PATH', 'analytics_parquet')
+
+# Colonnes lues dans le magasin Parquet (projection) : celles utilisées par process_data_v6_simple
+PARQUET_COLUMNS = [
+    'session_id', 'timestamp', 'page', 'client_ip', 'ip_source', 'duration_seconds', 'click_count',
+    'gps_latitude', 'gps_longitude', 'gps_accuracy', 'gps_source',
+    'geo_country', 'geo_city', 'geo_source',
+]
+
+def get_parquet_data_v6(start, end):
+    """Récupère les événements V6 de la période depuis le magasin Parquet local"""
+    data = read_event_records(PARQUET_PATH, start, end, columns=PARQUET_COLUMNS)
+    return data, f"✅ {len(data)} événements V6 lus depuis le magasin Parquet"
+
 def get_test_data_v6():
     """Retourne des données de test V6 simplifiées"""
     return [
@@ -75,9 +96,29 @@ def get_test_data_v6():
         }
     ]
 
+# Colonnes reprises du premier clic de chaque session, avec leur valeur par défaut
+SESSION_FIRST_CLICK_COLUMNS = {
+    'client_ip': 'Non spécifié',
+    'ip_source': 'Non spécifié',
+    'gps_latitude': 0,
+    'gps_longitude': 0,
+    'gps_accuracy': 0,
+    'gps_source': 'none',
+    'geo_country': 'Non spécifié',
+    'geo_city': 'Non spécifié',
+    'geo_source': 'Non spécifié'
+}
+
+def parse_timestamps(timestamps):
+    """Convertit la colonne timestamp en une fois (UTC si les fuseaux sont mélangés)"""
+    try:
+        return pd.to_datetime(timestamps)
+    except (ValueError, TypeError):
+        return pd.to_datetime(timestamps, utc=True)
+
 def process_data_v6_simple(data):
     """Traite les données JSON V6 de manière simplifiée"""
-    if not data:
+    if data is None or len(data) == 0:
         return pd.DataFrame(), pd.DataFrame()
     
     # Convertit en DataFrame
@@ -87,86 +128,104 @@ def process_data_v6_simple(data):
     clicks_df = df[df['type'] == 'click'].copy() if 'click' in df['type'].values else pd.DataFrame()
     
     if not clicks_df.empty:
-        # Créer un DataFrame de sessions simplifié
-        sessions_data = []
+        # Timestamps convertis une seule fois, puis une seule agrégation par session
+        timestamps = parse_timestamps(clicks_df['timestamp'])
+        bounds = timestamps.groupby(clicks_df['session_id'], sort=False).agg(['min', 'max', 'size'])
         
-        for session_id in clicks_df['session_id'].unique():
-            session_clicks = clicks_df[clicks_df['session_id'] == session_id]
-            
-            # Première et dernière activité
-            timestamps = pd.to_datetime(session_clicks['timestamp'])
-            session_start = timestamps.min()
-            session_end = timestamps.max()
-            
-            # Données de la session
-            first_click = session_clicks.iloc[0]
-            
-            session_data = {
-                'session_id': session_id,
-                'session_start': session_start,
-                'session_end': session_end,
-                'duration_seconds': (session_end - session_start).total_seconds(),
-                'click_count': len(session_clicks),
-                'client_ip': first_click.get('client_ip', 'Non spécifié'),
-                'ip_source': first_click.get('ip_source', 'Non spécifié'),
-                'gps_latitude': first_click.get('gps_latitude', 0),
-                'gps_longitude': first_click.get('gps_longitude', 0),
-                'gps_accuracy': first_click.get('gps_accuracy', 0),
-                'gps_source': first_click.get('gps_source', 'none'),
-                'geo_country': first_click.get('geo_country', 'Non spécifié'),
-                'geo_city': first_click.get('geo_city', 'Non spécifié'),
-                'geo_source': first_click.get('geo_source', 'Non spécifié')
-            }
-            
-            sessions_data.append(session_data)
+        # Données de la session : premier clic (ordre d'arrivée) de chaque session
+        first_clicks = clicks_df.drop_duplicates('session_id', keep='first').set_index('session_id')
+        first_clicks = first_clicks.reindex(bounds.index)
         
-        sessions_df = pd.DataFrame(sessions_data)
+        sessions_df = pd.DataFrame({
+            'session_id': bounds.index,
+            'session_start': bounds['min'].array,
+            'session_end': bounds['max'].array,
+            'duration_seconds': (bounds['max'] - bounds['min']).dt.total_seconds().values,
+            'click_count': bounds['size'].values
+        })
+        for column, default in SESSION_FIRST_CLICK_COLUMNS.items():
+            sessions_df[column] = first_clicks[column].values if column in first_clicks.columns else default
     else:
         sessions_df = pd.DataFrame()
     
     return sessions_df, clicks_df
 
-def create_simple_gps_chart(sessions_df):
-    """Crée un graphique GPS simple"""
+def create_simple_gps_chart(sessions_df, zoom='Monde', max_points=MAX_RAW_POINTS):
+    """Crée la carte des positions GPS pour le préréglage de zoom `zoom`
+
+    Un marqueur par session jusqu'à `max_points` points visibles, au-delà un
+    marqueur par case de la grille du préréglage (gps_grid).
+    """
     if sessions_df.empty:
         return None
     
-    # Filtrer les sessions avec GPS
-    gps_sessions = sessions_df[
-        (sessions_df['gps_source'] != 'none') & 
-        (sessions_df['gps_latitude'] != 0) & 
-        (sessions_df['gps_longitude'] != 0)
-    ].copy()
-    
-    if gps_sessions.empty:
+    # Filtrer les sessions avec GPS visibles dans l'emprise du préréglage
+    preset = ZOOM_PRESETS[zoom]
+    lat = pd.to_numeric(sessions_df['gps_latitude'], errors='coerce').to_numpy(dtype=float)
+    lon = pd.to_numeric(sessions_df['gps_longitude'], errors='coerce').to_numpy(dtype=float)
+    mask = ((sessions_df['gps_source'] != 'none').to_numpy() & (lat != 0) & (lon != 0)
+            & visible(lat, lon, preset['bounds']))
+    if not mask.any():
         return None
     
+    lat, lon = lat[mask], lon[mask]
+    accuracy = (pd.to_numeric(sessions_df['gps_accuracy'], errors='coerce').to_numpy(dtype=float)[mask]
+                if 'gps_accuracy' in sessions_df.columns else np.full(len(lat), np.nan))
+    
     # Créer le graphique
     fig = go.Figure()
     
-    fig.add_trace(go.Scattergeo(
-        lon=gps_sessions['gps_longitude'],
-        lat=gps_sessions['gps_latitude'],
-        mode='markers',
-        name='Positions GPS',
-        marker=dict(
-            size=10,
-            color='red',
-            symbol='circle'
-        ),
-        text=gps_sessions['session_id'],
-        hovertemplate='<b>Session: %{text}</b><br>' +
-                     'Lat: %{lat:.4f}<br>' +
-                     'Lon: %{lon:.4f}<br>' +
-                     'Précision: ' + gps_sessions['gps_accuracy'].astype(str) + 'm<br>' +
-                     '<extra></extra>'
-    ))
+    if use_grid(len(lat), max_points):
+        binned = bin_points(lat, lon, preset['cell'], accuracy)
+        fig.add_trace(go.Scattergeo(
+            lon=binned['longitude'],
+            lat=binned['latitude'],
+            mode='markers',
+            name='Positions GPS (regroupées)',
+            marker=dict(
+                size=marker_sizes(binned['count']),
+                color='red',
+                opacity=0.7,
+                symbol='circle'
+            ),
+            customdata=np.column_stack([binned['count'], binned['mean']]),
+            hovertemplate='<b>%{customdata[0]} sessions</b><br>' +
+                         'Lat: %{lat:.4f}<br>' +
+                         'Lon: %{lon:.4f}<br>' +
+                         'Précision moyenne: %{customdata[1]:.0f}m<br>' +
+                         '<extra></extra>'
+        ))
+        title = f"Positions GPS des Sessions ({len(lat)} positions en {len(binned)} cases de {preset['cell']:g}°)"
+    else:
+        session_ids = sessions_df['session_id'].to_numpy()[mask] if 'session_id' in sessions_df.columns else None
+        fig.add_trace(go.Scattergeo(
+            lon=lon,
+            lat=lat,
+            mode='markers',
+            name='Positions GPS',
+            marker=dict(
+                size=10,
+                color='red',
+                symbol='circle'
+            ),
+            text=session_ids,
+            customdata=accuracy,
+            hovertemplate='<b>Session: %{text}</b><br>' +
+                         'Lat: %{lat:.4f}<br>' +
+                         'Lon: %{lon:.4f}<br>' +
+                         'Précision: %{customdata}m<br>' +
+                         '<extra></extra>'
+        ))
+        title = 'Positions GPS des Sessions'
     
+    lon_min, lon_max, lat_min, lat_max = preset['bounds']
     fig.update_layout(
-        title='Positions GPS des Sessions',
+        title=title,
         geo=dict(
             scope='world',
             projection_type='equirectangular',
+            lonaxis_range=[lon_min, lon_max],
+            lataxis_range=[lat_min, lat_max],
             showland=True,
             landcolor='rgb(243, 243, 243)',
             coastlinecolor='rgb(204, 204, 204)',
@@ -181,17 +240,21 @@ def main():
     st.markdown("**Version avec séparation IP et GPS - Gestion robuste des données**")
     
     # Récupération des données
-    data, status = get_analytics_data_v6()
+    if os.path.isdir(PARQUET_PATH):
+        start, end = period_bounds(st.sidebar.selectbox("📅 Période", list(PERIOD_OPTIONS)))
+        data, status = get_parquet_data_v6(start, end)
+    else:
+        data, status = get_analytics_data_v6()
     
-    if not data:
+    if len(data) == 0:
         st.warning("⚠️ Aucune donnée V6 disponible. Utilisation des données de test.")
         data = get_test_data_v6()
         status = "🧪 Données de test utilisées"
     
     st.info(status)
     
-    # Traitement des données
-    sessions_df, clicks_df = process_data_v6_simple(data)
+    # Traitement des données (types compacts : catégories, float32)
+    sessions_df, clicks_df = compact_frames(*process_data_v6_simple(data))
     
     if sessions_df.empty:
         st.warning("Aucune session trouvée dans les données.")
@@ -296,8 +359,9 @@ def main():
                                           nbins=10)
                 st.plotly_chart(fig_accuracy, use_container_width=True)
         
-        # Carte des positions GPS
-        gps_chart = create_simple_gps_chart(sessions_df)
+        # Carte des positions GPS (regroupée en grille au-delà de GPS_MAP_MAX_POINTS points)
+        zoom = st.radio("🔍 Zoom de la carte", list(ZOOM_PRESETS), horizontal=True)
+        gps_chart = create_simple_gps_chart(sessions_df, zoom)
         if gps_chart:
             st.plotly_chart(gps_chart, use_container_width=True)
         else:
@@ -0,0 +1,97 @@
+# db_pool.py - Pool de connexions SQLite pour l'API analytics
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+    """Pool de connexions SQLite par processus, en mode WAL
+
+    Les connexions restent ouvertes d'une requête à l'autre : les PRAGMA ne
+    sont appliqués qu'une fois et le cache de requêtes préparées de sqlite3
+    (cached_statements) est réutilisé tant que le texte SQL est identique.
+    """
+
+    def __init__(self, database, size=4, synchronous='NORMAL', busy_timeout_ms=5000,
+                 cached_statements=128):
+        self.database = database
+        self.size = size
+        self.synchronous = synchronous
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.database,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        conn.execute('PRAGMA foreign_keys=OFF')
+        return conn
+
+    def _acquire(self):
+        # Après un fork, les connexions héritées ne doivent pas être réutilisées
+        if os.getpid() != self._pid:
+            self._reset()
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        return self._idle.get(timeout=self.busy_timeout_ms / 1000)
+
+    @contextmanager
+    def connection(self):
+        """Prête une connexion ; annule la transaction en cours en cas d'erreur"""
+        conn = self._acquire()
+        pid = self._pid
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if os.getpid() == pid:
+                self._idle.put(conn)
+
+    @property
+    def open_connections(self):
+        return self._created
+
+    @property
+    def idle_connections(self):
+        return self._idle.qsize()
+
+    def close_all(self):
+        """Ferme toutes les connexions inactives du pool"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
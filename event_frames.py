@@ -0,0 +1,103 @@
+# event_frames.py - DataFrames d'événements compacts pour les dashboards
+"""
+Les DataFrames construits par les dashboards gardent les colonnes texte en
+objets Python (une chaîne par ligne) et les nombres en float64/int64, alors
+que quelques valeurs (pages, villes, pays, IP, sources) se répètent sur des
+milliers de lignes. compact_frame les convertit :
+
+- texte répétitif (session_id, page, city, country, client_ip, geo_source...)
+  -> catégorie (dictionnaire des valeurs + codes entiers) ;
+- coordonnées GPS -> float32 ; coordonnées de clic -> int16 ;
+- entiers (sequence_order, click_count...) -> plus petit entier suffisant ;
+- horodatages ISO (timestamp...) -> datetime64 UTC, si aucun n'est perdu ;
+- autres textes presque uniques -> chaînes Arrow (valeur manquante NaN,
+  comme les colonnes objet).
+
+Rapport mémoire sur 1M d'événements : python benchmark_memory.py
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_float_dtype, is_integer_dtype, is_numeric_dtype, is_object_dtype, is_string_dtype
+
+# Coordonnées géographiques (précision float32 ~1 m, largement suffisante pour une carte)
+FLOAT32_COLUMNS = ('latitude', 'longitude', 'gps_latitude', 'gps_longitude', 'gps_accuracy')
+
+# Coordonnées de clic en pixels
+INT16_COLUMNS = ('x_coordinate', 'y_coordinate')
+
+# Horodatages ISO 8601 envoyés par les trackers
+TIMESTAMP_COLUMNS = ('timestamp', 'end_timestamp_from_end')
+
+# Colonne texte convertie en catégorie si ses valeurs distinctes sont au plus cette part des lignes
+MAX_CATEGORY_RATIO = 0.5
+
+
+def _arrow_string_dtype():
+    """Chaînes Arrow avec NaN pour valeur manquante (pandas >= 2.3), sinon None"""
+    try:
+        return pd.StringDtype('pyarrow', na_value=np.nan)
+    except (TypeError, ImportError):
+        try:
+            return pd.StringDtype('pyarrow_numpy')  # pandas 2.1 / 2.2
+        except (TypeError, ValueError, ImportError):
+            return None
+
+
+ARROW_STRING = _arrow_string_dtype()
+
+
+def memory_bytes(df):
+    """Mémoire occupée par un DataFrame, chaînes comprises"""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def _is_text(series):
+    return is_object_dtype(series.dtype) or (is_string_dtype(series.dtype)
+                                             and not isinstance(series.dtype, pd.CategoricalDtype))
+
+
+def compact_series(series):
+    """Série convertie dans le type compact adapté, ou inchangée"""
+    name = series.name
+    if name in FLOAT32_COLUMNS and is_numeric_dtype(series.dtype):
+        return series.astype('float32')
+
+    if name in INT16_COLUMNS and is_numeric_dtype(series.dtype):
+        values = series.dropna()
+        if values.empty or (values.between(-32768, 32767).all() and (values % 1 == 0).all()):
+            return series.astype('int16' if len(values) == len(series) else 'Int16')
+        return series
+
+    if is_integer_dtype(series.dtype) and not isinstance(series.dtype, pd.CategoricalDtype):
+        return pd.to_numeric(series, downcast='integer')
+
+    if is_float_dtype(series.dtype):
+        return series
+
+    # Texte uniquement (les colonnes mixtes texte/nombres gardent leur type)
+    if not (_is_text(series) and len(series)) or pd.api.types.infer_dtype(series, skipna=True) != 'string':
+        return series
+
+    if name in TIMESTAMP_COLUMNS:
+        parsed = pd.to_datetime(series, format='ISO8601', utc=True, errors='coerce')
+        # Conversion seulement si chaque horodatage renseigné est compris
+        if not (parsed.isna() & series.notna() & (series != '')).any():
+            return parsed
+
+    if series.nunique() <= MAX_CATEGORY_RATIO * len(series):
+        return series.astype('category')
+    if ARROW_STRING is not None and series.dtype != ARROW_STRING:
+        return series.astype(ARROW_STRING)
+    return series
+
+
+def compact_frame(df):
+    """Copie compacte d'un DataFrame (voir le module) ; mêmes colonnes, mêmes valeurs"""
+    if df is None or df.empty:
+        return df
+    return pd.DataFrame({column: compact_series(df[column]) for column in df.columns}, index=df.index)
+
+
+def compact_frames(*frames):
+    """compact_frame appliqué à chaque DataFrame (tuple dans le même ordre)"""
+    return tuple(compact_frame(df) for df in frames)
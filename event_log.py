@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Journal d'événements analytics en NDJSON (append-only)
+
+Chaque événement est écrit sur une ligne JSON à la fin du segment courant,
+sans relire ni réécrire l'historique. Les segments tournent par jour et par
+taille, et un lecteur permet de les parcourir en flux. Le tableau JSON
+historique (local_analytics_data.json) reste disponible via export_json_array.
+"""
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+SEGMENT_PATTERN = re.compile(r'^events-(\d{8})-(\d{4})\.ndjson$')
+
+# Répertoire du journal de simple_server.py (ignoré par git)
+DEFAULT_DIRECTORY = 'local_analytics_log'
+
+
+def truncate_partial_line(path, chunk_size=64 * 1024):
+    """Coupe le segment après son dernier saut de ligne
+
+    Après une écriture interrompue, la ligne tronquée serait sinon prolongée par
+    l'événement suivant, et les deux deviendraient illisibles.
+    """
+    with open(path, 'r+b') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - chunk_size)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b'\n')
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            f.truncate(position)
+
+
+class EventLog:
+    """Journal append-only découpé en segments events-AAAAMMJJ-NNNN.ndjson"""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_segment_bytes=64 * 1024 * 1024,
+                 fsync_every=50, fsync_interval=1.0):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        # fsync groupé : au plus tard tous les `fsync_every` événements
+        # ou toutes les `fsync_interval` secondes, même sans nouvel événement
+        # (thread de fond démarré au premier ajout)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._day = None
+        self._index = 0
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+        self._stopping = threading.Event()
+        self._thread = None
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def segments(self):
+        """Retourne les chemins des segments, du plus ancien au plus récent"""
+        names = [n for n in os.listdir(self.directory) if SEGMENT_PATTERN.match(n)]
+        return [os.path.join(self.directory, n) for n in sorted(names)]
+
+    def _open_segment(self, day):
+        """Ouvre le segment du jour, en reprenant le dernier s'il n'est pas plein"""
+        index = 0
+        for path in self.segments():
+            match = SEGMENT_PATTERN.match(os.path.basename(path))
+            if match.group(1) == day:
+                index = max(index, int(match.group(2)))
+
+        path = self._segment_path(day, index)
+        if os.path.exists(path):
+            truncate_partial_line(path)
+            if os.path.getsize(path) >= self.max_segment_bytes:
+                index += 1
+                path = self._segment_path(day, index)
+
+        self._file = open(path, 'ab')
+        self._day = day
+        self._index = index
+
+    def _segment_path(self, day, index):
+        return os.path.join(self.directory, f'events-{day}-{index:04d}.ndjson')
+
+    def _rotate_if_needed(self):
+        """Change de segment au changement de jour ou quand la taille maximale est atteinte"""
+        day = datetime.now().strftime('%Y%m%d')
+        if self._file is None:
+            self._open_segment(day)
+        elif day != self._day:
+            self._close_segment()
+            self._open_segment(day)
+        elif self._file.tell() >= self.max_segment_bytes:
+            self._close_segment()
+            self._index += 1
+            self._file = open(self._segment_path(day, self._index), 'ab')
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._pending = 0
+            self._last_fsync = time.monotonic()
+
+    def append(self, event):
+        """Ajoute un événement à la fin du journal"""
+        line = json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n'
+        payload = line.encode('utf-8')
+
+        with self._lock:
+            self._start_syncer()
+            self._rotate_if_needed()
+            # Une seule écriture par ligne : pas de ligne entrelacée entre requêtes
+            self._file.write(payload)
+            self._file.flush()
+            self._pending += 1
+
+            now = time.monotonic()
+            if self._pending >= self.fsync_every or now - self._last_fsync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._pending = 0
+                self._last_fsync = now
+
+    def sync(self):
+        """Force l'écriture sur disque des événements en attente"""
+        with self._lock:
+            if self._file is not None and self._pending:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._pending = 0
+                self._last_fsync = time.monotonic()
+
+    def _start_syncer(self):
+        if self.fsync_interval and (self._thread is None or not self._thread.is_alive()):
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run_syncer, name='event-log-fsync', daemon=True)
+            self._thread.start()
+
+    def _run_syncer(self):
+        # Les derniers événements avant une période calme sont aussi écrits sur disque
+        while not self._stopping.wait(self.fsync_interval):
+            try:
+                self.sync()
+            except OSError as e:
+                print(f"⚠️ fsync du journal impossible: {e}")
+
+    def close(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._close_segment()
+
+    def iter_events(self, since_day=None):
+        """Parcourt les événements segment par segment sans tout charger en mémoire
+
+        since_day (AAAAMMJJ) permet d'ignorer les segments plus anciens.
+        Une dernière ligne tronquée (écriture interrompue) est ignorée.
+        """
+        for path in self.segments():
+            day = SEGMENT_PATTERN.match(os.path.basename(path)).group(1)
+            if since_day and day < since_day:
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.endswith('\n'):
+                        break
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+
+
+def export_json_array(log, filename='local_analytics_data.json'):
+    """Produit le fichier tableau JSON historique à partir du journal
+
+    Le fichier est écrit dans un fichier temporaire puis renommé, pour qu'un
+    lecteur ne voie jamais un export partiel.
+    """
+    log.sync()
+    tmp_filename = f'{filename}.tmp'
+    count = 0
+    with open(tmp_filename, 'w', encoding='utf-8') as f:
+        f.write('[')
+        for event in log.iter_events():
+            f.write(',\n' if count else '\n')
+            f.write(json.dumps(event, ensure_ascii=False))
+            count += 1
+        f.write('\n]\n' if count else ']\n')
+    os.replace(tmp_filename, filename)
+    return count
+
+
+def import_json_array(log, filename='local_analytics_data.json'):
+    """Importe un ancien fichier tableau JSON dans le journal"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        events = json.load(f)
+    for event in events:
+        log.append(event)
+    log.sync()
+    return len(events)
+
+
+if __name__ == '__main__':
+    import sys
+
+    log = EventLog()
+    if len(sys.argv) > 1 and sys.argv[1] == 'export':
+        output = sys.argv[2] if len(sys.argv) > 2 else 'local_analytics_data.json'
+        total = export_json_array(log, output)
+        print(f"💾 {total} événements exportés dans {output}")
+    else:
+        print("Usage: python event_log.py export [fichier.json]")
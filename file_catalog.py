@@ -0,0 +1,192 @@
+# file_catalog.py - Catalogue persistant des fichiers du site (pdf/, drawing/, pages HTML)
+"""
+Le catalogue est construit en parcourant les dossiers pdf/ et drawing/ ainsi que
+les liens des pages index*.html et site_*.html. Il est sauvegardé en JSON avec la
+date de modification (mtime) et la taille de chaque source : une reconstruction ne
+relit que les fichiers et pages modifiés depuis le dernier passage.
+
+Un dossier absent (déploiement sans les fichiers) conserve les entrées déjà
+cataloguées ; un fichier supprimé d'un dossier présent est retiré.
+"""
+import fnmatch
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from page_classifier import classify_page
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOG_PATH = os.getenv('FILE_CATALOG_PATH', os.path.join(BASE_DIR, 'file_catalog.json'))
+
+FILE_DIRECTORIES = ('pdf', 'drawing')
+HTML_PATTERNS = ('index*.html', 'site_*.html')
+FILE_TYPES = ('Image', 'PDF', 'Document')
+
+# Liens href/src vers un fichier (mêmes extensions que l'ancien scan de la page d'accueil)
+LINK_PATTERN = re.compile(
+    r'(?:href|src)=["\']([^"\']*\.(?:jpg|jpeg|png|gif|pdf|doc|docx|txt))["\']', re.IGNORECASE
+)
+
+CATALOG_VERSION = 1
+CATALOG_COLUMNS = ['path', 'type', 'extension', 'size', 'last_modified', 'source', 'referenced']
+
+
+def _file_entry(relative_path, stat):
+    filename, extension, category = classify_page(relative_path)
+    return {
+        'key': filename,
+        'type': category,
+        'extension': extension,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'last_modified': datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def extract_links(html):
+    """Noms des fichiers référencés par une page HTML (sans doublon, dans l'ordre)"""
+    names = {}
+    for link in LINK_PATTERN.findall(html):
+        filename = os.path.basename(link.split('?', 1)[0].split('#', 1)[0])
+        if filename and '.' in filename:
+            names[filename] = None
+    return list(names)
+
+
+class FileCatalog:
+    """Catalogue des fichiers du site, indexé par nom de fichier"""
+
+    def __init__(self, base_dir=BASE_DIR, catalog_path=CATALOG_PATH,
+                 directories=FILE_DIRECTORIES, html_patterns=HTML_PATTERNS):
+        self.base_dir = base_dir
+        self.catalog_path = catalog_path
+        self.directories = directories
+        self.html_patterns = html_patterns
+        self.files = {}
+        self.pages = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.catalog_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == CATALOG_VERSION:
+            self.files = data.get('files', {})
+            self.pages = data.get('pages', {})
+
+    def save(self):
+        """Écrit le catalogue de façon atomique"""
+        tmp_path = f'{self.catalog_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CATALOG_VERSION, 'files': self.files, 'pages': self.pages},
+                      f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.catalog_path)
+
+    def _scan_directory(self, directory, stats):
+        root = os.path.join(self.base_dir, directory)
+        if not os.path.isdir(root):
+            return {path: entry for path, entry in self.files.items()
+                    if path.startswith(f'{directory}/')}
+
+        files = {}
+        for current, _, names in os.walk(root):
+            for name in names:
+                full_path = os.path.join(current, name)
+                relative_path = os.path.relpath(full_path, self.base_dir).replace(os.sep, '/')
+                stat = os.stat(full_path)
+                previous = self.files.get(relative_path)
+                if previous and previous['mtime_ns'] == stat.st_mtime_ns and previous['size'] == stat.st_size:
+                    files[relative_path] = previous
+                    stats['reused'] += 1
+                    continue
+                entry = _file_entry(relative_path, stat)
+                if entry['type'] in FILE_TYPES:
+                    files[relative_path] = entry
+                    stats['scanned'] += 1
+        return files
+
+    def _scan_pages(self, stats):
+        names = [name for name in os.listdir(self.base_dir)
+                 if any(fnmatch.fnmatch(name, pattern) for pattern in self.html_patterns)]
+        pages = {}
+        for name in sorted(names):
+            stat = os.stat(os.path.join(self.base_dir, name))
+            previous = self.pages.get(name)
+            if previous and previous['mtime_ns'] == stat.st_mtime_ns and previous['size'] == stat.st_size:
+                pages[name] = previous
+                stats['reused'] += 1
+                continue
+            with open(os.path.join(self.base_dir, name), 'r', encoding='utf-8', errors='replace') as f:
+                links = extract_links(f.read())
+            pages[name] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'links': links}
+            stats['scanned'] += 1
+        return pages
+
+    def refresh(self, save=True):
+        """Met à jour le catalogue ; retourne le nombre de sources relues, réutilisées et retirées"""
+        stats = {'scanned': 0, 'reused': 0, 'removed': 0}
+        files = {}
+        for directory in self.directories:
+            files.update(self._scan_directory(directory, stats))
+        pages = self._scan_pages(stats)
+        stats['removed'] = len(set(self.files) - set(files)) + len(set(self.pages) - set(pages))
+
+        changed = stats['scanned'] or stats['removed'] or not os.path.exists(self.catalog_path)
+        self.files, self.pages = files, pages
+        if save and changed:
+            self.save()
+        return stats
+
+    def frame(self):
+        """DataFrame indexé par nom de fichier (clé de jointure avec les clics)
+
+        Les fichiers seulement référencés par une page HTML ont la source 'html'
+        et pas de taille ni de date.
+        """
+        referenced = {name for page in self.pages.values() for name in page['links']}
+        rows = {}
+        for path in sorted(self.files):
+            entry = self.files[path]
+            rows.setdefault(entry['key'], {
+                'path': path,
+                'type': entry['type'],
+                'extension': entry['extension'],
+                'size': entry['size'],
+                'last_modified': entry['last_modified'],
+                'source': path.split('/', 1)[0],
+                'referenced': entry['key'] in referenced,
+            })
+        for name in sorted(referenced - set(rows)):
+            _, extension, category = classify_page(name)
+            rows[name] = {
+                'path': None, 'type': category, 'extension': extension, 'size': None,
+                'last_modified': None, 'source': 'html', 'referenced': True,
+            }
+
+        frame = pd.DataFrame.from_dict(rows, orient='index', columns=CATALOG_COLUMNS)
+        frame.index.name = 'key'
+        frame['size'] = frame['size'].astype('Int64')
+        frame['last_modified'] = pd.to_datetime(frame['last_modified'], utc=True)
+        frame['type'] = pd.Categorical(frame['type'], categories=FILE_TYPES)
+        return frame
+
+
+def load_catalog(base_dir=BASE_DIR, catalog_path=CATALOG_PATH):
+    """Rafraîchit le catalogue persistant et le retourne sous forme de DataFrame"""
+    catalog = FileCatalog(base_dir, catalog_path)
+    catalog.refresh()
+    return catalog.frame()
+
+
+if __name__ == '__main__':
+    catalog = FileCatalog()
+    stats = catalog.refresh()
+    frame = catalog.frame()
+    print(f"📁 Catalogue: {len(frame)} fichiers ({catalog.catalog_path})")
+    print(f"   relus: {stats['scanned']}  réutilisés: {stats['reused']}  retirés: {stats['removed']}")
+    print(frame['type'].value_counts().to_string())
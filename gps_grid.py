@@ -0,0 +1,74 @@
+# gps_grid.py - Regroupement des positions GPS en grille pour les cartes des dashboards
+"""
+Une carte Scattergeo avec un marqueur par session pèse plusieurs mégaoctets
+de JSON au-delà de quelques dizaines de milliers de points. Au-delà de
+MAX_RAW_POINTS points visibles, les positions sont regroupées dans une grille
+géographique (cases de `cell` degrés, calcul vectorisé NumPy) : un marqueur
+par case occupée, placé au barycentre de ses points, de taille croissante
+avec leur nombre.
+
+Chaque préréglage de zoom fixe l'emprise de la carte et la taille des cases.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+# Nombre de points visibles au-delà duquel la carte passe en grille
+MAX_RAW_POINTS = int(os.getenv('GPS_MAP_MAX_POINTS', '2000'))
+
+# Préréglages de zoom : emprise (lon_min, lon_max, lat_min, lat_max), taille des cases (degrés)
+ZOOM_PRESETS = {
+    'Monde': {'bounds': (-180.0, 180.0, -90.0, 90.0), 'cell': 2.0},
+    'Europe': {'bounds': (-25.0, 45.0, 34.0, 72.0), 'cell': 0.5},
+    'France': {'bounds': (-5.5, 10.0, 41.0, 51.5), 'cell': 0.1},
+}
+
+MIN_MARKER_SIZE = 6
+MAX_MARKER_SIZE = 30
+
+
+def visible(lat, lon, bounds):
+    """Masque des points compris dans l'emprise `bounds`"""
+    lon_min, lon_max, lat_min, lat_max = bounds
+    return (lon >= lon_min) & (lon <= lon_max) & (lat >= lat_min) & (lat <= lat_max)
+
+
+def bin_points(lat, lon, cell, values=None):
+    """Regroupe les points dans des cases de `cell` degrés
+
+    Retourne un DataFrame (latitude, longitude, count[, mean]) : une ligne par
+    case occupée, au barycentre de ses points ; `mean` est la moyenne de
+    `values` (NaN ignorés) dans la case.
+    """
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    columns = int(np.ceil(360 / cell))
+    row = np.floor((lat + 90) / cell).astype(np.int64)
+    col = np.minimum(np.floor((lon + 180) / cell).astype(np.int64), columns - 1)  # lon = 180 : dernière case
+    cells, index, counts = np.unique(row * columns + col, return_inverse=True, return_counts=True)
+
+    binned = pd.DataFrame({
+        'latitude': np.bincount(index, weights=lat) / counts,
+        'longitude': np.bincount(index, weights=lon) / counts,
+        'count': counts,
+    })
+    if values is not None:
+        values = np.asarray(values, dtype=float)
+        known = ~np.isnan(values)
+        known_counts = np.bincount(index, weights=known, minlength=len(cells))
+        sums = np.bincount(index, weights=np.where(known, values, 0.0), minlength=len(cells))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            binned['mean'] = sums / known_counts
+    return binned
+
+
+def marker_sizes(counts):
+    """Taille des marqueurs : aire proportionnelle au nombre de points de la case"""
+    counts = np.asarray(counts, dtype=float)
+    scale = np.sqrt(counts / counts.max()) if len(counts) else counts
+    return MIN_MARKER_SIZE + (MAX_MARKER_SIZE - MIN_MARKER_SIZE) * scale
+
+
+def use_grid(point_count, max_points=MAX_RAW_POINTS):
+    return point_count > max_points
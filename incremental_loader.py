@@ -0,0 +1,187 @@
+"""Chargement incrémental de analytics_data.json pour les dashboards
+
+Le dernier corps reçu est conservé sur disque avec son ETag/Last-Modified.
+Chaque rechargement envoie un GET conditionnel :
+- 304 : les DataFrames déjà construits sont réutilisés tels quels ;
+- 200 et fichier seulement allongé : seule la fin (nouveaux événements) est parsée ;
+- 200 sinon : reconstruction complète.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+import requests
+
+DEFAULT_CACHE_DIR = os.getenv('ANALYTICS_CACHE_DIR', '.analytics_cache')
+
+
+def build_frames(entries):
+    """Construit (sessions_df, clicks_df) à partir des événements bruts"""
+    sessions = []
+    clicks = []
+    for entry in entries:
+        t = entry.get('type')
+        if t == 'session_start':
+            sessions.append({
+                'session_id': entry.get('session_id', ''),
+                'timestamp': entry.get('timestamp', ''),
+                'country': entry.get('country', ''),
+                'city': entry.get('city', ''),
+                'client_ip': entry.get('client_ip', ''),
+                'latitude': entry.get('latitude', 0),
+                'longitude': entry.get('longitude', 0)
+            })
+        elif t == 'click':
+            clicks.append({
+                'session_id': entry.get('session_id', ''),
+                'timestamp': entry.get('timestamp', ''),
+                'page': entry.get('page', ''),
+                'file_clicked': entry.get('file_clicked', ''),
+                'sequence_order': entry.get('sequence_order', 0)
+            })
+    return pd.DataFrame(sessions), pd.DataFrame(clicks)
+
+
+def _append_frames(old_frames, new_frames):
+    return tuple(
+        new if old.empty else old if new.empty else pd.concat([old, new], ignore_index=True)
+        for old, new in zip(old_frames, new_frames)
+    )
+
+
+def _array_prefix(body):
+    """Début d'un tableau JSON sans son crochet fermant, ou None si le tableau est vide"""
+    stripped = body.rstrip()
+    if not stripped.endswith(b']'):
+        return None
+    prefix = stripped[:-1].rstrip()
+    if prefix.endswith(b'['):
+        return None
+    return prefix
+
+
+def parse_tail(old_body, new_body):
+    """Retourne les événements ajoutés si new_body ne fait qu'allonger old_body, sinon None"""
+    if old_body is None or len(new_body) <= len(old_body):
+        return None
+    prefix = _array_prefix(old_body)
+    if prefix is None or not new_body.startswith(prefix):
+        return None
+
+    tail = new_body[len(prefix):].lstrip()
+    if not tail.startswith(b','):
+        return None
+    try:
+        entries = json.loads(b'[' + tail[1:])
+    except ValueError:
+        return None
+    return entries if isinstance(entries, list) else None
+
+
+class IncrementalLoader:
+    """Chargeur d'une URL avec GET conditionnel et cache disque"""
+
+    def __init__(self, url, cache_dir=DEFAULT_CACHE_DIR, timeout=10, session=None):
+        self.url = url
+        self.timeout = timeout
+        self.http = session or requests.Session()
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        os.makedirs(cache_dir, exist_ok=True)
+        self.body_path = os.path.join(cache_dir, f'{key}.body')
+        self.meta_path = os.path.join(cache_dir, f'{key}.meta.json')
+
+        self._lock = threading.Lock()
+        self._frames = None
+        self.body = None
+        self.meta = {}
+        self.last_status = None
+        self._read_cache()
+
+    def _read_cache(self):
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+            with open(self.body_path, 'rb') as f:
+                self.body = f.read()
+        except (OSError, ValueError):
+            self.meta = {}
+            self.body = None
+
+    def _write_cache(self, body, headers):
+        self.meta = {
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'length': len(body),
+        }
+        tmp_body = f'{self.body_path}.tmp'
+        with open(tmp_body, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_body, self.body_path)
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        self.body = body
+
+    def _conditional_headers(self):
+        headers = {}
+        if self.body is not None:
+            if self.meta.get('etag'):
+                headers['If-None-Match'] = self.meta['etag']
+            if self.meta.get('last_modified'):
+                headers['If-Modified-Since'] = self.meta['last_modified']
+        return headers
+
+    def load(self):
+        """Retourne (sessions_df, clicks_df) ; lève une exception si l'URL est injoignable"""
+        with self._lock:
+            resp = self.http.get(self.url, headers=self._conditional_headers(), timeout=self.timeout)
+            self.last_status = resp.status_code
+
+            if resp.status_code == 304 and self.body is not None:
+                if self._frames is None:
+                    # Cache disque d'un processus précédent : un seul parsing complet
+                    self._frames = build_frames(json.loads(self.body))
+                return self._frames
+
+            resp.raise_for_status()
+            body = resp.content
+
+            new_entries = parse_tail(self.body, body) if self._frames is not None else None
+            if new_entries is not None:
+                self._frames = _append_frames(self._frames, build_frames(new_entries))
+                self.last_status = 'tail'
+            else:
+                self._frames = build_frames(json.loads(body))
+
+            self._write_cache(body, resp.headers)
+            return self._frames
+
+
+_LOADERS = {}
+_LOADERS_LOCK = threading.Lock()
+
+
+def get_loader(url, cache_dir=DEFAULT_CACHE_DIR, timeout=10):
+    """Chargeur partagé par processus pour une URL donnée"""
+    with _LOADERS_LOCK:
+        key = (url, cache_dir)
+        if key not in _LOADERS:
+            _LOADERS[key] = IncrementalLoader(url, cache_dir=cache_dir, timeout=timeout)
+        return _LOADERS[key]
+
+
+def load_with_fallback(sources, cache_dir=DEFAULT_CACHE_DIR, timeout=10):
+    """Essaie chaque (url, nom_source) dans l'ordre
+
+    Retourne (sessions_df, clicks_df, nom_source, dernière_erreur) ; nom_source
+    vaut "none" si aucune source n'a répondu.
+    """
+    last_error = None
+    for url, source in sources:
+        try:
+            sessions_df, clicks_df = get_loader(url, cache_dir, timeout).load()
+            return sessions_df, clicks_df, source, None
+        except Exception as err:
+            last_error = err
+    return pd.DataFrame(), pd.DataFrame(), "none", last_error
@@ -16,13 +16,16 @@ def install_dependencies():
         return False
     
     dependencies = [
-        "streamlit==1.28.0",
+        "streamlit>=1.37",
         "pandas==2.1.0", 
         "plotly==5.15.0",
         "folium==0.14.0",
         "streamlit-folium==0.13.0",
         "flask==2.3.3",
         "flask-cors==4.0.0",
+        "starlette==0.37.2",
+        "uvicorn==0.29.0",
+        "pyarrow==14.0.2",
         "requests==2.31.0",
         "python-dotenv==1.0.0"
     ]
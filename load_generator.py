@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Générateur de charge HTTP pour /api/track (api_backend.py, asgi_ingest.py, simple_server.py)
+
+Rejoue des sessions réalistes tirées de synthetic_data : session_start, clics,
+session_end, avec des temps de réflexion entre événements (écarts des
+horodatages synthétiques, accélérés 100 fois). Les sessions arrivent
+selon un processus de Poisson au débit demandé (boucle ouverte) ; leurs
+requêtes sont envoyées par un nombre fixe de clients HTTP keep-alive.
+
+Pour chaque palier de débit : débit obtenu, latences p50/p95/p99, taux
+d'erreur ; l'ensemble des paliers forme la courbe de saturation.
+
+Usage: python load_generator.py [url] [débits] [durée] [clients] [résultats.json]
+    python load_generator.py http://localhost:5000/api/track 5,10,20,40 20 32
+    python load_generator.py http://localhost:8000/api/track 2,4,8 30 16 resultats.json
+"""
+
+import heapq
+import json
+import queue
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+import requests
+
+from synthetic_data import generate_events
+
+# Retard d'envoi (s) au-delà duquel le générateur ne suit plus le débit demandé
+MAX_SEND_LAG = 1.0
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def _parse_time(timestamp):
+    return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+
+
+def build_sessions(n_events, seed=42, think_scale=0.01, max_think=5.0):
+    """Scénarios de session : listes de (temps de réflexion en s, événement)
+
+    Les temps de réflexion reprennent les écarts entre horodatages synthétiques,
+    multipliés par `think_scale` et plafonnés à `max_think`.
+    """
+    sessions = defaultdict(list)
+    previous = {}
+    for event in generate_events(n_events, seed=seed):
+        session_id = event['session_id']
+        current = _parse_time(event['timestamp'])
+        gap = (current - previous[session_id]).total_seconds() if session_id in previous else 0.0
+        previous[session_id] = current
+        sessions[session_id].append((min(max_think, gap * think_scale), event))
+    return list(sessions.values())
+
+
+class RequestLog:
+    """Résultats des requêtes d'un palier (thread-safe)"""
+
+    def __init__(self):
+        self.latencies = []
+        self.by_type = defaultdict(list)
+        self.outcomes = Counter()  # 'ok', code HTTP en erreur ou nom de l'exception
+        self.send_lags = []  # retard d'envoi sur l'heure prévue (attente d'un client libre)
+        self._lock = threading.Lock()
+
+    def record(self, event_type, latency, outcome):
+        with self._lock:
+            self.latencies.append(latency)
+            self.by_type[event_type].append(latency)
+            self.outcomes[outcome] += 1
+
+    def record_lag(self, lag):
+        with self._lock:
+            self.send_lags.append(lag)
+
+    def summary(self, elapsed):
+        total = sum(self.outcomes.values())
+        errors = total - self.outcomes['ok']
+        return {
+            'requests': total,
+            'throughput': total / elapsed if elapsed else 0.0,
+            'ok_throughput': self.outcomes['ok'] / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(self.latencies, 0.50) * 1000,
+            'p95_ms': percentile(self.latencies, 0.95) * 1000,
+            'p99_ms': percentile(self.latencies, 0.99) * 1000,
+            'error_rate': errors / total if total else 0.0,
+            'errors': {str(k): v for k, v in self.outcomes.items() if k != 'ok'},
+            'p99_send_lag_ms': percentile(self.send_lags, 0.99) * 1000,
+            'by_type': {
+                event_type: {'requests': len(values),
+                             'p50_ms': percentile(values, 0.50) * 1000,
+                             'p99_ms': percentile(values, 0.99) * 1000}
+                for event_type, values in sorted(self.by_type.items())
+            },
+        }
+
+
+def send_event(http, url, template, session_id, log, timeout):
+    """Envoie un événement de scénario avec l'identifiant de session et l'heure courante"""
+    event = dict(template, session_id=session_id,
+                 timestamp=datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z'))
+    start = time.perf_counter()
+    try:
+        response = http.post(url, json=event, timeout=timeout)
+        outcome = 'ok' if response.ok else response.status_code
+    except requests.RequestException as e:
+        outcome = type(e).__name__
+    log.record(event['type'], time.perf_counter() - start, outcome)
+
+
+def run_step(url, rate, duration, sessions, concurrency=32, timeout=10, seed=0):
+    """Joue des sessions à `rate` sessions/s pendant `duration` s ; retourne le résumé du palier
+
+    Chaque événement est planifié à la fin du précédent plus son temps de
+    réflexion : un client HTTP n'est occupé que pendant une requête, et
+    `concurrency` borne les requêtes simultanées, pas les sessions. Les
+    sessions commencées avant la fin du palier sont terminées ; celles qui
+    attendent encore un client libre depuis plus de MAX_SEND_LAG s sont abandonnées et comptées dans
+    `dropped_sessions` (signe de saturation). Le débit est calculé sur la durée réelle.
+    """
+    rng = random.Random(seed)
+    log = RequestLog()
+    ready = queue.Queue()  # (heure prévue, n° de session, scénario, rang de l'événement)
+    timers = []  # tas des événements en attente de leur heure
+    cond = threading.Condition()
+    closing = threading.Event()
+    state = {'active': 0, 'dropped': 0}
+    run_id = f"load_{int(time.time())}_{rate:g}"
+
+    def session_done(dropped=False):
+        with cond:
+            state['active'] -= 1
+            state['dropped'] += dropped
+            cond.notify()
+
+    def worker():
+        http = requests.Session()
+        while True:
+            item = ready.get()
+            if item is None:
+                return
+            due, number, script, index = item
+            if index == 0 and closing.is_set() and time.perf_counter() - due > MAX_SEND_LAG:
+                session_done(dropped=True)
+                continue
+            log.record_lag(max(0.0, time.perf_counter() - due))
+            send_event(http, url, script[index][1], f"{run_id}_{number}", log, timeout)
+            if index + 1 < len(script):
+                with cond:
+                    heapq.heappush(timers, (time.perf_counter() + script[index + 1][0], number, script, index + 1))
+                    cond.notify()
+            else:
+                session_done()
+
+    workers = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for w in workers:
+        w.start()
+
+    # Arrivées de Poisson indépendantes des réponses (boucle ouverte)
+    start = time.perf_counter()
+    next_arrival = start + rng.expovariate(rate)
+    number = 0
+    with cond:
+        while True:
+            now = time.perf_counter()
+            if not closing.is_set() and next_arrival - start >= duration:
+                closing.set()
+            if not closing.is_set() and next_arrival <= now:
+                ready.put((next_arrival, number, sessions[number % len(sessions)], 0))
+                state['active'] += 1
+                number += 1
+                next_arrival += rng.expovariate(rate)
+            elif timers and timers[0][0] <= now:
+                ready.put(heapq.heappop(timers))
+            elif closing.is_set() and state['active'] == 0:
+                break
+            else:
+                wakeups = [timers[0][0]] if timers else []
+                if not closing.is_set():
+                    wakeups.append(next_arrival)
+                cond.wait(min(wakeups) - now if wakeups else None)
+
+    for _ in workers:
+        ready.put(None)
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    result = log.summary(elapsed)
+    result.update({'rate': rate, 'sessions': number, 'dropped_sessions': state['dropped'],
+                   'duration': elapsed, 'concurrency': concurrency})
+    return result
+
+
+def saturation_curve(url, rates, duration, concurrency=32, think_scale=0.01, timeout=10, seed=42):
+    """Un palier par débit (sessions/s), dans l'ordre donné"""
+    sessions = build_sessions(max(2000, int(max(rates) * duration * 6)), seed=seed, think_scale=think_scale)
+    return [run_step(url, rate, duration, sessions, concurrency, timeout, seed=seed + i)
+            for i, rate in enumerate(rates)]
+
+
+def print_report(url, steps):
+    print(f"🏁 Charge sur {url}")
+    print("=" * 106)
+    print(f"{'sessions/s':>10} {'req':>7} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'erreurs':>8} {'attente p99':>12} {'abandons':>9}")
+    for step in steps:
+        print(f"{step['rate']:>10g} {step['requests']:>7} {step['throughput']:>8.1f} {step['p50_ms']:>9.1f} "
+              f"{step['p95_ms']:>9.1f} {step['p99_ms']:>9.1f} {step['error_rate']:>7.1%} "
+              f"{step['p99_send_lag_ms']:>10.0f}ms {step['dropped_sessions']:>9}")
+    for step in steps:
+        if step['errors']:
+            print(f"⚠️ {step['rate']:g} sessions/s : {step['errors']}")
+
+    # Saturation : premier palier en erreur, dont les envois prennent du retard
+    # ou dont la latence p95 décolle par rapport au premier palier
+    for step in steps:
+        if (step['error_rate'] > 0.01 or step['dropped_sessions'] or step['p99_send_lag_ms'] > MAX_SEND_LAG * 1000
+                or step['p95_ms'] > 10 * max(steps[0]['p95_ms'], 1.0)):
+            print(f"📉 Saturation à partir de {step['rate']:g} sessions/s "
+                  f"(max observé : {max(s['ok_throughput'] for s in steps):.1f} req/s)")
+            break
+    else:
+        print("✅ Pas de saturation sur les paliers testés")
+
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else 'http://localhost:5000/api/track'
+    rates = [float(r) for r in sys.argv[2].split(',')] if len(sys.argv) > 2 else [5, 10, 20, 40]
+    duration = float(sys.argv[3]) if len(sys.argv) > 3 else 20
+    concurrency = int(sys.argv[4]) if len(sys.argv) > 4 else 32
+    output = sys.argv[5] if len(sys.argv) > 5 else None
+
+    steps = saturation_curve(url, rates, duration, concurrency)
+    print_report(url, steps)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'url': url, 'steps': steps}, f, indent=2, ensure_ascii=False)
+        print(f"💾 Résultats enregistrés dans {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# metrics.py - Métriques en mémoire de l'API analytics, exposées au format texte Prometheus
+"""
+Compteurs, histogrammes et jauges agrégés dans le processus, sans service
+externe : un collecteur local (Prometheus, VictoriaMetrics, Telegraf...)
+lit `REGISTRY.render()` sur /api/metrics.
+
+Chemin chaud : un histogramme calcule l'indice de son intervalle hors verrou
+(bisect) puis ne tient son verrou que le temps de deux additions ; les
+jauges ne coûtent rien à l'ingestion, leur valeur est lue à la collecte.
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Bornes (s) adaptées à des handlers de quelques millisecondes et à des fsync SQLite
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+    return str(value)
+
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self):
+        """(suffixe, valeurs des étiquettes, étiquettes supplémentaires, valeur)"""
+        return []
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        for suffix, values, extra, value in self.samples():
+            lines.append(f'{self.name}{suffix}{_labels(self.labelnames, values, extra)} {_number(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Compteur croissant, une valeur par combinaison d'étiquettes"""
+    type = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [('', labels, (), value) for labels, value in values]
+
+
+class Histogram(Metric):
+    """Histogramme cumulatif (intervalles `le`, _sum, _count) par combinaison d'étiquettes"""
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # étiquettes -> [effectif par intervalle..., +Inf, somme]
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe la durée du bloc, même s'il lève une exception"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels):
+        state = self._values.get(labels)
+        return sum(state[:-1]) if state else 0
+
+    def samples(self):
+        with self._lock:
+            values = sorted((labels, list(state)) for labels, state in self._values.items())
+        samples = []
+        for labels, state in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), state):
+                cumulative += count
+                samples.append(('_bucket', labels, (('le', _number(float(bound))),), cumulative))
+            samples.append(('_sum', labels, (), state[-1]))
+            samples.append(('_count', labels, (), cumulative))
+        return samples
+
+
+class Sampled(Metric):
+    """Valeur lue à la collecte : `read()` retourne un nombre ou {étiquettes: nombre}
+
+    type 'gauge' par défaut ; 'counter' pour exposer un compteur tenu ailleurs.
+    """
+
+    def __init__(self, name, help, read, labelnames=(), type='gauge'):
+        super().__init__(name, help, labelnames)
+        self.read = read
+        self.type = type
+
+    def samples(self):
+        value = self.read()
+        if isinstance(value, dict):
+            return [('', labels, (), v) for labels, v in sorted(value.items())]
+        return [('', (), (), value)]
+
+
+class Registry:
+    """Ensemble des métriques d'un processus, dans l'ordre d'enregistrement"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Métrique déjà enregistrée: {metric.name}')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, read, labelnames=(), type='gauge'):
+        return self.register(Sampled(name, help, read, labelnames, type))
+
+    def render(self):
+        """Texte d'exposition Prometheus (format 0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        blocks = []
+        for metric in metrics:
+            try:
+                blocks.append(metric.render())
+            except Exception as e:
+                # Une jauge illisible ne doit pas empêcher la collecte des autres
+                blocks.append(f'# {metric.name} indisponible: {_escape(e)}')
+        return '\n'.join(blocks) + '\n'
+
+
+# Registre partagé par api_backend.py et asgi_ingest.py
+REGISTRY = Registry()
@@ -0,0 +1,79 @@
+# page_classifier.py - Classification des pages cliquées (fichier, extension, catégorie)
+import os
+import re
+from functools import lru_cache
+from urllib.parse import urlparse
+
+import pandas as pd
+
+MAIN_PAGE = 'Page principale'
+
+# Extension finale d'un chemin, insensible à la casse
+FILE_EXTENSION_PATTERN = re.compile(r'\.(jpe?g|png|gif|pdf|docx?|txt|html?)$', re.IGNORECASE)
+
+IMAGE_EXTENSIONS = frozenset(('jpg', 'jpeg', 'png', 'gif'))
+PAGE_EXTENSIONS = frozenset(('html', 'htm'))
+
+CATEGORIES = ['Image', 'PDF', 'Document', 'Lien interne', MAIN_PAGE]
+
+
+def _category(extension):
+    if extension in IMAGE_EXTENSIONS:
+        return 'Image'
+    if extension == 'pdf':
+        return 'PDF'
+    if extension and extension not in PAGE_EXTENSIONS:
+        return 'Document'
+    return 'Lien interne'
+
+
+@lru_cache(maxsize=65536)
+def classify_page(page_path):
+    """Retourne (nom_fichier, extension, catégorie) pour un chemin de page
+
+    Le nom de fichier est celui qu'affichait extract_filename_from_page.
+    """
+    if not page_path or page_path == '/':
+        return MAIN_PAGE, '', MAIN_PAGE
+
+    # Enlève le '/' du début
+    if page_path.startswith('/'):
+        page_path = page_path[1:]
+
+    # Fichier avec extension connue : juste le nom du fichier, sans le chemin
+    match = FILE_EXTENSION_PATTERN.search(page_path)
+    if match:
+        extension = match.group(1).lower()
+        return os.path.basename(page_path), extension, _category(extension)
+
+    # Chemin vers un dossier ou une page sans extension connue
+    if '/' in page_path:
+        return page_path, '', 'Lien interne'
+
+    # URL sans chemin : nom de fichier de l'URL
+    if page_path.startswith('http'):
+        filename = os.path.basename(urlparse(page_path).path)
+        if filename:
+            return filename, '', 'Lien interne'
+
+    # Sinon c'est probablement un lien interne
+    return f'Lien: {page_path}', '', 'Lien interne'
+
+
+def classify_pages(pages):
+    """Classe une colonne de pages ; retourne un DataFrame de colonnes catégorielles
+
+    Chaque valeur distincte n'est classée qu'une fois (factorize + cache), puis
+    le résultat est réparti sur toutes les lignes par ses codes.
+    """
+    pages = pd.Series(pages)
+    codes, uniques = pd.factorize(pages.where(pages.notna(), '').astype(str))
+    results = [classify_page(page) for page in uniques]
+
+    columns = {}
+    for position, name in enumerate(('filename', 'extension', 'category')):
+        values = pd.Categorical([result[position] for result in results])
+        columns[name] = pd.Categorical.from_codes(values.codes[codes], categories=values.categories)
+    frame = pd.DataFrame(columns, index=pages.index)
+    frame['category'] = frame['category'].cat.set_categories(CATEGORIES)
+    return frame
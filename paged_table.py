@@ -0,0 +1,131 @@
+# paged_table.py - Tableaux paginés côté serveur pour les dashboards Streamlit
+"""
+st.dataframe sérialise toutes les lignes vers le navigateur à chaque rerun.
+PagedFrame garde le tableau côté serveur : le tri (ordre des lignes calculé
+une fois par colonne et par sens, puis réutilisé) et le filtre sont appliqués
+sur des tableaux de positions NumPy, et seule la page visible est envoyée à
+st.dataframe. La charge utile et le rendu restent constants quand
+l'historique grandit.
+
+    table = PagedFrame(df)              # à conserver entre les reruns
+    paged_table(table, key="clics")     # filtre, tri, page, tableau
+
+session_paged_frame() conserve le PagedFrame dans la session Streamlit tant
+que le tableau n'a pas changé (même taille et même dernière ligne).
+"""
+import os
+
+import numpy as np
+import streamlit as st
+
+PAGE_SIZE = int(os.getenv('DASHBOARD_PAGE_SIZE', '50'))
+
+ORIGINAL_ORDER = "(ordre d'origine)"
+
+
+class PagedFrame:
+    """Tableau trié et filtré par positions, découpé en pages
+
+    `sort_keys` : {colonne: série alignée sur `frame`} pour trier une colonne
+    affichée comme texte (par exemple une date formatée) selon d'autres valeurs.
+    """
+
+    def __init__(self, frame, sort_keys=None):
+        self.frame = frame.reset_index(drop=True)
+        self.columns = list(self.frame.columns)
+        self.sort_keys = {column: keys.reset_index(drop=True) for column, keys in (sort_keys or {}).items()}
+        self._orders = {}
+        self._text = None
+        self._last_filter = (None, None)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def order(self, column, descending=False):
+        """Positions des lignes triées par `column` (tri stable, valeurs manquantes à la fin)"""
+        key = (column, descending)
+        if key not in self._orders:
+            values = self.sort_keys.get(column, self.frame[column])
+            try:
+                ordered = values.sort_values(ascending=not descending, kind='stable', na_position='last')
+            except TypeError:
+                # Colonne objet de types mêlés (dates et « Non spécifié ») : tri sur le texte
+                ordered = values.astype(str).sort_values(ascending=not descending, kind='stable')
+            self._orders[key] = ordered.index.to_numpy()
+        return self._orders[key]
+
+    def matches(self, text):
+        """Masque des lignes dont une colonne contient `text` (sans tenir compte de la casse)"""
+        text = text.lower()
+        if self._last_filter[0] != text:
+            if self._text is None:
+                self._text = [self.frame[column].astype(str).str.lower() for column in self.columns]
+            masks = [column.str.contains(text, regex=False).to_numpy() for column in self._text]
+            mask = np.logical_or.reduce(masks) if masks else np.zeros(len(self.frame), dtype=bool)
+            self._last_filter = (text, mask)
+        return self._last_filter[1]
+
+    def select(self, sort=None, descending=False, text=''):
+        """Positions des lignes retenues par le filtre, dans l'ordre du tri"""
+        if sort is None:
+            positions = np.arange(len(self.frame))
+            if descending:
+                positions = positions[::-1]
+        else:
+            positions = self.order(sort, descending)
+        if text:
+            positions = positions[self.matches(text)[positions]]
+        return positions
+
+    def page(self, positions, number, size=PAGE_SIZE):
+        """Lignes de la page `number` (à partir de 1) de la sélection `positions`"""
+        start = (number - 1) * size
+        return self.frame.take(positions[start:start + size])
+
+
+def page_count(rows, size=PAGE_SIZE):
+    return max(1, -(-rows // size))
+
+
+def _fingerprint(frame):
+    if frame.empty:
+        return (0,)
+    return (len(frame), tuple(frame.columns), tuple(str(value) for value in frame.iloc[-1]))
+
+
+def session_paged_frame(key, frame, prepare=None):
+    """PagedFrame conservé dans la session tant que `frame` ne change pas
+
+    `prepare(frame)`, si fourni, retourne le PagedFrame à afficher.
+    """
+    memo = st.session_state.setdefault('_paged_frames', {})
+    fingerprint = _fingerprint(frame)
+    entry = memo.get(key)
+    if entry is None or entry[0] != fingerprint:
+        entry = memo[key] = (fingerprint, prepare(frame) if prepare else PagedFrame(frame))
+    return entry[1]
+
+
+def paged_table(table, key, page_size=PAGE_SIZE):
+    """Contrôles de filtre, de tri et de page puis la page visible de `table`"""
+    filter_col, sort_col, order_col, page_col = st.columns([3, 2, 1, 1])
+    text = filter_col.text_input("🔎 Filtrer", key=f"{key}_filter").strip()
+    sort = sort_col.selectbox("Trier par", [ORIGINAL_ORDER] + table.columns, key=f"{key}_sort")
+    descending = order_col.toggle("Décroissant", key=f"{key}_desc")
+
+    positions = table.select(None if sort == ORIGINAL_ORDER else sort, descending, text)
+    pages = page_count(len(positions), page_size)
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages  # le filtre a réduit le nombre de pages
+    number = page_col.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+
+    rows = table.page(positions, number, page_size)
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    if len(positions):
+        first = (number - 1) * page_size + 1
+        st.caption(f"Lignes {first}–{first + len(rows) - 1} sur {len(positions)}"
+                   + (f" (filtrées parmi {len(table)})" if text else "") + f", page {number}/{pages}")
+    else:
+        st.caption(f"Aucune ligne ne correspond au filtre (parmi {len(table)})")
+    return rows
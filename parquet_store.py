@@ -0,0 +1,395 @@
+# parquet_store.py - Magasin d'événements Parquet partitionné par date
+"""
+Les événements reçus par l'API sont copiés dans un jeu de données Parquet :
+
+    analytics_parquet/date=2025-07-01/part-<horodatage>-<id>.parquet
+
+Le schéma est typé (horodatages UTC, entiers, flottants) et la partition est
+la date UTC de l'événement. Les dashboards lisent avec projection de colonnes
+et élagage des partitions : lire une semaine ne touche que les fichiers de
+cette semaine.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+DEFAULT_ROOT = os.getenv('ANALYTICS_PARQUET_PATH', 'analytics_parquet')
+
+TIMESTAMP = pa.timestamp('ms', tz='UTC')
+
+# Champs connus des trackers ; les autres sont conservés en JSON dans `extra`
+EVENT_FIELDS = [
+    ('type', pa.string()),
+    ('session_id', pa.string()),
+    ('timestamp', TIMESTAMP),
+    ('received_at', TIMESTAMP),
+    ('page', pa.string()),
+    ('file_clicked', pa.string()),
+    ('element_type', pa.string()),
+    ('element_id', pa.string()),
+    ('element_class', pa.string()),
+    ('element_text', pa.string()),
+    ('sequence_order', pa.int32()),
+    ('x_coordinate', pa.int32()),
+    ('y_coordinate', pa.int32()),
+    ('client_ip', pa.string()),
+    ('country', pa.string()),
+    ('city', pa.string()),
+    ('latitude', pa.float64()),
+    ('longitude', pa.float64()),
+    ('file_url', pa.string()),
+    ('file_name', pa.string()),
+    ('file_extension', pa.string()),
+    ('session_duration', pa.int64()),
+    ('duration_seconds', pa.float64()),
+    ('click_count', pa.int32()),
+    ('user_agent', pa.string()),
+    ('language', pa.string()),
+    ('referrer', pa.string()),
+    ('ip_source', pa.string()),
+    ('gps_latitude', pa.float64()),
+    ('gps_longitude', pa.float64()),
+    ('gps_accuracy', pa.float64()),
+    ('gps_source', pa.string()),
+    ('geo_country', pa.string()),
+    ('geo_city', pa.string()),
+    ('geo_source', pa.string()),
+    ('extra', pa.string()),
+]
+EVENT_SCHEMA = pa.schema(EVENT_FIELDS)
+KNOWN_FIELDS = frozenset(name for name, _ in EVENT_FIELDS)
+
+PARTITIONING = ds.partitioning(pa.schema([('date', pa.date32())]), flavor='hive')
+
+# Colonnes attendues par incremental_loader.build_frames
+SESSION_COLUMNS = ['session_id', 'timestamp', 'country', 'city', 'client_ip', 'latitude', 'longitude']
+CLICK_COLUMNS = ['session_id', 'timestamp', 'page', 'file_clicked', 'sequence_order']
+
+# Champs horodatés envoyés selon le type d'événement
+_EVENT_TIME_FIELDS = ('timestamp', 'start_time', 'end_time')
+
+
+def _convert(value, arrow_type):
+    """Valeur convertie pour le type Arrow ; None si elle n'y entre pas (texte, infini, hors bornes)"""
+    if value is None or value == '':
+        return None
+    try:
+        if pa.types.is_integer(arrow_type):
+            number = int(float(value))
+            limit = 1 << (arrow_type.bit_width - 1)
+            return number if -limit <= number < limit else None
+        if pa.types.is_floating(arrow_type):
+            return float(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def _utc(values):
+    return pd.to_datetime(pd.Series(values, dtype=object), utc=True, errors='coerce', format='ISO8601')
+
+
+def events_to_table(items):
+    """Table Arrow (schéma EVENT_SCHEMA + date) à partir de (event, remote_addr, received_at)
+
+    L'horodatage de l'événement est le premier champ valide de _EVENT_TIME_FIELDS,
+    sinon l'heure de réception (une heure naïve est l'heure locale du serveur).
+    """
+    events = [event for event, _, _ in items]
+    received = _utc([received_at.astimezone(timezone.utc) for _, _, received_at in items])
+    event_time = pd.Series(pd.NaT, index=received.index, dtype=received.dtype)
+    for field in _EVENT_TIME_FIELDS:
+        if not event_time.isna().any():
+            break
+        event_time = event_time.fillna(_utc([event.get(field) for event in events]))
+    event_time = event_time.fillna(received)
+
+    arrays = []
+    for name, arrow_type in EVENT_FIELDS:
+        if name == 'timestamp':
+            values = pa.array(event_time).cast(arrow_type, safe=False)
+        elif name == 'received_at':
+            values = pa.array(received).cast(arrow_type, safe=False)
+        elif name == 'extra':
+            values = pa.array([
+                json.dumps(extra, ensure_ascii=False, default=str) if extra else None
+                for extra in ({k: v for k, v in event.items() if k not in KNOWN_FIELDS} for event in events)
+            ], type=arrow_type)
+        elif name == 'client_ip':
+            values = pa.array([_convert(event.get('client_ip') or remote_addr, arrow_type)
+                               for event, remote_addr, _ in items], type=arrow_type)
+        else:
+            values = pa.array([_convert(event.get(name), arrow_type) for event in events], type=arrow_type)
+        arrays.append(values)
+    arrays.append(pa.array(event_time.dt.date, type=pa.date32()))
+    return pa.Table.from_arrays(arrays, schema=EVENT_SCHEMA.append(pa.field('date', pa.date32())))
+
+
+def _write_atomic(table, directory):
+    """Écrit un fichier de partition ; le nom temporaire commence par '.' (ignoré à la lecture)"""
+    os.makedirs(directory, exist_ok=True)
+    name = f'part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet'
+    tmp_path = os.path.join(directory, f'.{name}.tmp')
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, os.path.join(directory, name))
+    return os.path.join(directory, name)
+
+
+def partition_dir(root, day):
+    return os.path.join(root, f'date={day.isoformat()}')
+
+
+def write_partition(root, table, day):
+    """Écrit les lignes de `table` (avec colonne date) datées de `day` ; retourne le chemin"""
+    part = table.filter(pc.equal(table.column('date'), pa.scalar(day, pa.date32())))
+    return _write_atomic(part.drop_columns(['date']), partition_dir(root, day))
+
+
+def write_table(root, table):
+    """Écrit une table (avec colonne date) : un fichier par date présente ; retourne les chemins"""
+    return [write_partition(root, table, day) for day in sorted(table.column('date').unique().to_pylist())]
+
+
+class ParquetEventWriter:
+    """Tampon d'événements écrit dans le jeu de données par un thread de fond
+
+    Le tampon est vidé dès `max_rows` événements ou toutes les `max_delay`
+    secondes ; `append` ne fait que mettre en mémoire et ne bloque pas sur le disque.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, max_rows=5000, max_delay=60.0):
+        self.root = root
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.last_error = None
+        self.dropped = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name='parquet-writer', daemon=True)
+                self._thread.start()
+        return self
+
+    def append(self, items):
+        """Ajoute des éléments (event, remote_addr, received_at) au tampon"""
+        if not items:
+            return
+        self.start()
+        with self._lock:
+            self._buffer.extend(items)
+            full = len(self._buffer) >= self.max_rows
+        if full:
+            self._wakeup.set()
+
+    @property
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self):
+        """Écrit le tampon courant ; retourne les fichiers créés
+
+        Chaque partition est écrite atomiquement. Si l'une échoue, seuls ses
+        événements retournent en tête du tampon pour le prochain essai : les
+        partitions déjà écrites ne sont pas dupliquées. Un événement qui ne
+        peut pas être converti au schéma est écarté (compté dans `dropped`).
+        """
+        with self._flush_lock:
+            with self._lock:
+                items, self._buffer = self._buffer, []
+            if not items:
+                return []
+            try:
+                table = events_to_table(items)
+            except Exception:
+                # Un événement inconvertible ne doit pas bloquer tout le tampon
+                items = self._drop_unconvertible(items)
+                if not items:
+                    return []
+                table = events_to_table(items)
+            days = table.column('date').to_pylist()
+            paths, failed, error = [], set(), None
+            for day in sorted(set(days)):
+                try:
+                    paths.append(write_partition(self.root, table, day))
+                except Exception as e:
+                    failed.add(day)
+                    error = e
+            if failed:
+                self._requeue([item for item, day in zip(items, days) if day in failed], error)
+                raise error
+            return paths
+
+    def _drop_unconvertible(self, items):
+        """Éléments convertibles un par un ; les autres sont écartés et comptés dans `dropped`"""
+        kept = []
+        for item in items:
+            try:
+                events_to_table([item])
+            except Exception as e:
+                self.dropped += 1
+                self.last_error = e
+                print(f"⚠️ Événement écarté du magasin Parquet: {e}")
+            else:
+                kept.append(item)
+        return kept
+
+    def _requeue(self, items, error):
+        with self._lock:
+            self._buffer[:0] = items
+        self.last_error = error
+
+    def stop(self, timeout=5):
+        """Arrête le thread après avoir écrit le tampon"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.max_delay)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Écriture Parquet impossible: {e}")
+
+
+def open_dataset(root=DEFAULT_ROOT):
+    """Jeu de données Arrow (partition `date` typée)"""
+    return ds.dataset(root, format='parquet', partitioning=PARTITIONING,
+                      schema=EVENT_SCHEMA.append(pa.field('date', pa.date32())))
+
+
+def _date_filter(start=None, end=None, event_types=None):
+    expression = None
+    for condition in (
+        ds.field('date') >= start if start is not None else None,
+        ds.field('date') <= end if end is not None else None,
+        ds.field('type').isin(list(event_types)) if event_types else None,
+    ):
+        if condition is not None:
+            expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_events(root=DEFAULT_ROOT, start=None, end=None, columns=None, event_types=None):
+    """Événements entre les dates `start` et `end` (incluses) sous forme de DataFrame
+
+    Seules les partitions de la période sont ouvertes et seules les colonnes
+    demandées (plus `type`) sont lues.
+    """
+    if not os.path.isdir(root):
+        return pd.DataFrame(columns=columns or [name for name, _ in EVENT_FIELDS])
+    if columns is not None and 'type' not in columns:
+        columns = ['type'] + list(columns)
+    table = open_dataset(root).to_table(columns=columns, filter=_date_filter(start, end, event_types))
+    return table.to_pandas()
+
+
+def read_event_records(root=DEFAULT_ROOT, start=None, end=None, columns=None, event_types=None):
+    """Comme read_events, mais au format des exports JSON (analytics_data.json)
+
+    Horodatages en chaînes ISO UTC et colonnes entièrement vides retirées, pour
+    les traitements des dashboards écrits pour les tableaux JSON.
+    """
+    events = read_events(root, start, end, columns, event_types)
+    for name in events.columns:
+        if isinstance(events[name].dtype, pd.DatetimeTZDtype):
+            formatted = events[name].dt.strftime('%Y-%m-%dT%H:%M:%S.%f').str[:-3] + 'Z'
+            events[name] = formatted.where(events[name].notna(), None)
+    return events.drop(columns=['date'], errors='ignore').dropna(axis=1, how='all')
+
+
+def load_frames(root=DEFAULT_ROOT, start=None, end=None):
+    """(sessions_df, clicks_df) au format de incremental_loader.build_frames"""
+    events = read_event_records(root, start, end, columns=sorted(set(SESSION_COLUMNS) | set(CLICK_COLUMNS)),
+                                event_types=('session_start', 'click'))
+    if events.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    sessions = events[events['type'] == 'session_start'].reindex(columns=SESSION_COLUMNS)
+    clicks = events[events['type'] == 'click'].reindex(columns=CLICK_COLUMNS)
+    return sessions.reset_index(drop=True), clicks.reset_index(drop=True)
+
+
+# Périodes proposées par les dashboards (nombre de jours, None = tout l'historique)
+PERIOD_OPTIONS = {
+    "Tout l'historique": None,
+    "7 derniers jours": 7,
+    "30 derniers jours": 30,
+    "90 derniers jours": 90,
+}
+
+
+def last_days(days, today=None):
+    """(début, fin) des `days` derniers jours, aujourd'hui inclus (UTC)"""
+    today = today or datetime.now(timezone.utc).date()
+    return today - timedelta(days=days - 1), today
+
+
+def period_bounds(label):
+    """(début, fin) d'une entrée de PERIOD_OPTIONS ; (None, None) pour tout l'historique"""
+    days = PERIOD_OPTIONS.get(label)
+    return last_days(days) if days else (None, None)
+
+
+def compact_partition(root, day):
+    """Regroupe les fichiers d'une partition en un seul ; retourne le nombre de fichiers fusionnés"""
+    directory = partition_dir(root, day if isinstance(day, date) else date.fromisoformat(day))
+    files = sorted(name for name in os.listdir(directory) if name.endswith('.parquet'))
+    if len(files) < 2:
+        return 0
+    table = pa.concat_tables(pq.read_table(os.path.join(directory, name), schema=EVENT_SCHEMA)
+                             for name in files)
+    _write_atomic(table, directory)
+    for name in files:
+        os.remove(os.path.join(directory, name))
+    return len(files)
+
+
+def import_json_array(filename, root=DEFAULT_ROOT):
+    """Importe un export analytics_data.json existant ; retourne le nombre d'événements"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        events = json.load(f)
+    now = datetime.now(timezone.utc)
+    items = [(event, None, now) for event in events if isinstance(event, dict)]
+    if items:
+        write_table(root, events_to_table(items))
+    return len(items)
+
+
+if __name__ == '__main__':
+    import sys
+
+    if len(sys.argv) >= 3 and sys.argv[1] == 'import':
+        count = import_json_array(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else DEFAULT_ROOT)
+        print(f"📦 {count} événements importés dans {sys.argv[3] if len(sys.argv) > 3 else DEFAULT_ROOT}")
+    elif len(sys.argv) >= 2 and sys.argv[1] == 'compact':
+        root = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_ROOT
+        for name in sorted(os.listdir(root)):
+            if name.startswith('date='):
+                merged = compact_partition(root, name[len('date='):])
+                if merged:
+                    print(f"🗜️ {name}: {merged} fichiers fusionnés")
+    else:
+        print("Usage: python parquet_store.py import analytics_data.json [dossier]")
+        print("       python parquet_store.py compact [dossier]")
@@ -0,0 +1,115 @@
+# render_timing.py - Temps de rendu par étape des dashboards Streamlit (optionnel)
+"""
+Chronométrage des étapes d'un rerun (chargement, traitement, rendu de chaque
+onglet) affiché dans un panneau de la barre latérale, avec l'historique des
+derniers reruns de la session (p50/p95).
+
+Désactivé par défaut : DASHBOARD_TIMING=1 dans l'environnement, ou ?timing=1
+dans l'URL du dashboard. Désactivé, `stage()` retourne un contexte vide.
+
+    timer = RenderTimer()
+    with timer.stage("process_data"):
+        ...
+    timer.finish()   # en fin de main() : historique + panneau
+"""
+import os
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Nombre de reruns conservés par session Streamlit
+HISTORY_SIZE = 200
+HISTORY_KEY = '_render_timing_history'
+TOTAL = 'rerun complet'
+
+
+def timing_enabled():
+    """Instrumentation demandée par l'environnement ou par l'URL (?timing=1)"""
+    if os.getenv('DASHBOARD_TIMING', '0') == '1':
+        return True
+    try:
+        return st.query_params.get('timing') == '1'
+    except Exception:
+        return False
+
+
+class RenderTimer:
+    """Durées des étapes d'un rerun ; les étapes peuvent être imbriquées"""
+
+    def __init__(self, enabled=None, history=None, clock=time.perf_counter):
+        self.enabled = timing_enabled() if enabled is None else enabled
+        self.clock = clock
+        self.stages = []  # [nom, profondeur, durée en s], dans l'ordre d'ouverture
+        self._depth = 0
+        self._history = history
+        self._start = clock()
+
+    def stage(self, name):
+        """Contexte qui chronomètre le bloc sous le nom `name`"""
+        return self._timed(name) if self.enabled else nullcontext()
+
+    @contextmanager
+    def _timed(self, name):
+        entry = [name, self._depth, 0.0]
+        self.stages.append(entry)
+        self._depth += 1
+        start = self.clock()
+        try:
+            yield
+        finally:
+            entry[2] = self.clock() - start
+            self._depth -= 1
+
+    @property
+    def history(self):
+        """Reruns précédents de la session : {étape: durée en s} (TOTAL compris)"""
+        if self._history is None:
+            self._history = st.session_state.setdefault(HISTORY_KEY, deque(maxlen=HISTORY_SIZE))
+        return self._history
+
+    def record(self):
+        """Ajoute ce rerun à l'historique ; retourne sa durée totale (s)"""
+        total = self.clock() - self._start
+        durations = {TOTAL: total}
+        for name, _, seconds in self.stages:
+            durations[name] = durations.get(name, 0.0) + seconds
+        self.history.append(durations)
+        return total
+
+    def breakdown(self):
+        """Tableau des étapes du rerun courant avec leurs p50/p95 sur l'historique"""
+        history = list(self.history)
+        total = history[-1][TOTAL] if history else self.clock() - self._start
+        rows = [(TOTAL, 0, total)] + [(name, depth + 1, seconds) for name, depth, seconds in self.stages]
+        table = []
+        for name, depth, seconds in rows:
+            past = [run[name] for run in history if name in run]
+            table.append({
+                'Étape': '\u2003' * depth + name,  # retrait : étapes imbriquées
+                'ms': round(seconds * 1000, 1),
+                '% du rerun': round(100 * seconds / total, 1) if total else 0.0,
+                'p50 (ms)': round(float(np.percentile(past, 50)) * 1000, 1) if past else None,
+                'p95 (ms)': round(float(np.percentile(past, 95)) * 1000, 1) if past else None,
+            })
+        return pd.DataFrame(table)
+
+    def finish(self):
+        """Enregistre le rerun et affiche le panneau dans la barre latérale
+
+        Retourne la durée totale du rerun (s), ou None si l'instrumentation est désactivée.
+        """
+        if not self.enabled:
+            return None
+        total = self.record()
+        history = list(self.history)
+        with st.sidebar.expander("⏱️ Temps de rendu", expanded=True):
+            st.metric("Dernier rerun", f"{total * 1000:.0f} ms")
+            st.caption(f"p50/p95 sur les {len(history)} derniers reruns de la session")
+            st.dataframe(self.breakdown(), hide_index=True, use_container_width=True)
+            if len(history) > 1:
+                st.line_chart(pd.DataFrame({'rerun (ms)': [run[TOTAL] * 1000 for run in history]}), height=150)
+        return total
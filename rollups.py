@@ -0,0 +1,184 @@
+# rollups.py - Agrégats horaires et journaliers maintenus à l'ingestion
+"""
+Les tables rollup_* contiennent des compteurs par heure ('hour', bucket
+'YYYY-MM-DDTHH') et par jour ('day', bucket 'YYYY-MM-DD') :
+
+- rollup_clicks    : clics par page et extension de fichier
+- rollup_sessions  : sessions par pays et ville
+- rollup_downloads : téléchargements par fichier
+
+api_backend.py les met à jour dans la transaction des insertions brutes ;
+rebuild_rollups les recalcule depuis les tables brutes.
+
+Usage: python rollups.py [base.db]    (reconstruction complète)
+"""
+import sqlite3
+from collections import Counter
+
+from page_classifier import classify_page
+
+GRAINS = ('hour', 'day')
+
+# table -> (colonnes de la clé hors grain/bucket, colonne du compteur)
+ROLLUP_TABLES = {
+    'rollup_clicks': (('page', 'file_extension'), 'clicks'),
+    'rollup_sessions': (('country', 'city'), 'sessions'),
+    'rollup_downloads': (('file_name', 'file_extension'), 'downloads'),
+}
+
+CREATE_ROLLUP_TABLES = [
+    f'''CREATE TABLE IF NOT EXISTS {table} (
+            grain TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            {', '.join(f'{column} TEXT NOT NULL' for column in keys)},
+            {value} INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (grain, bucket, {', '.join(keys)})
+        ) WITHOUT ROWID'''
+    for table, (keys, value) in ROLLUP_TABLES.items()
+]
+
+_UPSERT_SQL = {
+    table: f'''
+        INSERT INTO {table} (grain, bucket, {', '.join(keys)}, {value})
+        VALUES (?, ?, {', '.join('?' for _ in keys)}, ?)
+        ON CONFLICT (grain, bucket, {', '.join(keys)})
+        DO UPDATE SET {value} = {value} + excluded.{value}
+    '''
+    for table, (keys, value) in ROLLUP_TABLES.items()
+}
+
+# Suppression d'un compteur retombé à zéro, par clé primaire
+_DELETE_EMPTY_SQL = {
+    table: f'''
+        DELETE FROM {table}
+        WHERE grain = ? AND bucket = ? AND {' AND '.join(f'{column} = ?' for column in keys)} AND {value} <= 0
+    '''
+    for table, (keys, value) in ROLLUP_TABLES.items()
+}
+
+SESSION_LOOKUP_CHUNK = 500
+
+
+def buckets(timestamp, day):
+    """(heure, jour) d'un événement
+
+    L'horodatage ISO envoyé par le tracker fait foi ; sans horodatage, la date
+    de réception est utilisée et l'heure est rangée à 00.
+    """
+    text = str(timestamp) if timestamp else ''
+    if len(text) >= 13 and text[4] == '-' and text[10] in 'T ':
+        return f'{text[:10]}T{text[11:13]}', text[:10]
+    day = str(day) if day else ''
+    return f'{day}T00', day
+
+
+def _text(value):
+    return '' if value is None else str(value)
+
+
+def _count(counts, timestamp, day, key, delta=1):
+    hour_bucket, day_bucket = buckets(timestamp, day)
+    counts[('hour', hour_bucket) + key] += delta
+    counts[('day', day_bucket) + key] += delta
+
+
+def click_counts(rows):
+    """Compteurs de clics ; rows : (timestamp, date, page)"""
+    counts = Counter()
+    for timestamp, day, page in rows:
+        page = _text(page)
+        _count(counts, timestamp, day, (page, classify_page(page)[1]))
+    return counts
+
+
+def session_counts(rows):
+    """Compteurs de sessions ; rows : (start_time, date, country, city)"""
+    counts = Counter()
+    for start_time, day, country, city in rows:
+        _count(counts, start_time, day, (_text(country), _text(city)))
+    return counts
+
+
+def download_counts(rows):
+    """Compteurs de téléchargements ; rows : (timestamp, date, file_name, file_extension)"""
+    counts = Counter()
+    for timestamp, day, file_name, file_extension in rows:
+        _count(counts, timestamp, day, (_text(file_name), _text(file_extension).lower()))
+    return counts
+
+
+def apply_counts(conn, table, counts):
+    """Ajoute des compteurs (éventuellement négatifs) à une table de rollup, sans commit"""
+    rows = [key + (delta,) for key, delta in counts.items() if delta]
+    if not rows:
+        return
+    conn.executemany(_UPSERT_SQL[table], rows)
+    # Seules les clés décrémentées peuvent être retombées à zéro
+    decremented = [key for key, delta in counts.items() if delta < 0]
+    if decremented:
+        conn.executemany(_DELETE_EMPTY_SQL[table], decremented)
+
+
+def add_clicks(conn, rows):
+    apply_counts(conn, 'rollup_clicks', click_counts(rows))
+
+
+def add_downloads(conn, rows):
+    apply_counts(conn, 'rollup_downloads', download_counts(rows))
+
+
+def add_sessions(conn, rows):
+    """Compte des session_start ; rows : (session_id, start_time, date, country, city)
+
+    À appeler AVANT l'INSERT OR REPLACE dans user_sessions : une session déjà
+    présente est retirée de son ancien bucket, comme le ferait une reconstruction.
+    """
+    session_ids = list({row[0] for row in rows})
+    current = {}
+    for start in range(0, len(session_ids), SESSION_LOOKUP_CHUNK):
+        chunk = session_ids[start:start + SESSION_LOOKUP_CHUNK]
+        current.update(
+            (row[0], row[1:]) for row in conn.execute(
+                'SELECT session_id, start_time, date, country, city FROM user_sessions '
+                f'WHERE session_id IN ({", ".join("?" for _ in chunk)})', chunk)
+        )
+
+    removed, added = [], []
+    for session_id, *values in rows:
+        if session_id in current:
+            removed.append(current[session_id])
+        added.append(values)
+        current[session_id] = values
+
+    counts = session_counts(added)
+    counts.subtract(session_counts(removed))
+    apply_counts(conn, 'rollup_sessions', counts)
+
+
+def rebuild_rollups(conn):
+    """Recalcule toutes les tables de rollup depuis les tables brutes, sans commit"""
+    for table in ROLLUP_TABLES:
+        conn.execute(f'DELETE FROM {table}')
+    apply_counts(conn, 'rollup_clicks', click_counts(
+        conn.execute('SELECT timestamp, date, page FROM detailed_clicks')))
+    apply_counts(conn, 'rollup_sessions', session_counts(
+        conn.execute('SELECT start_time, date, country, city FROM user_sessions')))
+    apply_counts(conn, 'rollup_downloads', download_counts(
+        conn.execute('SELECT timestamp, date, file_name, file_extension FROM file_downloads')))
+
+
+if __name__ == '__main__':
+    import sys
+    from config_setup import Config
+
+    database_path = sys.argv[1] if len(sys.argv) > 1 else Config.DATABASE_PATH
+    conn = sqlite3.connect(database_path)
+    try:
+        with conn:
+            rebuild_rollups(conn)
+        for table, (_, value) in ROLLUP_TABLES.items():
+            rows, total = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM({value}), 0) FROM {table} WHERE grain = 'day'").fetchone()
+            print(f"✅ {table}: {rows} lignes journalières, {total} {value}")
+    finally:
+        conn.close()
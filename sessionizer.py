@@ -0,0 +1,231 @@
+# sessionizer.py - Parcours des sessions (user_journeys) reconstitués à l'ingestion
+"""
+Le sessionizer reçoit les événements commités par api_backend.py et suit
+l'activité de chaque session ouverte. Une session est fermée à son
+`session_end` ou après Config.SESSION_TIMEOUT secondes sans événement ; sa
+ligne user_journeys (parcours, détail JSON, nombre de clics, durée) est
+alors réécrite à partir des clics en base, triés par sequence_order.
+
+Les événements en retard ou dans le désordre sont donc absorbés : un clic
+reçu après le session_end remet la session en file et sa ligne est réécrite
+au passage suivant, dans l'ordre du tracker et non dans l'ordre d'arrivée.
+
+Usage: python sessionizer.py [base.db]    (reconstruction complète)
+"""
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+JOURNEY_SEPARATOR = ' → '
+JOURNEY_CHUNK = 500
+
+UPSERT_JOURNEY_SQL = '''
+    INSERT INTO user_journeys
+    (session_id, journey_path, journey_data, total_clicks, session_duration, date)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (session_id) DO UPDATE SET
+        journey_path = excluded.journey_path,
+        journey_data = excluded.journey_data,
+        total_clicks = excluded.total_clicks,
+        session_duration = excluded.session_duration,
+        date = excluded.date
+'''
+
+# Une ligne par session : dédoublonnage puis index unique (remplace idx_journeys_session)
+CREATE_JOURNEY_INDEXES = [
+    'DELETE FROM user_journeys WHERE id NOT IN (SELECT MAX(id) FROM user_journeys GROUP BY session_id)',
+    'DROP INDEX IF EXISTS idx_journeys_session',
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_journeys_session_unique ON user_journeys (session_id)',
+    'CREATE INDEX IF NOT EXISTS idx_journeys_date ON user_journeys (date)',
+]
+
+
+def _parse_time(value):
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _seconds_between(start, end):
+    start, end = _parse_time(start), _parse_time(end)
+    try:
+        return max(0, int((end - start).total_seconds()))
+    except TypeError:  # valeur manquante ou mélange naïf/UTC
+        return 0
+
+
+def journey_row(session_id, steps, session=None):
+    """Ligne user_journeys d'une session
+
+    steps : clics (page, file_clicked, timestamp, sequence_order, date) déjà triés ;
+    session : (start_time, end_time, duration_seconds, date) de user_sessions, ou None.
+    """
+    start_time, end_time, duration, day = session or (None, None, None, None)
+    path = JOURNEY_SEPARATOR.join(str(page) for page, *_ in steps if page)
+    data = json.dumps([
+        {'page': page, 'file': file_clicked, 'timestamp': timestamp, 'sequence_order': sequence_order}
+        for page, file_clicked, timestamp, sequence_order, _ in steps
+    ], ensure_ascii=False)
+
+    # Durée : celle du session_end, sinon fin - début, sinon dernier clic - début
+    if not duration and start_time and end_time:
+        duration = _seconds_between(start_time, end_time)
+    if not duration and steps:
+        timestamps = [step[2] for step in steps if step[2]]
+        if timestamps:
+            duration = _seconds_between(start_time or min(timestamps), max(timestamps))
+    return (session_id, path, data, len(steps), int(duration or 0), day or (steps[0][4] if steps else None))
+
+
+def rebuild_journeys(conn, session_ids=None):
+    """Réécrit les lignes user_journeys des sessions données (toutes si None), sans commit
+
+    Retourne le nombre de parcours écrits.
+    """
+    if session_ids is None:
+        session_ids = [row[0] for row in conn.execute(
+            'SELECT session_id FROM user_sessions UNION SELECT session_id FROM detailed_clicks')]
+    session_ids = [session_id for session_id in dict.fromkeys(session_ids) if session_id is not None]
+
+    rows = []
+    for offset in range(0, len(session_ids), JOURNEY_CHUNK):
+        chunk = session_ids[offset:offset + JOURNEY_CHUNK]
+        placeholders = ', '.join('?' for _ in chunk)
+        sessions = {
+            row[0]: row[1:]
+            for row in conn.execute(
+                f'SELECT session_id, start_time, end_time, duration_seconds, date '
+                f'FROM user_sessions WHERE session_id IN ({placeholders})', chunk)
+        }
+        steps = defaultdict(list)
+        for row in conn.execute(
+                f'SELECT session_id, page, file_clicked, timestamp, sequence_order, date '
+                f'FROM detailed_clicks WHERE session_id IN ({placeholders}) '
+                f'ORDER BY session_id, sequence_order, timestamp, id', chunk):
+            steps[row[0]].append(row[1:])
+        rows.extend(journey_row(session_id, steps.get(session_id, []), sessions.get(session_id))
+                    for session_id in chunk)
+
+    conn.executemany(UPSERT_JOURNEY_SQL, rows)
+    return len(rows)
+
+
+class Sessionizer:
+    """Suit l'activité des sessions et écrit leur parcours à la fermeture
+
+    `feed` ne fait que mettre à jour l'état en mémoire ; les écritures sont
+    faites par `sweep`, appelé toutes les `sweep_interval` secondes par un
+    thread de fond (démarré au premier événement reçu). `connect()` doit retourner un gestionnaire de contexte
+    fournissant une connexion SQLite (ConnectionPool.connection).
+    """
+
+    def __init__(self, connect, timeout=1800, sweep_interval=5.0, clock=time.monotonic):
+        self.connect = connect
+        self.timeout = timeout
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._active = {}  # session_id -> dernière activité
+        self._due = set()  # sessions à écrire au prochain passage
+        self._finished = {}  # session_id -> fermeture par session_end (pour les retardataires)
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.written = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name='sessionizer', daemon=True)
+                self._thread.start()
+        return self
+
+    def feed(self, items):
+        """Prend en compte des événements (event, remote_addr, received_at) déjà commités"""
+        if not items:
+            return
+        self.start()
+        now = self.clock()
+        with self._lock:
+            for event, _, _ in items:
+                session_id = event.get('session_id')
+                if event.get('type') == 'session_end':
+                    self._active.pop(session_id, None)
+                    self._finished[session_id] = now
+                    self._due.add(session_id)
+                elif session_id in self._finished:
+                    # Événement en retard sur une session terminée : parcours à réécrire
+                    self._due.add(session_id)
+                else:
+                    self._active[session_id] = now
+
+    @property
+    def open_sessions(self):
+        with self._lock:
+            return len(self._active)
+
+    def sweep(self, close_all=False):
+        """Écrit le parcours des sessions terminées ou inactives ; retourne leur nombre
+
+        close_all écrit aussi les sessions encore ouvertes (arrêt du serveur),
+        sans les considérer comme terminées.
+        """
+        with self._sweep_lock:
+            now = self.clock()
+            with self._lock:
+                expired = [sid for sid, last in self._active.items() if now - last >= self.timeout]
+                for session_id in expired:
+                    del self._active[session_id]
+                due = self._due | set(expired)
+                if close_all:
+                    due |= set(self._active)
+                self._due = set()
+                self._finished = {sid: at for sid, at in self._finished.items() if now - at < self.timeout}
+            if not due:
+                return 0
+            try:
+                with self.connect() as conn:
+                    count = rebuild_journeys(conn, sorted(due))
+                    conn.commit()
+            except Exception:
+                # Les sessions seront écrites au prochain passage
+                with self._lock:
+                    self._due |= due
+                raise
+            self.written += count
+            return count
+
+    def stop(self, timeout=5):
+        """Arrête le thread et écrit le parcours de toutes les sessions suivies"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.sweep(close_all=True)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.sweep_interval)
+            self._wakeup.clear()
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️ Écriture des parcours impossible: {e}")
+
+
+if __name__ == '__main__':
+    from config_setup import Config
+
+    database_path = sys.argv[1] if len(sys.argv) > 1 else Config.DATABASE_PATH
+    conn = sqlite3.connect(database_path)
+    with conn:
+        count = rebuild_journeys(conn)
+    conn.close()
+    print(f"✅ {count} parcours reconstruits dans {database_path}")
@@ -0,0 +1,192 @@
+# shared_cache.py - Cache de processus « stale-while-revalidate » pour les données des dashboards
+"""
+Une valeur par clé, partagée par toutes les sessions Streamlit du processus.
+Une seule mise à jour à la fois par clé (single-flight) :
+
+- valeur fraîche : servie telle quelle ;
+- valeur périmée (âge >= soft_ttl, ou `version` différente de celle de la
+  valeur) : servie immédiatement, une mise à jour démarre en arrière-plan ;
+- valeur expirée (hard) ou absente : l'appel attend la mise à jour en cours,
+  ou la lance ; les appels simultanés attendent la même.
+
+Une mise à jour qui échoue laisse en place la dernière bonne valeur ; elle
+n'est retentée qu'après `retry_delay` secondes. Les valeurs sont partagées
+entre sessions : elles ne doivent pas être modifiées par les appelants.
+
+L'âge et la péremption (secondes depuis que la valeur servie est périmée,
+0 si elle est fraîche) sont retournés avec la valeur ; `describe()` les
+résume pour le panneau « Cache des données » de la barre latérale des
+dashboards (le cache vit dans le processus Streamlit, qui n'a pas
+d'endpoint /api/metrics).
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+
+SOFT_TTL = float(os.getenv('ANALYTICS_CACHE_SOFT_TTL', '60'))
+HARD_TTL = float(os.getenv('ANALYTICS_CACHE_HARD_TTL', '900'))
+RETRY_DELAY = float(os.getenv('ANALYTICS_CACHE_RETRY_DELAY', '10'))
+
+
+class Cached:
+    """Valeur servie avec son âge (s), sa péremption (s) et sa version"""
+    __slots__ = ('value', 'age', 'staleness', 'version')
+
+    def __init__(self, value, age, staleness, version):
+        self.value = value
+        self.age = age
+        self.staleness = staleness
+        self.version = version
+
+    @property
+    def stale(self):
+        return self.staleness > 0
+
+
+class _Entry:
+    __slots__ = ('value', 'version', 'loaded_at', 'stale_since', 'failed_at', 'error', 'flight')
+
+    def __init__(self):
+        self.value = None
+        self.version = None
+        self.loaded_at = None    # None : aucune valeur utilisable
+        self.stale_since = None  # changement de version observé
+        self.failed_at = None
+        self.error = None
+        self.flight = None       # Future de la mise à jour en cours
+
+
+class SharedCache:
+    """Cache stale-while-revalidate par clé avec mise à jour unique en arrière-plan
+
+    `hard_ttl` borne l'âge d'une valeur servie quand la fraîcheur est donnée
+    par `soft_ttl` ; si `soft_ttl` vaut None (fraîcheur donnée seulement par
+    `version`), il borne la durée pendant laquelle une valeur périmée est servie.
+    """
+
+    def __init__(self, soft_ttl=SOFT_TTL, hard_ttl=HARD_TTL, retry_delay=RETRY_DELAY, clock=time.monotonic):
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.retry_delay = retry_delay
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.failures = 0
+
+    def _staleness(self, entry, now):
+        stale_since = entry.stale_since
+        if self.soft_ttl is not None:
+            expiry = entry.loaded_at + self.soft_ttl
+            stale_since = expiry if stale_since is None else min(stale_since, expiry)
+        return 0.0 if stale_since is None else max(0.0, now - stale_since)
+
+    def _hard_expired(self, entry, now):
+        if self.hard_ttl is None:
+            return False
+        if self.soft_ttl is not None:
+            return now - entry.loaded_at >= self.hard_ttl
+        return self._staleness(entry, now) >= self.hard_ttl
+
+    def _served(self, entry, now):
+        return Cached(entry.value, now - entry.loaded_at, self._staleness(entry, now), entry.version)
+
+    def get(self, key, loader, version=None):
+        """Valeur de `key` (Cached) ; `loader()` calcule une nouvelle valeur
+
+        Lève l'erreur de la mise à jour si aucune valeur utilisable n'existe.
+        """
+        with self._lock:
+            now = self.clock()
+            entry = self._entries.setdefault(key, _Entry())
+            if version is not None and entry.loaded_at is not None and version != entry.version:
+                if entry.stale_since is None:
+                    entry.stale_since = now
+            retry_allowed = entry.failed_at is None or now - entry.failed_at >= self.retry_delay
+
+            if entry.loaded_at is not None and not self._hard_expired(entry, now):
+                served = self._served(entry, now)
+                if served.stale and entry.flight is None and retry_allowed:
+                    self._start(key, entry, loader, version)
+                return served
+
+            flight = entry.flight
+            if flight is None:
+                if not retry_allowed:
+                    raise entry.error
+                flight = self._start(key, entry, loader, version)
+
+        flight.result()  # lève l'erreur de la mise à jour
+        with self._lock:
+            return self._served(entry, self.clock())
+
+    def _start(self, key, entry, loader, version):
+        flight = Future()
+        entry.flight = flight
+        threading.Thread(target=self._refresh, args=(entry, loader, version, flight),
+                         name=f'cache-refresh-{key}', daemon=True).start()
+        return flight
+
+    def _refresh(self, entry, loader, version, flight):
+        try:
+            value = loader()
+        except Exception as error:
+            with self._lock:
+                entry.failed_at = self.clock()
+                entry.error = error
+                entry.flight = None
+                self.failures += 1
+            flight.set_exception(error)
+            return
+        with self._lock:
+            entry.value = value
+            entry.version = version
+            entry.loaded_at = self.clock()
+            entry.stale_since = None
+            entry.failed_at = None
+            entry.error = None
+            entry.flight = None
+            self.refreshes += 1
+        flight.set_result(value)
+
+    def invalidate(self, key):
+        """La prochaine lecture de `key` attend une valeur neuve"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.flight is None:
+                entry.loaded_at = None
+                entry.failed_at = None
+
+    def stats(self):
+        """{clé: (âge, péremption)} des valeurs utilisables"""
+        with self._lock:
+            now = self.clock()
+            return {key: (now - entry.loaded_at, self._staleness(entry, now))
+                    for key, entry in self._entries.items() if entry.loaded_at is not None}
+
+    def describe(self):
+        """Lignes lisibles : âge et péremption de chaque valeur, puis compteurs de mises à jour"""
+        lines = []
+        for key, (age, staleness) in sorted(self.stats().items()):
+            state = f"périmée depuis {staleness:.0f} s" if staleness else "à jour"
+            lines.append(f"{key} : chargée il y a {age:.0f} s, {state}")
+        lines.append(f"{self.refreshes} mise(s) à jour, {self.failures} échec(s)")
+        return lines
+
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_cache(name, **options):
+    """Cache partagé par processus pour un nom donné
+
+    Le script d'un dashboard est réexécuté à chaque rerun : le cache doit vivre
+    dans ce module importé, pas dans le script. `options` ne sert qu'à la création.
+    """
+    with _CACHES_LOCK:
+        if name not in _CACHES:
+            _CACHES[name] = SharedCache(**options)
+        return _CACHES[name]
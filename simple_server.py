@@ -6,6 +6,17 @@ from http.server import HTTPServer, SimpleHTTPRequestHandler
 import json
 import os
 from datetime import datetime
+from event_log import DEFAULT_DIRECTORY, EventLog, export_json_array, import_json_array
+
+LEGACY_FILENAME = 'local_analytics_data.json'
+_event_log = None
+
+def get_event_log():
+    """Journal local, créé au premier usage (et non à l'import du module)"""
+    global _event_log
+    if _event_log is None:
+        _event_log = EventLog(DEFAULT_DIRECTORY)
+    return _event_log
 
 class AnalyticsHandler(SimpleHTTPRequestHandler):
     def do_POST(self):
@@ -56,30 +67,25 @@ class AnalyticsHandler(SimpleHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
     
+    def do_GET(self):
+        if self.path == '/' + LEGACY_FILENAME:
+            # Export à la demande du tableau JSON historique
+            export_json_array(get_event_log(), LEGACY_FILENAME)
+        super().do_GET()
+    
     def save_analytics_data(self, data):
-        """Sauvegarde les données analytics dans un fichier local"""
-        filename = 'local_analytics_data.json'
-        
-        # Lire les données existantes
-        existing_data = []
-        if os.path.exists(filename):
-            try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    existing_data = json.load(f)
-            except:
-                existing_data = []
-        
-        # Ajouter les nouvelles données
-        existing_data.append(data)
-        
-        # Sauvegarder
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(existing_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"💾 Données sauvegardées dans {filename}")
+        """Ajoute l'événement à la fin du journal NDJSON local"""
+        event_log = get_event_log()
+        event_log.append(data)
+        print(f"💾 Données ajoutées au journal {event_log.directory}")
 
 def run_server(port=8000):
     """Démarre le serveur local"""
+    # Reprise unique de l'ancien fichier tableau JSON dans le journal
+    event_log = get_event_log()
+    if not event_log.segments() and os.path.exists(LEGACY_FILENAME):
+        imported = import_json_array(event_log, LEGACY_FILENAME)
+        print(f"📥 {imported} événements repris depuis {LEGACY_FILENAME}")
     server_address = ('', port)
     httpd = HTTPServer(server_address, AnalyticsHandler)
     print(f"🚀 Serveur démarré sur http://localhost:{port}")
@@ -90,6 +96,7 @@ def run_server(port=8000):
     except KeyboardInterrupt:
         print("\n🛑 Serveur arrêté")
         httpd.server_close()
+        event_log.close()
 
 if __name__ == '__main__':
     run_server() 
\ No newline at end of file
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Génération d'événements analytics synthétiques (même forme que analytics_data.json)
+
+Utilisé par les benchmarks et les tests de montée en charge.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+PAGES = (
+    ['/', '/index.html', '/cv.html', '/teaching.html']
+    + [f'/pdf/{name}' for name in (
+        'thesis.pdf', 'abstract_lusso.pdf', 'canum.pdf', 'td1.pdf', 'td2_algebre.pdf',
+        'poster_ihp.pdf', 'presentation_ljll.pdf', 'S4SM-exam-2012.pdf', 'efrei_2025.pdf')]
+    + [f'/drawing/{name}' for name in (
+        'BD_criterium.jpg', 'crazy_love_cp_clean.jpg', 'flying_to_the_moon.png',
+        'run_run.JPG', 'sparkling.jpg', 'wake_up.jpg', 'lenny_cp.jpg')]
+)
+
+LOCATIONS = [
+    ('FR', 'Paris', 48.8566, 2.3522),
+    ('FR', 'Houilles', 48.9226, 2.185),
+    ('FR', 'Beaune (IP)', 47.0241, 4.8389),
+    ('CH', 'Genève', 46.2044, 6.1432),
+    ('CA', 'Montréal', 45.5017, -73.5673),
+    ('US', 'Boston', 42.3601, -71.0589),
+    ('DE', 'Berlin', 52.52, 13.405),
+]
+
+
+def _iso(ts):
+    return ts.strftime('%Y-%m-%dT%H:%M:%S.') + f'{ts.microsecond // 1000:03d}Z'
+
+
+def generate_events(n_events, seed=42, start=None, days=30, clicks_per_session=4,
+                    end_only_ratio=0.05):
+    """Retourne environ `n_events` événements (session_start, click, session_end)
+
+    Une fraction `end_only_ratio` des sessions n'a qu'un session_end, comme les
+    visites sans clic observées en production.
+    """
+    rng = random.Random(seed)
+    start = start or datetime(2025, 7, 1, tzinfo=timezone.utc)
+    events = []
+    session_index = 0
+
+    while len(events) < n_events:
+        session_index += 1
+        session_id = f'session_{1750000000000 + session_index}_{rng.getrandbits(32):08x}'
+        country, city, lat, lon = rng.choice(LOCATIONS)
+        ip = f'{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}'
+        ts = start + timedelta(seconds=rng.randint(0, days * 86400))
+        geo = {'client_ip': ip, 'country': country, 'city': city, 'latitude': lat, 'longitude': lon}
+
+        end_only = rng.random() < end_only_ratio
+        if not end_only:
+            events.append({'type': 'session_start', 'session_id': session_id, 'timestamp': _iso(ts), **geo})
+            for order in range(1, max(1, int(rng.expovariate(1 / clicks_per_session))) + 1):
+                ts += timedelta(seconds=rng.randint(2, 120))
+                events.append({
+                    'type': 'click',
+                    'session_id': session_id,
+                    'element_type': rng.choice(('a', 'img')),
+                    'page': rng.choice(PAGES),
+                    'timestamp': _iso(ts),
+                    'sequence_order': order,
+                    'x_coordinate': rng.randint(0, 1920),
+                    'y_coordinate': rng.randint(0, 1080),
+                    **geo,
+                })
+
+        ts += timedelta(seconds=rng.randint(5, 600))
+        events.append({
+            'type': 'session_end',
+            'session_id': session_id,
+            'timestamp': _iso(ts),
+            'page': '/',
+            'session_duration': rng.randint(1000, 600000),
+            'click_count': 0,
+            **geo,
+        })
+
+    return events[:n_events]
+
+
+def generate_v6_events(n_events, seed=42):
+    """Événements au format V6 (champs gps_* et geo_* séparés), clics uniquement"""
+    rng = random.Random(seed)
+    events = []
+    for event in generate_events(n_events * 2, seed=seed):
+        if event['type'] != 'click':
+            continue
+        has_gps = rng.random() < 0.4
+        events.append({
+            'type': 'click',
+            'session_id': event['session_id'],
+            'page': event['page'].lstrip('/'),
+            'timestamp': event['timestamp'],
+            'client_ip': event['client_ip'],
+            'ip_source': 'ipify.org',
+            'gps_latitude': event['latitude'] + rng.uniform(-0.05, 0.05) if has_gps else 0,
+            'gps_longitude': event['longitude'] + rng.uniform(-0.05, 0.05) if has_gps else 0,
+            'gps_accuracy': rng.choice((5, 10, 15, 30, 100)) if has_gps else 0,
+            'gps_source': 'browser_gps' if has_gps else 'none',
+            'geo_country': event['country'],
+            'geo_city': event['city'],
+            'geo_source': 'ipapi.co',
+        })
+        if len(events) >= n_events:
+            break
+    return events
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests de l'API de tracking (api_backend.py) sur une base temporaire
+"""
+
+import queue
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+import api_backend
+from write_queue import GroupCommitWriter
+
+
+def query(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def test_single_events(client):
+    """Le contrat historique (un événement par requête) est conservé"""
+    http, db_path = client
+    assert http.post('/api/track', json={'type': 'session_start', 'session_id': 's1'}).json['status'] == 'success'
+    assert http.post('/api/track', json={'type': 'click', 'session_id': 's1', 'page': '/'}).status_code == 200
+    assert http.post('/api/track', json={'type': 'session_end', 'session_id': 's1', 'duration_seconds': 12}).status_code == 200
+    assert http.post('/api/track', json={'type': 'scroll', 'session_id': 's1'}).status_code == 400
+
+    assert query(db_path, 'SELECT total_clicks, duration_seconds FROM user_sessions') == [(1, 12)]
+
+
+def test_batch_committed(client):
+    """Un tableau d'événements est écrit en une transaction avec compteur agrégé"""
+    http, db_path = client
+    events = [{'type': 'session_start', 'session_id': 's1'}]
+    events += [{'type': 'click', 'session_id': 's1', 'page': f'pdf/td{i}.pdf', 'sequence_order': i} for i in range(5)]
+    events += [{'type': 'file_download', 'session_id': 's1', 'file_name': 'td1.pdf'}]
+    events += [{'type': 'click'}]
+
+    response = http.post('/api/track', json=events)
+    assert response.status_code == 200
+    assert response.json['committed'] == 7
+    assert response.json['rejected'] == [{'index': 7, 'error': "Type d'événement et session_id requis"}]
+
+    assert query(db_path, 'SELECT total_clicks FROM user_sessions WHERE session_id = ?', ('s1',)) == [(5,)]
+    assert query(db_path, 'SELECT COUNT(*) FROM detailed_clicks') == [(5,)]
+    assert query(db_path, 'SELECT COUNT(*) FROM file_downloads') == [(1,)]
+
+
+def test_batch_queued_ack(client):
+    """En mode queued, la réponse part dès la mise en file"""
+    http, db_path = client
+    response = http.post('/api/track?ack=queued', json=[{'type': 'click', 'session_id': 's2', 'page': '/'}])
+    assert response.status_code == 202
+    assert response.json['queued'] == 1
+
+    api_backend.WRITER.stop()
+    assert query(db_path, 'SELECT COUNT(*) FROM detailed_clicks') == [(1,)]
+
+
+def test_batch_all_rejected(client):
+    http, _ = client
+    response = http.post('/api/track', json=[{'type': 'unknown', 'session_id': 's'}])
+    assert response.status_code == 400
+
+
+def test_queue_bound_counts_events():
+    """max_queue borne les événements en attente, pas le nombre de lots"""
+    writer = GroupCommitWriter(None, api_backend.write_events, max_queue=3)
+    writer.start = lambda: writer  # aucun thread : la file ne se vide pas
+    writer.submit([{'type': 'click'}] * 2)
+    with pytest.raises(queue.Full):
+        writer.submit([{'type': 'click'}] * 2)
+    writer.submit([{'type': 'click'}])
+    assert (writer.pending, writer.pending_items) == (2, 3)
+
+
+def test_read_endpoints(client):
+    """Les endpoints GET servent les requêtes nommées de analytics_queries"""
+    http, _ = client
+    today = datetime.now().date().isoformat()
+    events = [{'type': 'session_start', 'session_id': 's1', 'country': 'France'},
+              {'type': 'click', 'session_id': 's1', 'page': 'pdf/td2.pdf', 'sequence_order': 2},
+              {'type': 'click', 'session_id': 's1', 'page': '/', 'sequence_order': 1},
+              {'type': 'click', 'session_id': 's2', 'page': '/', 'sequence_order': 1},
+              {'type': 'file_download', 'session_id': 's1', 'file_name': 'td2.pdf', 'file_extension': 'pdf'}]
+    assert http.post('/api/track', json=events).status_code == 200
+
+    assert [row['session_id'] for row in http.get('/api/sessions').json] == ['s1']
+    detail = http.get('/api/sessions/s1').json
+    assert [row['page'] for row in detail['clicks']] == ['/', 'pdf/td2.pdf']
+    assert [row['file_name'] for row in detail['downloads']] == ['td2.pdf']
+    assert http.get('/api/pages').json == [{'page': '/', 'clicks': 2}, {'page': 'pdf/td2.pdf', 'clicks': 1}]
+    assert len(http.get(f'/api/clicks?start={today}&end={today}').json) == 3
+    assert [row['session_id'] for row in http.get('/api/clicks?page=/').json] == ['s1', 's2']
+    assert http.get('/api/downloads').json == [{'date': today, 'downloads': 1}]
+    assert http.get('/api/clicks?start=2025-13-01').status_code == 400
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests du mode d'ingestion ASGI (asgi_ingest.py), servi par uvicorn sur une base temporaire
+"""
+
+import socket
+import sqlite3
+import threading
+import time
+
+import pytest
+import requests
+import uvicorn
+
+import asgi_ingest
+from config_setup import Config
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope='module')
+def server(tmp_path_factory, api_database):
+    db_path = str(tmp_path_factory.mktemp('asgi') / 'analytics.db')
+    with api_database(db_path):
+        port = free_port()
+        uvicorn_server = uvicorn.Server(uvicorn.Config(asgi_ingest.app, host='127.0.0.1', port=port,
+                                                       log_level='warning'))
+        thread = threading.Thread(target=uvicorn_server.run, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 10
+        while not uvicorn_server.started and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        yield f'http://127.0.0.1:{port}', db_path
+
+        uvicorn_server.should_exit = True
+        thread.join(10)
+
+
+def query(db_path, sql):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_health(server):
+    url, _ = server
+    body = requests.get(f'{url}/api/health', timeout=5).json()
+    assert body['status'] == 'healthy'
+    assert body['mode'] == 'asgi'
+
+
+def test_single_events_contract(server):
+    url, db_path = server
+    post = lambda event: requests.post(f'{url}/api/track', json=event, timeout=5)
+    response = post({'type': 'session_start', 'session_id': 'a1'})
+    assert response.status_code == 200
+    assert response.json()['status'] == 'success'
+    assert response.json()['message'] == 'Session démarrée'
+    assert post({'type': 'click', 'session_id': 'a1', 'page': '/'}).status_code == 200
+    assert post({'type': 'session_end', 'session_id': 'a1', 'duration_seconds': 12}).status_code == 200
+    assert post({'type': 'scroll', 'session_id': 'a1'}).status_code == 400
+    assert requests.post(f'{url}/api/track', data='pas du json', timeout=5).status_code == 400
+
+    assert query(db_path, "SELECT total_clicks, duration_seconds FROM user_sessions "
+                          "WHERE session_id = 'a1'") == [(1, 12)]
+
+
+def test_batch_and_queued_ack(server):
+    url, db_path = server
+    events = [{'type': 'click', 'session_id': 'b1', 'page': f'/p{i}'} for i in range(5)]
+    response = requests.post(f'{url}/api/track', json=events + [{'type': 'click'}], timeout=5)
+    assert response.status_code == 200
+    assert response.json()['committed'] == 5
+    assert response.json()['rejected'] == [{'index': 5, 'error': 'Type d\'événement et session_id requis'}]
+
+    response = requests.post(f'{url}/api/track?ack=queued', json=events, timeout=5)
+    assert response.status_code == 202
+    deadline = time.monotonic() + 5
+    while query(db_path, "SELECT COUNT(*) FROM detailed_clicks WHERE session_id = 'b1'")[0][0] < 10:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_concurrent_requests_are_grouped(server):
+    url, db_path = server
+
+    def send(i):
+        requests.post(f'{url}/api/track', json={'type': 'click', 'session_id': 'c1', 'page': f'/{i}'}, timeout=10)
+
+    threads = [threading.Thread(target=send, args=(i,)) for i in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert query(db_path, "SELECT COUNT(*) FROM detailed_clicks WHERE session_id = 'c1'") == [(40,)]
+
+
+def test_in_flight_limit(server, monkeypatch):
+    url, _ = server
+    monkeypatch.setattr(Config, 'ASGI_MAX_IN_FLIGHT', 0)
+    response = requests.post(f'{url}/api/track', json={'type': 'click', 'session_id': 'd1'}, timeout=5)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_write_queue_limit(server, monkeypatch):
+    """La file d'écriture est bornée en événements, même quand ?ack=queued répond avant l'écriture"""
+    url, db_path = server
+    monkeypatch.setattr(asgi_ingest.BATCHER, 'max_queue', 2)
+    events = [{'type': 'click', 'session_id': 'q1', 'page': f'/{i}'} for i in range(3)]
+    response = requests.post(f'{url}/api/track?ack=queued', json=events, timeout=5)
+    assert response.status_code == 503
+    assert requests.post(f'{url}/api/track?ack=queued', json=events[:2], timeout=5).status_code == 202
+
+    deadline = time.monotonic() + 5
+    while asgi_ingest.BATCHER.pending_items and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert asgi_ingest.BATCHER.pending_items == 0
+    assert query(db_path, "SELECT COUNT(*) FROM detailed_clicks WHERE session_id = 'q1'") == [(2,)]
+
+
+def test_metrics(server):
+    url, _ = server
+    requests.post(f'{url}/api/track', json={'type': 'click', 'session_id': 'e1', 'page': '/'}, timeout=5)
+    response = requests.get(f'{url}/api/metrics', timeout=5)
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert 'analytics_handler_duration_seconds_count{handler="asgi_track_event"}' in response.text
+    assert 'analytics_sqlite_commit_duration_seconds_count{path="asgi"}' in response.text
+    assert 'analytics_asgi_requests_in_flight 0' in response.text
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Tests de la suite de benchmarks des dashboards (benchmark_suite.py)
+"""
+
+import json
+
+from benchmark_suite import CASES, compare, run_suite, save
+
+
+def test_run_suite_all_cases(tmp_path):
+    document = run_suite([200])
+    assert [r['case'] for r in document['results']] == list(CASES)
+    for result in document['results']:
+        assert result['events'] == 200
+        assert result['seconds'] > 0 and result['peak_mb'] >= 0
+
+    # Document JSON relu à l'identique
+    path = tmp_path / 'results.json'
+    save(document, path)
+    assert json.loads(path.read_text(encoding='utf-8')) == document
+
+
+def test_compare_flags_regressions():
+    def document(*results):
+        return {'results': [{'case': case, 'events': 1000, 'seconds': seconds, 'peak_mb': peak}
+                            for case, seconds, peak in results]}
+
+    baseline = document(('lent', 1.0, 10.0), ('gourmand', 1.0, 10.0), ('stable', 1.0, 10.0),
+                        ('bruit', 0.001, 10.0))
+    current = document(('lent', 2.0, 10.0), ('gourmand', 1.0, 20.0), ('stable', 1.1, 9.0),
+                       ('bruit', 0.004, 10.0), ('nouveau', 1.0, 1.0))
+    rows = {case: row for case, *row in compare(current, baseline)}
+    assert set(rows) == {'lent', 'gourmand', 'stable', 'bruit'}
+    assert rows['lent'][1:] == [2.0, 1.0, True]
+    assert rows['gourmand'][-1] is True
+    assert rows['stable'][-1] is False
+    assert rows['bruit'][-1] is False  # temps trop courts pour être comparés
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests de non-régression (sorties de référence) des traitements des dashboards
+
+Les sorties attendues sont dans golden/*.json. Pour les régénérer après un
+changement de comportement volontaire :
+    python test_dashboard_processing.py --update-golden [fonction ...]
+"""
+
+import datetime
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dashboard_simple
+import dashboard_v6_simple
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+
+# Jeux d'entrée : données réelles du dépôt, cas limites, format V6
+INPUTS = {
+    'analytics_data': 'analytics_data.json',
+    'edge_cases': os.path.join('golden', 'edge_cases.json'),
+    'analytics_data_v6': 'analytics_data_v6.json',
+}
+
+
+def load_input(name):
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), INPUTS[name])
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def normalize_value(value):
+    """Valeur comparable et sérialisable, indépendante du dtype pandas"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return round(float(value), 9)
+    return str(value)
+
+
+def normalize_frame(df):
+    return {
+        'columns': [str(c) for c in df.columns],
+        'rows': [[normalize_value(v) for v in row] for row in df.itertuples(index=False, name=None)],
+    }
+
+
+def process_data_output(name):
+    sessions_df, clicks_df = dashboard_simple.process_data(load_input(name))
+    return {'sessions': normalize_frame(sessions_df), 'clicks': normalize_frame(clicks_df)}
+
+
+def analyze_user_journey_output(name):
+    sessions_df, clicks_df = dashboard_simple.process_data(load_input(name))
+    journey_df, top_paths = dashboard_simple.analyze_user_journey(clicks_df, sessions_df)
+    return {'journeys': normalize_frame(journey_df), 'top_paths': [list(p) for p in top_paths]}
+
+
+def process_data_v6_simple_output(name):
+    sessions_df, clicks_df = dashboard_v6_simple.process_data_v6_simple(load_input(name))
+    return {'sessions': normalize_frame(sessions_df), 'clicks': normalize_frame(clicks_df)}
+
+
+GOLDEN_FUNCTIONS = {
+    'process_data': process_data_output,
+    'analyze_user_journey': analyze_user_journey_output,
+    'process_data_v6_simple': process_data_v6_simple_output,
+}
+
+
+def read_golden(function_name):
+    with open(os.path.join(GOLDEN_DIR, f'{function_name}.json'), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def update_golden(function_names=None):
+    for function_name, compute in GOLDEN_FUNCTIONS.items():
+        if function_names and function_name not in function_names:
+            continue
+        outputs = {name: compute(name) for name in INPUTS}
+        with open(os.path.join(GOLDEN_DIR, f'{function_name}.json'), 'w', encoding='utf-8') as f:
+            json.dump(outputs, f, ensure_ascii=False, indent=1)
+        print(f"💾 golden/{function_name}.json régénéré")
+
+
+@pytest.mark.parametrize('name', sorted(INPUTS))
+def test_process_data_golden(name):
+    assert process_data_output(name) == read_golden('process_data')[name]
+
+
+@pytest.mark.parametrize('name', sorted(INPUTS))
+def test_analyze_user_journey_golden(name):
+    assert analyze_user_journey_output(name) == read_golden('analyze_user_journey')[name]
+
+
+@pytest.mark.parametrize('name', sorted(INPUTS))
+def test_process_data_v6_simple_golden(name):
+    assert process_data_v6_simple_output(name) == read_golden('process_data_v6_simple')[name]
+
+
+def test_process_data_empty():
+    sessions_df, clicks_df = dashboard_simple.process_data([])
+    assert sessions_df.empty and clicks_df.empty
+
+
+if __name__ == '__main__':
+    if '--update-golden' in sys.argv:
+        update_golden([arg for arg in sys.argv[1:] if not arg.startswith('--')])
+    else:
+        sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests du rafraîchissement piloté par les changements de dashboard_simple.py
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+import requests
+from streamlit.testing.v1 import AppTest
+
+import dashboard_simple
+import parquet_store
+from synthetic_data import generate_events
+
+
+class FakeResponse:
+    def __init__(self, headers, status_code=200):
+        self.headers = headers
+        self.status_code = status_code
+        self.ok = status_code < 400
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    monkeypatch.setattr(dashboard_simple, 'REFRESH_MODE', 'change')
+    dashboard_simple.web_signature.clear()
+    dashboard_simple.parquet_signature.clear()
+    yield
+    dashboard_simple.web_signature.clear()
+    dashboard_simple.parquet_signature.clear()
+
+
+def test_web_signature(monkeypatch):
+    responses = [FakeResponse({'ETag': '"v1"', 'Content-Length': '10'}), FakeResponse({}, status_code=405)]
+    monkeypatch.setattr(requests, 'head', lambda *args, **kwargs: responses.pop(0))
+
+    assert dashboard_simple.web_signature() == ('"v1"', None, '10')
+    assert dashboard_simple.web_signature() == ('"v1"', None, '10')  # cache partagé : une seule requête
+    dashboard_simple.web_signature.clear()
+    # HEAD refusé : repli sur l'intervalle courant
+    assert dashboard_simple.web_signature() == dashboard_simple._interval_bucket()
+
+
+def test_web_signature_unreachable(monkeypatch):
+    def unreachable(*args, **kwargs):
+        raise requests.ConnectionError('injoignable')
+    monkeypatch.setattr(requests, 'head', unreachable)
+    # Comme sans en-têtes de validation : la source est retentée à chaque intervalle
+    assert dashboard_simple.web_signature() == dashboard_simple._interval_bucket()
+
+
+def test_parquet_signature_follows_writes(tmp_path, monkeypatch):
+    root = str(tmp_path / 'store')
+    monkeypatch.setattr(dashboard_simple, 'PARQUET_PATH', root)
+    received = datetime.now(timezone.utc)
+
+    def write(seed):
+        events = generate_events(20, seed=seed)
+        parquet_store.write_table(root, parquet_store.events_to_table([(e, '10.0.0.1', received) for e in events]))
+
+    write(1)
+    before = dashboard_simple.source_signature()
+    assert before[0] >= 1
+    assert dashboard_simple.source_signature() == before
+    write(2)
+    dashboard_simple.parquet_signature.clear()  # expiration du TTL
+    assert dashboard_simple.source_signature() != before
+
+
+def test_interval_mode_changes_every_interval(monkeypatch):
+    monkeypatch.setattr(dashboard_simple, 'REFRESH_MODE', 'interval')
+    monkeypatch.setattr(dashboard_simple, 'REFRESH_INTERVAL', 5)
+    monkeypatch.setattr(dashboard_simple.time, 'time', lambda: 1000.0)
+    first = dashboard_simple.source_signature()
+    monkeypatch.setattr(dashboard_simple.time, 'time', lambda: 1005.0)
+    assert dashboard_simple.source_signature() == first + 1
+
+
+def test_dashboard_renders_offline(tmp_path, monkeypatch):
+    """Serveur web injoignable et pas de magasin Parquet : le dashboard s'affiche quand même"""
+    monkeypatch.setenv('ANALYTICS_DATA_URL', 'http://127.0.0.1:9/analytics_data.json')
+    monkeypatch.setenv('ANALYTICS_PARQUET_PATH', str(tmp_path / 'absent'))
+    at = AppTest.from_file('dashboard_simple.py', default_timeout=60)
+    at.run()
+    assert not at.exception
+    assert at.metric[0].value == '0'
+    assert any('mise(s) à jour' in caption.value for caption in at.sidebar.caption)
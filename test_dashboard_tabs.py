@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests des onglets paresseux de dashboard_simple.py (fragments et calculs mémorisés)
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import parquet_store
+from dashboard_simple import data_version, lazy_tabs
+from synthetic_data import generate_events
+
+TABS = ["🌍 Géolocalisation", "📊 Tracking par fichier", "🛤️ Parcours Utilisateurs"]
+
+
+def test_data_version():
+    events = generate_events(50)
+    assert data_version(events) == data_version(list(events))
+    assert data_version(events) != data_version(events + [{'type': 'click', 'session_id': 's'}])
+    assert data_version(events, '2025-07-01', None) != data_version(events)
+    assert data_version(pd.DataFrame(events)) == data_version(pd.DataFrame(events))
+    assert data_version([]) == data_version(pd.DataFrame())
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    root = str(tmp_path / 'store')
+    start = datetime.now(timezone.utc) - timedelta(days=2)
+    events = generate_events(400, start=start, days=2)
+    received = datetime.now(timezone.utc)
+    parquet_store.write_table(root, parquet_store.events_to_table([(e, '10.0.0.1', received) for e in events]))
+    monkeypatch.setenv('ANALYTICS_PARQUET_PATH', root)
+
+    at = AppTest.from_file('dashboard_simple.py', default_timeout=60)
+    at.run()
+    assert not at.exception
+    return at
+
+
+def memo(at):
+    return dict(at.session_state['_tab_memo'])
+
+
+def test_only_open_tab_is_computed(app):
+    # Premier affichage : seul l'onglet Géolocalisation est calculé et rendu
+    assert set(memo(app)) == {'frames', 'geolocation'}
+    assert [len(tab.dataframe) for tab in app.tabs] == [1, 0, 0]
+    first = memo(app)
+
+    app.session_state['onglet'] = TABS[2]
+    app.run()
+    assert not app.exception
+    assert [len(tab.dataframe) for tab in app.tabs] == [0, 0, 1]
+    assert set(memo(app)) == {'frames', 'geolocation', 'journeys'}
+    # Retour sur un onglet déjà vu : rien n'est recalculé
+    app.session_state['onglet'] = TABS[0]
+    app.run()
+    assert memo(app)['frames'] is first['frames']
+    assert memo(app)['geolocation'] is first['geolocation']
+
+
+def test_tab_refresh_recomputes_only_that_tab(app):
+    before = memo(app)
+    app.button(key='refresh_geolocation').click().run()
+    assert not app.exception
+    after = memo(app)
+    assert after['geolocation'] is not before['geolocation']
+    assert after['frames'] is before['frames']
+    assert len(app.tabs[0].dataframe) == 1
+
+
+def test_location_table_is_paginated(app):
+    table = app.tabs[0].dataframe[0].value
+    total = int(app.tabs[0].caption[0].value.split(' sur ')[1].split(',')[0])
+    assert total > 50 and len(table) == 50  # seule la première page est envoyée
+
+    app.number_input(key='sessions_page').set_value(2).run()
+    assert len(app.tabs[0].dataframe[0].value) == total - 50
+
+    app.text_input(key='sessions_filter').input(table['Session ID'].iloc[0]).run()
+    assert not app.exception
+    filtered = app.tabs[0].dataframe[0].value
+    assert filtered['Session ID'].tolist() == [table['Session ID'].iloc[0]]
+
+
+def test_lazy_tabs_without_open_state(monkeypatch):
+    """Streamlit sans suivi de l'onglet ouvert : onglets simples, tous calculés"""
+    monkeypatch.setattr(st, 'tabs', lambda labels: [object() for _ in labels])
+    tabs, opened = lazy_tabs(TABS, key='onglet')
+    assert len(tabs) == 3
+    assert opened == [True, True, True]
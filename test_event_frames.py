@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests des DataFrames compacts des dashboards (event_frames.py)
+"""
+
+import pandas as pd
+import pytest
+
+import dashboard_simple
+import dashboard_v6_simple
+from event_frames import compact_frame, compact_frames, memory_bytes
+from synthetic_data import generate_events, generate_v6_events
+from test_dashboard_processing import load_input, normalize_frame
+
+
+def test_compact_dtypes():
+    df = pd.DataFrame({
+        'session_id': ['s1', 's1', 's1', 's2'],
+        'city': ['Paris', 'Paris', None, 'Genève'],
+        'timestamp': ['2025-07-01T10:00:00.000Z', '2025-07-01T10:00:05.000Z', '', '2025-07-01T11:00:00Z'],
+        'element_text': ['a', 'b', 'c', 'd'],
+        'latitude': [48.8566, 48.8566, 0.0, 46.2044],
+        'x_coordinate': [10, 1919, 0, 5],
+        'y_coordinate': [10.0, None, 3.0, 4.0],
+        'sequence_order': [1, 2, 3, 1],
+        'mixed': ['a', 1, 'a', 'a'],
+    })
+    compact = compact_frame(df)
+    assert list(compact.columns) == list(df.columns)
+    assert isinstance(compact['session_id'].dtype, pd.CategoricalDtype)
+    assert isinstance(compact['city'].dtype, pd.CategoricalDtype)
+    assert compact['city'].isna().tolist() == [False, False, True, False]
+    assert str(compact['timestamp'].dt.tz) == 'UTC'
+    assert compact['timestamp'].isna().tolist() == [False, False, True, False]
+    assert compact['element_text'].tolist() == ['a', 'b', 'c', 'd']
+    assert compact['latitude'].dtype == 'float32'
+    assert compact['x_coordinate'].dtype == 'int16'
+    assert compact['y_coordinate'].dtype == 'Int16'
+    assert compact['sequence_order'].dtype == 'int8'
+    assert compact['mixed'].dtype == object
+
+
+def test_unparsable_timestamps_are_kept():
+    df = pd.DataFrame({'timestamp': ['2025-07-01T10:00:00Z', 'hier', 'hier']})
+    assert compact_frame(df)['timestamp'].tolist() == ['2025-07-01T10:00:00Z', 'hier', 'hier']
+
+
+def test_empty_frames():
+    empty = pd.DataFrame()
+    assert compact_frames(empty, None) == (empty, None)
+
+
+@pytest.mark.parametrize('name', ['analytics_data', 'edge_cases'])
+def test_journeys_unchanged_on_compact_frames(name):
+    sessions_df, clicks_df = dashboard_simple.process_data(load_input(name))
+    expected = dashboard_simple.analyze_user_journey(clicks_df, sessions_df)
+    journey_df, top_paths = dashboard_simple.analyze_user_journey(*reversed(compact_frames(sessions_df, clicks_df)))
+    assert normalize_frame(journey_df) == normalize_frame(expected[0])
+    assert top_paths == expected[1]
+
+
+def object_frames(frames):
+    """DataFrames avec des chaînes en objets Python (comme sous pandas < 3)"""
+    return [frame.astype({c: object for c in frame.columns if pd.api.types.is_string_dtype(frame[c].dtype)})
+            for frame in frames]
+
+
+def test_memory_reduction():
+    frames = object_frames(dashboard_simple.process_data(generate_events(20_000)))
+    before = sum(memory_bytes(frame) for frame in frames)
+    after = sum(memory_bytes(frame) for frame in compact_frames(*frames))
+    assert before / after >= 5
+
+    frames = object_frames(dashboard_v6_simple.process_data_v6_simple(generate_v6_events(20_000)))
+    before = sum(memory_bytes(frame) for frame in frames)
+    after = sum(memory_bytes(frame) for frame in compact_frames(*frames))
+    assert before / after >= 5
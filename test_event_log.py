@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests du journal NDJSON append-only (event_log.py)
+"""
+
+import json
+import time
+
+import event_log
+from event_log import EventLog, export_json_array, import_json_array
+
+
+def test_append_and_stream(tmp_path):
+    """Les événements ajoutés sont relus dans l'ordre, segment par segment"""
+    log = EventLog(str(tmp_path / 'log'), fsync_every=2)
+    for i in range(5):
+        log.append({'type': 'click', 'session_id': f's{i}', 'page': 'pdf/thèse.pdf'})
+    log.close()
+
+    events = list(log.iter_events())
+    assert [e['session_id'] for e in events] == ['s0', 's1', 's2', 's3', 's4']
+    assert events[0]['page'] == 'pdf/thèse.pdf'
+
+
+def test_rotation_by_size(tmp_path):
+    """Un nouveau segment est ouvert quand la taille maximale est atteinte"""
+    log = EventLog(str(tmp_path / 'log'), max_segment_bytes=100)
+    for i in range(10):
+        log.append({'type': 'click', 'session_id': f'session_{i}'})
+    log.close()
+
+    assert len(log.segments()) > 1
+    assert len(list(log.iter_events())) == 10
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    """Une écriture interrompue ne casse pas la lecture"""
+    log = EventLog(str(tmp_path / 'log'))
+    log.append({'type': 'session_start', 'session_id': 'a'})
+    log.close()
+    with open(log.segments()[-1], 'a', encoding='utf-8') as f:
+        f.write('{"type": "cli')
+
+    assert [e['session_id'] for e in log.iter_events()] == ['a']
+
+
+def test_reopen_after_truncated_write(tmp_path):
+    """La ligne tronquée est coupée à la réouverture : l'événement suivant reste lisible"""
+    log = EventLog(str(tmp_path / 'log'))
+    log.append({'type': 'session_start', 'session_id': 'a'})
+    log.close()
+    with open(log.segments()[-1], 'a', encoding='utf-8') as f:
+        f.write('{"type": "cli')
+
+    reopened = EventLog(str(tmp_path / 'log'))
+    reopened.append({'type': 'click', 'session_id': 'b'})
+    reopened.close()
+    assert [e['session_id'] for e in reopened.iter_events()] == ['a', 'b']
+
+
+def test_export_and_import_json_array(tmp_path):
+    """L'export produit le tableau JSON historique, relisible par l'import"""
+    log = EventLog(str(tmp_path / 'log'))
+    log.append({'type': 'session_start', 'session_id': 'a'})
+    log.append({'type': 'click', 'session_id': 'a', 'page': '/'})
+
+    export_path = tmp_path / 'local_analytics_data.json'
+    assert export_json_array(log, str(export_path)) == 2
+    with open(export_path, encoding='utf-8') as f:
+        assert json.load(f) == list(log.iter_events())
+
+    other = EventLog(str(tmp_path / 'other'))
+    assert import_json_array(other, str(export_path)) == 2
+    assert list(other.iter_events()) == list(log.iter_events())
+
+
+def test_export_empty_log(tmp_path):
+    log = EventLog(str(tmp_path / 'log'))
+    export_path = tmp_path / 'empty.json'
+    assert export_json_array(log, str(export_path)) == 0
+    with open(export_path, encoding='utf-8') as f:
+        assert json.load(f) == []
+
+
+def test_idle_events_are_fsynced(tmp_path, monkeypatch):
+    """Sans nouvel événement, le dernier ajout est quand même synchronisé après fsync_interval"""
+    synced = []
+    monkeypatch.setattr(event_log.os, 'fsync', lambda fd: synced.append(fd))
+    log = EventLog(str(tmp_path / 'log'), fsync_every=1000, fsync_interval=0.05)
+    log.append({'type': 'click', 'session_id': 's1'})
+    deadline = time.monotonic() + 5
+    while not synced and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert synced
+    assert log._pending == 0
+    log.close()
+    assert log._thread is None
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests du catalogue de fichiers (file_catalog.py)
+"""
+
+import os
+
+import pytest
+
+from file_catalog import FileCatalog, extract_links
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / "pdf").mkdir()
+    (tmp_path / "drawing").mkdir()
+    (tmp_path / "pdf" / "thesis.pdf").write_bytes(b"%PDF" + b"0" * 2044)
+    (tmp_path / "drawing" / "run_run.JPG").write_bytes(b"jpg")
+    (tmp_path / "drawing" / "notes.xyz").write_bytes(b"ignored")
+    (tmp_path / "index.html").write_text(
+        '<a href="pdf/thesis.pdf">Thèse</a><img src="/drawing/pastel.png">', encoding="utf-8")
+    (tmp_path / "other.html").write_text('<a href="pdf/hidden.pdf">', encoding="utf-8")
+    return tmp_path
+
+
+def make_catalog(site):
+    return FileCatalog(base_dir=str(site), catalog_path=str(site / "catalog.json"))
+
+
+def test_extract_links():
+    html = '<a href="/pdf/a.pdf">a</a> <img SRC="drawing/b.JPG"> <a href="https://site.ch/pdf/a.pdf">'
+    assert extract_links(html) == ["a.pdf", "b.JPG"]
+
+
+def test_catalog_contents(site):
+    catalog = make_catalog(site)
+    catalog.refresh()
+    frame = catalog.frame()
+
+    assert sorted(frame.index) == ["pastel.png", "run_run.JPG", "thesis.pdf"]
+    thesis = frame.loc["thesis.pdf"]
+    assert thesis["type"] == "PDF"
+    assert thesis["size"] == 2048
+    assert thesis["source"] == "pdf"
+    assert bool(thesis["referenced"])
+    assert frame.loc["run_run.JPG", "type"] == "Image"
+    assert frame.loc["pastel.png", "source"] == "html"
+    assert frame["size"].isna().sum() == 1
+
+
+def test_refresh_is_incremental(site):
+    assert make_catalog(site).refresh() == {"scanned": 3, "reused": 0, "removed": 0}
+
+    # Catalogue relu depuis le disque : rien n'a changé
+    assert make_catalog(site).refresh() == {"scanned": 0, "reused": 3, "removed": 0}
+
+    thesis = site / "pdf" / "thesis.pdf"
+    thesis.write_bytes(b"%PDF-v2")
+    os.utime(thesis, ns=(1, 1))
+    (site / "drawing" / "run_run.JPG").unlink()
+    catalog = make_catalog(site)
+    assert catalog.refresh() == {"scanned": 1, "reused": 1, "removed": 1}
+    assert catalog.frame().loc["thesis.pdf", "size"] == 7
+
+
+def test_missing_directory_keeps_entries(site):
+    make_catalog(site).refresh()
+    for name in os.listdir(site / "drawing"):
+        (site / "drawing" / name).unlink()
+    (site / "drawing").rmdir()
+
+    catalog = make_catalog(site)
+    catalog.refresh()
+    assert "run_run.JPG" in catalog.frame().index
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tests de la géolocalisation hors ligne (geo_enrichment.py)
+"""
+
+import sqlite3
+
+import pytest
+
+import api_backend
+import geo_enrichment
+from config_setup import Config
+from geo_enrichment import GeoDatabase, GeoLocation, LRUTTLCache, backfill_sessions, enrich_event, global_key
+
+RANGES = """start,end,country,city,latitude,longitude
+1.0.0.0,1.0.0.255,Australia,Sydney,-33.86,151.2
+8.8.8.0,8.8.8.255,United States,Mountain View,37.4,-122.08
+85.0.0.0,85.3.255.255,Suisse,Genève,46.2,6.14
+1431830528,1431834623,Suisse,Lausanne,,
+2001:4860::,2001:4860:ffff:ffff:ffff:ffff:ffff:ffff,United States,Mountain View,37.4,-122.08
+"""
+
+GENEVE = GeoLocation('Suisse', 'Genève', 46.2, 6.14)
+MOUNTAIN_VIEW = GeoLocation('United States', 'Mountain View', 37.4, -122.08)
+
+
+@pytest.fixture
+def ranges_path(tmp_path):
+    path = tmp_path / 'ip_ranges.csv'
+    path.write_text(RANGES, encoding='utf-8')
+    return str(path)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_global_key():
+    assert global_key('8.8.8.8') == (4, 0x08080808)
+    assert global_key('::ffff:8.8.8.8') == (4, 0x08080808)
+    assert global_key('2001:4860::8888') == (6, 0x2001486000000000)
+    for ip in ('127.0.0.1', '10.1.2.3', '172.20.0.1', '192.168.1.1', '169.254.1.1', '::1', 'fe80::1',
+               'localhost', 'unknown', '', None, '8.8.8'):
+        assert global_key(ip) is None
+
+
+def test_lookup(ranges_path):
+    database = GeoDatabase.load(ranges_path)
+    assert database.lookup('85.1.2.3') == GENEVE
+    assert database.lookup('85.88.0.1') == GeoLocation('Suisse', 'Lausanne', None, None)
+    assert database.lookup('2001:4860:4860::8888') == MOUNTAIN_VIEW
+    assert database.lookup('1.0.1.0') is None
+    assert database.lookup('192.168.1.1') is None
+    assert database.lookup_many(['8.8.8.8', '127.0.0.1', 'xx', '85.0.0.0', '9.9.9.9']) == [
+        MOUNTAIN_VIEW, None, None, GENEVE, None]
+
+
+def test_modified_csv_is_recompiled(ranges_path):
+    GeoDatabase.load(ranges_path)
+    with open(ranges_path, 'w', encoding='utf-8') as f:
+        f.write('start,end,country,city\n8.8.8.0,8.8.8.255,USA,\n')
+    database = GeoDatabase.load(ranges_path)
+    assert database.lookup('8.8.8.8') == GeoLocation('USA', None, None, None)
+    assert database.lookup('85.1.2.3') is None
+
+
+def test_compiled_table_matches_csv(ranges_path, monkeypatch):
+    GeoDatabase.load(ranges_path)
+    monkeypatch.setattr(GeoDatabase, 'from_csv', classmethod(lambda cls, path, **options: pytest.fail()))
+    database = GeoDatabase.load(ranges_path)
+    assert database.lookup('85.1.2.3') == GENEVE
+    assert database.lookup('85.88.0.1') == GeoLocation('Suisse', 'Lausanne', None, None)
+    assert database.lookup('2001:4860::1') == MOUNTAIN_VIEW
+
+
+def test_cache_lru_and_ttl():
+    clock = FakeClock()
+    cache = LRUTTLCache(maxsize=2, clock=clock)
+    cache.put('a', 1, ttl=10)
+    cache.put('b', None, ttl=10)
+    assert cache.get('a') == 1
+    cache.put('c', 3, ttl=10)  # 'b' est le moins récemment utilisé
+    assert cache.get('b') is geo_enrichment._MISSING
+    assert cache.get('a') == 1
+    clock.now = 11
+    assert cache.get('a') is geo_enrichment._MISSING
+
+
+def test_negative_cache(ranges_path):
+    clock = FakeClock()
+    database = GeoDatabase.load(ranges_path, ttl=100, negative_ttl=10, clock=clock)
+    assert database.lookup('9.9.9.9') is None
+    assert database.lookup('10.0.0.1') is None
+    assert database.cache.misses == 2
+    assert database.lookup('9.9.9.9') is None
+    assert database.lookup('10.0.0.1') is None
+    assert database.cache.hits == 2
+
+    clock.now = 50  # IP inconnue : durée de vie courte ; IP privée : durée normale
+    database.lookup('9.9.9.9')
+    database.lookup('10.0.0.1')
+    assert (database.cache.hits, database.cache.misses) == (3, 3)
+
+
+def test_enrich_event_keeps_tracker_values(ranges_path):
+    database = GeoDatabase.load(ranges_path)
+    event = enrich_event({'type': 'session_start', 'country': 'France'}, '85.1.2.3', database)
+    assert event == {'type': 'session_start', 'country': 'France', 'city': 'Genève',
+                     'latitude': 46.2, 'longitude': 6.14}
+    assert enrich_event({'type': 'session_start'}, '127.0.0.1', database) == {'type': 'session_start'}
+    # Coordonnées à 0.0 (golfe de Guinée) : valeurs valides, non écrasées
+    event = enrich_event({'country': '', 'city': None, 'latitude': 0.0, 'longitude': 0.0}, '85.1.2.3', database)
+    assert event == {'country': 'Suisse', 'city': 'Genève', 'latitude': 0.0, 'longitude': 0.0}
+    complete = {'country': 'Ghana', 'city': 'Accra', 'latitude': 0.0, 'longitude': 0.0}
+    assert enrich_event(dict(complete), '85.1.2.3', database) == complete
+
+
+def test_session_start_is_enriched(ranges_path, client, monkeypatch):
+    http, db_path = client
+    monkeypatch.setattr(Config, 'GEOIP_DATABASE_PATH', ranges_path)
+    monkeypatch.setattr(Config, 'GEOLOCATION_ENABLED', True)
+    monkeypatch.setattr(geo_enrichment, '_DATABASE', {})
+    http.post('/api/track', json={'type': 'session_start', 'session_id': 's1'},
+              environ_base={'REMOTE_ADDR': '8.8.4.4'})
+    http.post('/api/track', json=[{'type': 'session_start', 'session_id': 's2', 'city': 'Zurich'}],
+              environ_base={'REMOTE_ADDR': '85.2.0.1'})
+    http.post('/api/track', json={'type': 'session_start', 'session_id': 's3'})
+    api_backend.WRITER.stop()
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute('SELECT session_id, country, city, latitude FROM user_sessions ORDER BY session_id').fetchall()
+    conn.close()
+    assert rows == [('s1', None, None, None), ('s2', 'Suisse', 'Zurich', 46.2), ('s3', None, None, None)]
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE user_sessions SET user_ip = '8.8.8.8' WHERE session_id = 's1'")
+    conn.close()
+    assert backfill_sessions(db_path, GeoDatabase.load(ranges_path)) == 1
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT country, city FROM user_sessions WHERE session_id = 's1'").fetchall() == [
+        ('United States', 'Mountain View')]
+    conn.close()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests du regroupement en grille des positions GPS (gps_grid.py, carte de dashboard_v6_simple.py)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard_v6_simple import create_simple_gps_chart
+from gps_grid import bin_points, marker_sizes
+
+
+def sessions(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'session_id': [f's{i}' for i in range(n)],
+        'gps_latitude': rng.normal(48.85, 0.5, n),
+        'gps_longitude': rng.normal(2.35, 0.5, n),
+        'gps_accuracy': rng.integers(5, 100, n).astype(float),
+        'gps_source': rng.choice(['browser_gps', 'none'], n, p=[0.8, 0.2]),
+    })
+
+
+def test_bin_points():
+    lat = [48.81, 48.89, 45.76, 0.5, 90.0]
+    lon = [2.31, 2.39, 4.83, 179.9, 180.0]
+    binned = bin_points(lat, lon, cell=1.0, values=[10, np.nan, 30, 5, 7]).sort_values('count')
+    assert binned['count'].sum() == 5
+    paris = binned.iloc[-1]
+    assert (paris['count'], paris['latitude'], paris['longitude']) == (2, pytest.approx(48.85), pytest.approx(2.35))
+    assert paris['mean'] == 10  # NaN ignoré
+    sizes = marker_sizes([1, 4])
+    assert sizes[1] == 30 and sizes[0] < sizes[1]
+
+
+def test_chart_switches_to_grid_above_threshold():
+    few = create_simple_gps_chart(sessions(100), max_points=500)
+    assert few.data[0].name == 'Positions GPS'
+    assert len(few.data[0].lat) == len(few.data[0].customdata) == (sessions(100)['gps_source'] != 'none').sum()
+
+    many = sessions(20000)
+    grid = create_simple_gps_chart(many, zoom='France', max_points=500)
+    trace = grid.data[0]
+    assert trace.name == 'Positions GPS (regroupées)'
+    assert int(np.asarray(trace.customdata)[:, 0].sum()) == (many['gps_source'] != 'none').sum()
+    assert len(trace.lat) < 2000
+    assert len(grid.to_json()) < len(create_simple_gps_chart(many, max_points=10**9).to_json()) / 10
+
+
+def test_chart_keeps_only_visible_points():
+    df = sessions(50)
+    df.loc[0, ['gps_latitude', 'gps_longitude', 'gps_source']] = [40.71, -74.0, 'browser_gps']  # New York
+    df.loc[1, ['gps_latitude', 'gps_longitude', 'gps_source']] = [0, 0, 'browser_gps']
+    world = create_simple_gps_chart(df, zoom='Monde')
+    france = create_simple_gps_chart(df, zoom='France')
+    assert len(world.data[0].lat) == len(france.data[0].lat) + 1
+    assert create_simple_gps_chart(df.assign(gps_source='none')) is None
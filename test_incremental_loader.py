@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests du chargeur incrémental contre un serveur HTTP local qui imite Nexgate
+"""
+
+import hashlib
+import json
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import incremental_loader
+from incremental_loader import IncrementalLoader, load_with_fallback, parse_tail
+
+
+def pretty(entries):
+    """Même mise en forme que le json_encode(JSON_PRETTY_PRINT) de l'API PHP"""
+    return json.dumps(entries, indent=4).encode('utf-8')
+
+
+class StandIn:
+    """Serveur local : sert `body` avec un ETag et répond 304 si rien n'a changé"""
+
+    def __init__(self):
+        self.body = pretty([])
+        self.statuses = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                etag = '"%s"' % hashlib.md5(stand_in.body).hexdigest()
+                if self.headers.get('If-None-Match') == etag:
+                    stand_in.statuses.append(304)
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                stand_in.statuses.append(200)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', str(len(stand_in.body)))
+                self.end_headers()
+                self.wfile.write(stand_in.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/analytics_data.json'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stand_in():
+    server = StandIn()
+    yield server
+    server.close()
+
+
+def events(start, count):
+    result = []
+    for i in range(start, start + count):
+        result.append({'type': 'session_start', 'session_id': f's{i}', 'country': 'FR', 'city': 'Paris'})
+        result.append({'type': 'click', 'session_id': f's{i}', 'page': '/pdf/td1.pdf', 'sequence_order': 1})
+    return result
+
+
+def test_conditional_get_and_tail_parsing(stand_in, tmp_path):
+    stand_in.body = pretty(events(0, 3))
+    loader = IncrementalLoader(stand_in.url, cache_dir=str(tmp_path))
+
+    sessions, clicks = loader.load()
+    assert len(sessions) == 3 and len(clicks) == 3
+
+    # Rien n'a changé : 304 et mêmes DataFrames
+    assert loader.load()[0] is sessions
+    assert stand_in.statuses == [200, 304]
+
+    # Le fichier s'allonge : seule la fin est parsée
+    stand_in.body = pretty(events(0, 5))
+    sessions, clicks = loader.load()
+    assert loader.last_status == 'tail'
+    assert list(sessions['session_id']) == [f's{i}' for i in range(5)]
+    assert len(clicks) == 5
+
+
+def test_rewritten_file_triggers_full_reload(stand_in, tmp_path):
+    stand_in.body = pretty(events(0, 3))
+    loader = IncrementalLoader(stand_in.url, cache_dir=str(tmp_path))
+    loader.load()
+
+    stand_in.body = pretty(events(10, 2))
+    sessions, _ = loader.load()
+    assert loader.last_status == 200
+    assert list(sessions['session_id']) == ['s10', 's11']
+
+
+def test_disk_cache_survives_restart(stand_in, tmp_path):
+    stand_in.body = pretty(events(0, 2))
+    IncrementalLoader(stand_in.url, cache_dir=str(tmp_path)).load()
+
+    fresh = IncrementalLoader(stand_in.url, cache_dir=str(tmp_path))
+    sessions, _ = fresh.load()
+    assert fresh.last_status == 304
+    assert len(sessions) == 2
+
+
+def test_fallback_to_mirror(stand_in, tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental_loader, '_LOADERS', {})
+    stand_in.body = pretty(events(0, 1))
+    sessions, clicks, source, err = load_with_fallback([
+        ('http://127.0.0.1:9/analytics_data.json', 'nexgate'),
+        (stand_in.url, 'github_mirror'),
+    ], cache_dir=str(tmp_path), timeout=2)
+    assert source == 'github_mirror' and err is None
+    assert len(sessions) == 1 and len(clicks) == 1
+
+    _, _, source, err = load_with_fallback(
+        [('http://127.0.0.1:9/analytics_data.json', 'nexgate')], cache_dir=str(tmp_path), timeout=2)
+    assert source == 'none' and err is not None
+
+
+def test_parse_tail_rejects_rewrites():
+    old = pretty(events(0, 2))
+    assert parse_tail(old, pretty(events(0, 3))) == events(2, 1)
+    assert parse_tail(old, pretty(events(1, 3))) is None
+    assert parse_tail(pretty([]), pretty(events(0, 1))) is None
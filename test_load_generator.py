@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests du générateur de charge (load_generator.py) contre un petit serveur HTTP local
+"""
+
+import json
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from load_generator import build_sessions, percentile, print_report, run_step
+
+
+class TrackHandler(BaseHTTPRequestHandler):
+    """Enregistre les événements reçus ; répond 500 aux session_end"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        event = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with self.server.lock:
+            self.server.received[event['session_id']].append(event['type'])
+        status = 500 if event['type'] == 'session_end' else 200
+        body = json.dumps({'success': status == 200}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), TrackHandler)
+    httpd.lock = threading.Lock()
+    httpd.received = defaultdict(list)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd, f'http://127.0.0.1:{httpd.server_address[1]}/api/track'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_percentile():
+    assert percentile([], 0.99) == 0.0
+    assert percentile([3, 1, 2], 0.5) == 2
+    assert percentile(list(range(100)), 0.99) == 99
+
+
+def test_build_sessions():
+    sessions = build_sessions(500, think_scale=0.01, max_think=2.0)
+    assert sum(len(script) for script in sessions) >= 500
+    for script in sessions:
+        assert script[0][0] == 0.0
+        assert all(0 <= think <= 2.0 for think, _ in script)
+        assert len({event['session_id'] for _, event in script}) == 1
+    assert any(script[0][1]['type'] == 'session_start' and script[-1][1]['type'] == 'session_end'
+               for script in sessions)
+
+
+def test_run_step_replays_sessions(server, capsys):
+    httpd, url = server
+    sessions = build_sessions(200, think_scale=0.0)
+    step = run_step(url, rate=50, duration=0.5, sessions=sessions, concurrency=4)
+
+    assert step['sessions'] > 0 and step['dropped_sessions'] == 0
+    # Une session rejouée par identifiant, événements dans l'ordre du scénario
+    assert len(httpd.received) == step['sessions']
+    for session_id, types in httpd.received.items():
+        number = int(session_id.rsplit('_', 1)[1])
+        assert types == [event['type'] for _, event in sessions[number % len(sessions)]]
+
+    ends = sum(types.count('session_end') for types in httpd.received.values())
+    assert step['requests'] == sum(len(types) for types in httpd.received.values())
+    assert step['errors'] == {'500': ends}
+    assert step['error_rate'] == pytest.approx(ends / step['requests'])
+    assert step['by_type']['session_end']['requests'] == ends
+    assert 0 < step['p50_ms'] <= step['p95_ms'] <= step['p99_ms']
+
+    print_report(url, [step])
+    assert 'Saturation à partir de 50 sessions/s' in capsys.readouterr().out
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests des métriques Prometheus (metrics.py) et de /api/metrics (api_backend.py)
+"""
+
+import re
+
+import pytest
+
+import api_backend
+from metrics import Registry
+
+
+def sample(text, line_start):
+    """Valeur de la première ligne d'exposition qui commence par `line_start`"""
+    for line in text.splitlines():
+        if line.startswith(line_start + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+def test_render_format():
+    registry = Registry()
+    hits = registry.counter('demo_hits_total', 'Visites', ('page',))
+    latency = registry.histogram('demo_seconds', 'Durée', ('handler',), buckets=(0.1, 1.0))
+    registry.gauge('demo_open', 'Ouvertes', lambda: {('a"b',): 2}, ('name',))
+
+    hits.inc('/')
+    hits.inc('/', amount=2)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, 'h')
+    with pytest.raises(ValueError):
+        registry.counter('demo_hits_total', 'Doublon')
+
+    text = registry.render()
+    assert '# TYPE demo_hits_total counter\ndemo_hits_total{page="/"} 3\n' in text
+    # Intervalles cumulatifs, bornes incluses
+    assert 'demo_seconds_bucket{handler="h",le="0.1"} 2\n' in text
+    assert 'demo_seconds_bucket{handler="h",le="1.0"} 3\n' in text
+    assert 'demo_seconds_bucket{handler="h",le="+Inf"} 4\n' in text
+    assert 'demo_seconds_count{handler="h"} 4\n' in text
+    assert sample(text, 'demo_seconds_sum{handler="h"}') == pytest.approx(3.65)
+    assert 'demo_open{name="a\\"b"} 2\n' in text
+
+
+def test_failing_gauge_does_not_break_scrape():
+    registry = Registry()
+    registry.gauge('demo_broken', 'Illisible', lambda: 1 / 0)
+    registry.counter('demo_total', 'Compteur').inc()
+    text = registry.render()
+    assert '# demo_broken indisponible' in text
+    assert 'demo_total 1' in text
+
+
+@pytest.fixture
+def client(make_backend):
+    http, _ = make_backend(on_batch=api_backend.record_write_batch)
+    return http
+
+
+def test_metrics_endpoint(client, monkeypatch):
+    before = client.get('/api/metrics').get_data(as_text=True)
+
+    events = [{'type': 'session_start', 'session_id': 's1'},
+              {'type': 'click', 'session_id': 's1', 'page': '/'},
+              {'type': 'click', 'session_id': 's1', 'page': 'pdf/td1.pdf'},
+              {'type': 'scroll', 'session_id': 's1'}]
+    assert client.post('/api/track', json=events).status_code == 200
+    monkeypatch.setattr(api_backend.Config, 'GROUP_COMMIT_ENABLED', False)
+    assert client.post('/api/track', json={'type': 'click', 'session_id': 's1', 'page': '/'}).status_code == 200
+
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    after = response.get_data(as_text=True)
+
+    def delta(line_start):
+        return sample(after, line_start) - sample(before, line_start)
+
+    assert delta('analytics_events_total{type="click"}') == 3
+    assert delta('analytics_events_total{type="session_start"}') == 1
+    assert delta('analytics_events_rejected_total') == 1
+    assert delta('analytics_handler_duration_seconds_count{handler="track_event"}') == 2
+    assert delta('analytics_handler_duration_seconds_count{handler="handle_batch"}') == 1
+    assert delta('analytics_handler_duration_seconds_count{handler="handle_click_event"}') == 1
+    assert delta('analytics_sqlite_commit_duration_seconds_count{path="group_commit"}') == 1
+    assert delta('analytics_sqlite_commit_duration_seconds_count{path="handler"}') == 1
+    assert delta('analytics_write_batch_events_sum{path="group_commit"}') == 3
+    assert sample(after, 'analytics_db_pool_connections{state="open"}') >= 1
+    assert re.search(r'^analytics_sessions_open \d+$', after, re.MULTILINE)
+
+
+def test_handler_errors_counted(client, monkeypatch):
+    def broken(*args):
+        raise RuntimeError('disque plein')
+
+    before = sample(client.get('/api/metrics').get_data(as_text=True),
+                    'analytics_handler_errors_total{handler="handle_session_start"}')
+    monkeypatch.setattr(api_backend.Config, 'GROUP_COMMIT_ENABLED', False)
+    monkeypatch.setattr(api_backend, 'update_rollups', broken)
+    assert client.post('/api/track', json={'type': 'session_start', 'session_id': 's1'}).status_code == 500
+
+    after = client.get('/api/metrics').get_data(as_text=True)
+    assert sample(after, 'analytics_handler_errors_total{handler="handle_session_start"}') == before + 1
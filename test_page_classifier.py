@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Tests du classifieur de pages (page_classifier.py)
+"""
+
+import pandas as pd
+import pytest
+
+from page_classifier import CATEGORIES, classify_page, classify_pages
+
+
+@pytest.mark.parametrize("page, expected", [
+    ("", ("Page principale", "", "Page principale")),
+    ("/", ("Page principale", "", "Page principale")),
+    ("/pdf/thesis.pdf", ("thesis.pdf", "pdf", "PDF")),
+    ("drawing/run_run.JPG", ("run_run.JPG", "jpg", "Image")),
+    ("/drawing/pastel.Png", ("pastel.Png", "png", "Image")),
+    ("notes.docx", ("notes.docx", "docx", "Document")),
+    ("/cv.html", ("cv.html", "html", "Lien interne")),
+    ("/teaching/", ("teaching/", "", "Lien interne")),
+    ("https://example.org/a/b", ("https://example.org/a/b", "", "Lien interne")),
+    ("contact", ("Lien: contact", "", "Lien interne")),
+])
+def test_classify_page(page, expected):
+    assert classify_page(page) == expected
+
+
+def test_classify_pages_categorical_columns():
+    pages = pd.Series(["/", "/pdf/td1.pdf", None, "/drawing/x.jpg", "/pdf/td1.pdf"], index=[10, 11, 12, 13, 14])
+    frame = classify_pages(pages)
+
+    assert list(frame.index) == [10, 11, 12, 13, 14]
+    assert all(isinstance(frame[c].dtype, pd.CategoricalDtype) for c in frame.columns)
+    assert list(frame["category"].cat.categories) == CATEGORIES
+    assert frame["filename"].tolist() == ["Page principale", "td1.pdf", "Page principale", "x.jpg", "td1.pdf"]
+    assert frame["extension"].tolist() == ["", "pdf", "", "jpg", "pdf"]
+    assert frame["category"].tolist() == ["Page principale", "PDF", "Page principale", "Image", "PDF"]
+
+
+def test_classify_pages_empty():
+    frame = classify_pages(pd.Series([], dtype=object))
+    assert frame.empty
+    assert list(frame.columns) == ["filename", "extension", "category"]
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Tests des tableaux paginés côté serveur (paged_table.py)
+"""
+
+from datetime import date
+
+import pandas as pd
+
+from paged_table import PagedFrame, page_count
+
+
+def frame():
+    return pd.DataFrame({
+        'Date': [date(2025, 7, 3), 'Non spécifié', date(2025, 7, 1), date(2025, 7, 2)],
+        'Ville': ['Paris', 'Lyon', None, 'paris 15e'],
+        'Clics': [3, 1, 4, 1],
+    }, index=[10, 11, 12, 13])
+
+
+def test_sort_is_stable_and_cached():
+    table = PagedFrame(frame())
+    assert table.select('Clics').tolist() == [1, 3, 0, 2]
+    assert table.select('Clics', descending=True).tolist() == [2, 0, 1, 3]
+    assert table.select('Clics') is table.order('Clics')  # ordre calculé une seule fois
+    # Types mêlés : tri sur le texte, sans erreur
+    assert table.select('Date').tolist() == [2, 3, 0, 1]
+    assert table.select(None, descending=True).tolist() == [3, 2, 1, 0]
+
+
+def test_filter_and_pages():
+    table = PagedFrame(frame())
+    positions = table.select('Clics', text='PARIS')
+    assert positions.tolist() == [3, 0]
+    assert table.page(positions, 1, size=1)['Ville'].tolist() == ['paris 15e']
+    assert table.page(positions, 2, size=1)['Ville'].tolist() == ['Paris']
+    assert len(table.select(text='marseille')) == 0
+    assert [page_count(n, 50) for n in (0, 1, 50, 51)] == [1, 1, 1, 2]
+
+
+def test_sort_keys():
+    timestamps = pd.Series(pd.to_datetime(['2025-01-02', '2024-12-31', '2025-01-10']))
+    display = pd.DataFrame({'Date': timestamps.dt.strftime('%d/%m/%Y')})
+    table = PagedFrame(display, sort_keys={'Date': timestamps})
+    assert table.page(table.select('Date'), 1)['Date'].tolist() == ['31/12/2024', '02/01/2025', '10/01/2025']
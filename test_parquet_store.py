@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Tests du magasin d'événements Parquet (parquet_store.py)
+"""
+
+import json
+import os
+from datetime import date, datetime, timezone
+
+import pyarrow.dataset as ds
+import pytest
+
+import api_backend
+import dashboard_simple
+import dashboard_v6_simple
+import parquet_store
+from parquet_store import (ParquetEventWriter, compact_partition, import_json_array, load_frames,
+                           open_dataset, read_event_records, read_events)
+from synthetic_data import generate_events
+from test_dashboard_processing import normalize_frame
+
+RECEIVED = datetime(2025, 7, 31, 12, 0, tzinfo=timezone.utc)
+
+
+def items(events):
+    return [(event, '10.0.0.1', RECEIVED) for event in events]
+
+
+def test_typed_schema_and_partitions(tmp_path):
+    root = str(tmp_path / 'store')
+    events = [
+        {'type': 'click', 'session_id': 's1', 'timestamp': '2025-07-01T10:00:00.250Z',
+         'page': '/pdf/a.pdf', 'sequence_order': '3', 'x_coordinate': 12.0, 'custom': 'x'},
+        {'type': 'session_start', 'session_id': 's2', 'start_time': '2025-07-02T23:30:00+02:00',
+         'latitude': 'n/a'},
+        {'type': 'session_end', 'session_id': 's2'},
+    ]
+    parquet_store.write_table(root, parquet_store.events_to_table(items(events)))
+
+    assert sorted(os.listdir(root)) == ['date=2025-07-01', 'date=2025-07-02', 'date=2025-07-31']
+    df = read_events(root).sort_values('timestamp').reset_index(drop=True)
+    assert str(df['timestamp'].dtype) == 'datetime64[ms, UTC]'
+    assert df.loc[0, 'sequence_order'] == 3
+    assert df.loc[0, 'x_coordinate'] == 12
+    assert json.loads(df.loc[0, 'extra']) == {'custom': 'x'}
+    # start_time converti en UTC, valeur non numérique ignorée
+    assert df.loc[1, 'timestamp'] == datetime(2025, 7, 2, 21, 30, tzinfo=timezone.utc)
+    assert df['latitude'].isna().all()
+    # Sans horodatage : heure de réception ; IP de la requête par défaut
+    assert df.loc[2, 'timestamp'] == RECEIVED
+    assert set(df['client_ip']) == {'10.0.0.1'}
+
+
+def test_week_read_only_touches_week_partitions(tmp_path):
+    root = str(tmp_path / 'store')
+    events = generate_events(3000, start=datetime(2025, 7, 1, tzinfo=timezone.utc), days=28)
+    parquet_store.write_table(root, parquet_store.events_to_table(items(events)))
+
+    start, end = date(2025, 7, 8), date(2025, 7, 14)
+    fragments = list(open_dataset(root).get_fragments(filter=parquet_store._date_filter(start, end)))
+    assert 1 <= len(fragments) <= 7
+
+    week = read_events(root, start, end, columns=['session_id', 'page'])
+    assert set(week.columns) == {'type', 'session_id', 'page'}
+    expected = sum(1 for e in events if '2025-07-08' <= e['timestamp'][:10] <= '2025-07-14')
+    assert len(week) == expected
+
+
+@pytest.mark.parametrize('filename, process, columns', [
+    ('analytics_data.json', dashboard_simple.process_data, dashboard_simple.PARQUET_COLUMNS),
+    ('golden/edge_cases.json', dashboard_simple.process_data, dashboard_simple.PARQUET_COLUMNS),
+    ('analytics_data_v6.json', dashboard_v6_simple.process_data_v6_simple, dashboard_v6_simple.PARQUET_COLUMNS),
+])
+def test_dashboard_sessions_match_json(tmp_path, filename, process, columns):
+    """Les sessions calculées depuis le magasin sont celles calculées depuis le JSON"""
+    root = str(tmp_path / 'store')
+    import_json_array(filename, root)
+    with open(filename, 'r', encoding='utf-8') as f:
+        from_json, _ = process(json.load(f))
+    from_parquet, _ = process(read_event_records(root, columns=columns))
+    assert normalize_frame(from_parquet) == normalize_frame(from_json)
+
+
+def test_load_frames(tmp_path):
+    root = str(tmp_path / 'store')
+    import_json_array('analytics_data.json', root)
+    sessions, clicks = load_frames(root)
+    assert list(sessions.columns) == parquet_store.SESSION_COLUMNS
+    assert list(clicks.columns) == parquet_store.CLICK_COLUMNS
+    with open('analytics_data.json', 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    assert len(clicks) == sum(1 for e in data if e.get('type') == 'click')
+    assert clicks['timestamp'].str.endswith('Z').all()
+
+
+def test_writer_and_compaction(tmp_path):
+    root = str(tmp_path / 'store')
+    writer = ParquetEventWriter(root, max_rows=10, max_delay=60)
+    events = [{'type': 'click', 'session_id': f's{i}', 'timestamp': '2025-07-01T10:00:00Z'} for i in range(25)]
+    for start in range(0, 20, 5):
+        writer.append(items(events[start:start + 5]))
+        writer.flush()
+    writer.append(items(events[20:]))
+    assert writer.pending == 5
+    writer.stop()
+
+    assert writer.pending == 0
+    assert len(read_events(root)) == 25
+    assert compact_partition(root, '2025-07-01') == 5
+    assert len(os.listdir(os.path.join(root, 'date=2025-07-01'))) == 1
+    assert len(read_events(root)) == 25
+
+
+def test_failed_partition_is_retried_alone(tmp_path, monkeypatch):
+    root = str(tmp_path / 'store')
+    writer = ParquetEventWriter(root, max_delay=60)
+    events = [{'type': 'click', 'session_id': f's{i}', 'timestamp': f'2025-07-0{1 + i % 3}T10:00:00Z'}
+              for i in range(9)]
+    writer.append(items(events))
+
+    write_atomic = parquet_store._write_atomic
+
+    def failing(table, directory):
+        if directory.endswith('date=2025-07-02'):
+            raise OSError('disque plein')
+        return write_atomic(table, directory)
+
+    monkeypatch.setattr(parquet_store, '_write_atomic', failing)
+    with pytest.raises(OSError):
+        writer.flush()
+    assert writer.pending == 3
+    assert isinstance(writer.last_error, OSError)
+
+    monkeypatch.setattr(parquet_store, '_write_atomic', write_atomic)
+    assert len(writer.flush()) == 1
+    stored = read_events(root, columns=['session_id'])
+    assert sorted(stored['session_id']) == sorted(event['session_id'] for event in events)
+
+
+def test_out_of_range_values_do_not_block_the_buffer(tmp_path, monkeypatch):
+    root = str(tmp_path / 'store')
+    writer = ParquetEventWriter(root, max_delay=60)
+    events = [{'type': 'click', 'session_id': 's1', 'timestamp': '2025-07-01T10:00:00Z', 'x_coordinate': 10**12,
+               'sequence_order': 'inf', 'gps_latitude': 10**400},
+              {'type': 'click', 'session_id': 's2', 'timestamp': '2025-07-01T10:00:00Z', 'x_coordinate': 120}]
+    writer.append(items(events))
+    assert len(writer.flush()) == 1
+    assert writer.pending == 0
+    stored = read_events(root, columns=['session_id', 'x_coordinate', 'sequence_order']).sort_values('session_id')
+    assert stored['x_coordinate'].tolist()[1] == 120
+    assert stored['x_coordinate'].isna().tolist() == [True, False]
+    assert stored['sequence_order'].isna().tolist() == [True, True]
+
+    # Un événement qu'aucune conversion ne sauve est écarté seul
+    to_table = parquet_store.events_to_table
+
+    def failing(batch):
+        if any(event['session_id'] == 'bad' for event, _, _ in batch):
+            raise ValueError('inconvertible')
+        return to_table(batch)
+
+    monkeypatch.setattr(parquet_store, 'events_to_table', failing)
+    writer.append(items([{'type': 'click', 'session_id': 'bad'}, {'type': 'click', 'session_id': 's3'}]))
+    writer.flush()
+    assert (writer.pending, writer.dropped) == (0, 1)
+    assert 's3' in set(read_events(root, columns=['session_id'])['session_id'])
+
+
+def test_api_backend_archives_committed_events(tmp_path, client, monkeypatch):
+    http, _ = client
+    root = str(tmp_path / 'store')
+    writer = ParquetEventWriter(root, max_delay=60)
+    monkeypatch.setattr(api_backend, 'PARQUET_WRITER', writer)
+
+    assert http.post('/api/track', json={'type': 'session_start', 'session_id': 's1',
+                                         'timestamp': '2025-07-01T10:00:00Z'}).status_code == 200
+    assert http.post('/api/track', json={'type': 'click', 'session_id': 's1', 'page': '/'}).status_code == 200
+    assert http.post('/api/track', json={'type': 'scroll', 'session_id': 's1'}).status_code == 400
+    writer.stop()
+
+    stored = read_events(root, columns=['session_id'])
+    assert sorted(stored['type']) == ['click', 'session_start']
+    assert ds.dataset(root, partitioning='hive').count_rows() == 2
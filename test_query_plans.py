@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Vérifie avec EXPLAIN QUERY PLAN que les requêtes des dashboards utilisent les index
+"""
+
+import sqlite3
+import pytest
+
+import api_backend
+from analytics_queries import DASHBOARD_QUERIES, query_plan
+
+PARAMS = {
+    'session_journey': ('s1',),
+    'clicks_between_dates': ('2025-01-01', '2025-01-07'),
+    'clicks_per_page': (),
+    'clicks_for_page': ('pdf/thesis.pdf',),
+    'downloads_per_day': ('pdf', '2025-01-01', '2025-01-07'),
+    'session_downloads': ('s1',),
+    'sessions_between_dates': ('2025-01-01', '2025-01-07'),
+    'stored_journey': ('s1',),
+    'journeys_between_dates': ('2025-01-01', '2025-01-07'),
+    'clicks_per_page_rollup': ('day', '2025-01-01', '2025-01-07'),
+    'clicks_per_extension_rollup': ('day', '2025-01-01', '2025-01-07'),
+    'clicks_timeline_rollup': ('hour', '2025-01-01T00', '2025-01-01T23'),
+    'sessions_per_location_rollup': ('day', '2025-01-01', '2025-01-07'),
+    'downloads_per_file_rollup': ('day', '2025-01-01', '2025-01-07'),
+}
+
+EXPECTED_INDEX = {
+    'session_journey': 'idx_clicks_session_sequence',
+    'clicks_between_dates': 'idx_clicks_date',
+    'clicks_per_page': 'COVERING INDEX idx_clicks_page',
+    'clicks_for_page': 'idx_clicks_page',
+    'downloads_per_day': 'COVERING INDEX idx_downloads_extension_date',
+    'session_downloads': 'idx_downloads_session_sequence',
+    'sessions_between_dates': 'idx_sessions_date',
+    'stored_journey': 'idx_journeys_session_unique',
+    'journeys_between_dates': 'idx_journeys_date',
+    'clicks_per_page_rollup': 'USING PRIMARY KEY',
+    'clicks_per_extension_rollup': 'USING PRIMARY KEY',
+    'clicks_timeline_rollup': 'USING PRIMARY KEY',
+    'sessions_per_location_rollup': 'USING PRIMARY KEY',
+    'downloads_per_file_rollup': 'USING PRIMARY KEY',
+}
+
+
+@pytest.fixture
+def conn(client):
+    _, db_path = client
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def test_every_dashboard_query_is_covered():
+    assert set(EXPECTED_INDEX) == set(DASHBOARD_QUERIES)
+
+
+@pytest.mark.parametrize('name', sorted(EXPECTED_INDEX))
+def test_dashboard_query_uses_index(conn, name):
+    plan = query_plan(conn, name, PARAMS[name])
+    assert any(EXPECTED_INDEX[name] in step for step in plan), plan
+    # Aucun parcours complet de table ni tri temporaire
+    assert not any(step.startswith('SCAN') and 'INDEX' not in step for step in plan), plan
+    if 'ORDER BY sequence_order' in DASHBOARD_QUERIES[name]:
+        assert not any('TEMP B-TREE' in step for step in plan), plan
+
+
+def test_click_counter_update_uses_session_key(conn):
+    """L'UPDATE du compteur de clics passe par la contrainte UNIQUE de session_id"""
+    plan = query_plan(conn, api_backend.ADD_CLICKS_SQL, (1, 's1'))
+    assert any('USING INDEX sqlite_autoindex_user_sessions' in step for step in plan), plan
+
+
+def test_migrations_are_versioned(conn):
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == api_backend.MIGRATIONS[-1][0]
+    # Une seconde initialisation ne rejoue rien et ne casse rien
+    api_backend.init_database()
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == api_backend.MIGRATIONS[-1][0]
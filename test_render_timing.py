@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Tests du chronométrage des reruns des dashboards (render_timing.py)
+"""
+
+from collections import deque
+
+import pytest
+
+import render_timing
+from render_timing import TOTAL, RenderTimer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(timer, clock, load=0.1, tab=0.3, inner=0.2):
+    with timer.stage("chargement"):
+        clock.now += load
+    with timer.stage("onglet"):
+        with timer.stage("analyse"):
+            clock.now += inner
+        clock.now += tab - inner
+    return timer.record()
+
+
+def test_nested_stages_and_history():
+    clock = FakeClock()
+    history = deque(maxlen=3)
+    for load in (0.1, 0.2, 0.3, 0.4):
+        timer = RenderTimer(enabled=True, history=history, clock=clock)
+        assert run(timer, clock, load=load) == pytest.approx(load + 0.3)
+
+    assert [(name, depth) for name, depth, _ in timer.stages] == [('chargement', 0), ('onglet', 0), ('analyse', 1)]
+    assert len(history) == 3  # historique borné
+    table = timer.breakdown().set_index('Étape')
+    assert table.loc[TOTAL, 'ms'] == pytest.approx(700)
+    assert table.loc['\u2003chargement', '% du rerun'] == pytest.approx(57.1)
+    assert table.loc['\u2003\u2003analyse', 'ms'] == pytest.approx(200)
+    # p50 sur les 3 derniers reruns (0.2, 0.3, 0.4 s de chargement)
+    assert table.loc['\u2003chargement', 'p50 (ms)'] == pytest.approx(300)
+
+
+def test_stage_records_duration_on_error():
+    clock = FakeClock()
+    timer = RenderTimer(enabled=True, history=deque(), clock=clock)
+    with pytest.raises(ValueError):
+        with timer.stage("échec"):
+            clock.now += 0.5
+            raise ValueError
+    assert timer.stages == [['échec', 0, 0.5]]
+
+
+def test_disabled_is_noop():
+    timer = RenderTimer(enabled=False, history=deque())
+    with timer.stage("chargement"):
+        pass
+    assert timer.stages == []
+    assert timer.finish() is None
+    assert not timer.history
+
+
+def test_enabled_by_environment(monkeypatch):
+    monkeypatch.setenv('DASHBOARD_TIMING', '1')
+    assert render_timing.timing_enabled()
+    monkeypatch.setenv('DASHBOARD_TIMING', '0')
+    assert not render_timing.timing_enabled()
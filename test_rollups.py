@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests des rollups maintenus par api_backend.py (rollups.py)
+"""
+
+import sqlite3
+
+import api_backend
+import rollups
+from analytics_queries import query_plan
+from rollups import ROLLUP_TABLES, buckets, rebuild_rollups
+
+
+def snapshot(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {table: sorted(conn.execute(f'SELECT * FROM {table}')) for table in ROLLUP_TABLES}
+    finally:
+        conn.close()
+
+
+def ingest(http):
+    events = [
+        {'type': 'session_start', 'session_id': 's1', 'start_time': '2025-07-01T10:05:00Z',
+         'country': 'France', 'city': 'Paris'},
+        {'type': 'session_start', 'session_id': 's2', 'start_time': '2025-07-01T11:00:00Z',
+         'country': 'Suisse', 'city': 'Genève'},
+        {'type': 'click', 'session_id': 's1', 'page': '/pdf/thesis.pdf', 'timestamp': '2025-07-01T10:06:00Z'},
+        {'type': 'click', 'session_id': 's1', 'page': '/drawing/run_run.JPG', 'timestamp': '2025-07-01T10:07:00Z'},
+        {'type': 'click', 'session_id': 's2', 'page': '/'},
+        {'type': 'file_download', 'session_id': 's1', 'file_name': 'thesis.pdf', 'file_extension': 'PDF',
+         'timestamp': '2025-07-01T10:08:00Z'},
+    ]
+    for event in events[:3]:
+        assert http.post('/api/track', json=event).status_code == 200
+    assert http.post('/api/track', json=events[3:]).status_code == 200
+    # session_start rejoué : la session change de bucket et de ville (INSERT OR REPLACE)
+    assert http.post('/api/track', json=[{'type': 'session_start', 'session_id': 's1',
+                                          'start_time': '2025-07-02T09:00:00Z',
+                                          'country': 'France', 'city': 'Lyon'}]).status_code == 200
+
+
+def test_buckets():
+    assert buckets('2025-07-01T10:06:00.123Z', None) == ('2025-07-01T10', '2025-07-01')
+    assert buckets('2025-07-01 23:59:59', None) == ('2025-07-01T23', '2025-07-01')
+    assert buckets(None, '2025-07-03') == ('2025-07-03T00', '2025-07-03')
+
+
+def test_rollups_follow_ingestion(client):
+    http, db_path = client
+    ingest(http)
+    rollups = snapshot(db_path)
+
+    assert ('day', '2025-07-01', '/pdf/thesis.pdf', 'pdf', 1) in rollups['rollup_clicks']
+    assert ('hour', '2025-07-01T10', '/drawing/run_run.JPG', 'jpg', 1) in rollups['rollup_clicks']
+    assert sum(row[-1] for row in rollups['rollup_clicks'] if row[0] == 'day') == 3
+    assert [row for row in rollups['rollup_sessions'] if row[0] == 'day'] == [
+        ('day', '2025-07-01', 'Suisse', 'Genève', 1),
+        ('day', '2025-07-02', 'France', 'Lyon', 1),
+    ]
+    assert rollups['rollup_downloads'] == [
+        ('day', '2025-07-01', 'thesis.pdf', 'pdf', 1),
+        ('hour', '2025-07-01T10', 'thesis.pdf', 'pdf', 1),
+    ]
+
+
+def test_decrement_only_deletes_its_own_keys(client):
+    """Un session_start rejoué ne supprime que les compteurs qu'il a décrémentés, par clé primaire"""
+    _, db_path = client
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("INSERT INTO rollup_sessions VALUES ('day', '2025-06-01', 'Autre', 'Ville', 0)")
+        rollups.apply_counts(conn, 'rollup_sessions', {('day', '2025-07-01', 'France', 'Paris'): 1})
+        rollups.apply_counts(conn, 'rollup_sessions', {('day', '2025-07-01', 'France', 'Paris'): -1,
+                                                       ('day', '2025-07-02', 'France', 'Lyon'): 1})
+    assert sorted(conn.execute('SELECT * FROM rollup_sessions')) == [
+        ('day', '2025-06-01', 'Autre', 'Ville', 0),
+        ('day', '2025-07-02', 'France', 'Lyon', 1),
+    ]
+    plan = query_plan(conn, rollups._DELETE_EMPTY_SQL['rollup_sessions'], ('day', '2025-07-01', 'France', 'Paris'))
+    assert any('USING PRIMARY KEY' in step for step in plan), plan
+    conn.close()
+
+
+def test_rebuild_matches_incremental(client):
+    http, db_path = client
+    ingest(http)
+    incremental = snapshot(db_path)
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        rebuild_rollups(conn)
+    conn.close()
+    assert snapshot(db_path) == incremental
+
+
+def test_stats_endpoint_reads_rollups(client):
+    http, _ = client
+    ingest(http)
+
+    stats = http.get('/api/stats?start=2025-07-01&end=2025-07-01').json
+    assert stats['pages'][0] == {'page': '/pdf/thesis.pdf', 'clicks': 1}
+    assert {'file_extension': 'jpg', 'clicks': 1} in stats['extensions']
+    assert stats['locations'] == [{'country': 'Suisse', 'city': 'Genève', 'sessions': 1}]
+    assert stats['downloads'] == [{'file_name': 'thesis.pdf', 'file_extension': 'pdf', 'downloads': 1}]
+
+    hourly = http.get('/api/stats?grain=hour&start=2025-07-01&end=2025-07-01').json
+    assert {'bucket': '2025-07-01T10', 'clicks': 2} in hourly['timeline']
+    assert http.get('/api/stats?grain=week').status_code == 400
+    assert http.get('/api/stats?start=hier').status_code == 400
+
+
+def test_migration_backfills_existing_data(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'analytics.db')
+    monkeypatch.setattr(api_backend, 'DATABASE_PATH', db_path)
+    monkeypatch.setattr(api_backend, 'MIGRATIONS', api_backend.MIGRATIONS[:1])
+    api_backend.init_database()
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("INSERT INTO detailed_clicks (session_id, page, timestamp, date) "
+                     "VALUES ('s1', 'pdf/td1.pdf', '2025-07-01T08:00:00Z', '2025-07-01')")
+    conn.close()
+
+    monkeypatch.undo()
+    monkeypatch.setattr(api_backend, 'DATABASE_PATH', db_path)
+    api_backend.init_database()
+    assert ('day', '2025-07-01', 'pdf/td1.pdf', 'pdf', 1) in snapshot(db_path)['rollup_clicks']
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests du sessionizer qui alimente user_journeys (sessionizer.py)
+"""
+
+import json
+import sqlite3
+import time
+
+import pytest
+
+import api_backend
+from sessionizer import Sessionizer, journey_row, rebuild_journeys
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def client(make_backend, monkeypatch):
+    http, db_path = make_backend(after_commit=api_backend.events_committed)
+    clock = FakeClock()
+    # Passages explicites : le thread de fond n'écrit rien pendant le test
+    sessionizer = Sessionizer(api_backend.POOL.connection, timeout=1800, sweep_interval=3600, clock=clock)
+    monkeypatch.setattr(api_backend, 'SESSIONIZER', sessionizer)
+    yield http, db_path, sessionizer, clock
+    sessionizer.stop()
+
+
+def journeys(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {row[0]: row[1:] for row in conn.execute(
+            'SELECT session_id, journey_path, total_clicks, session_duration, date FROM user_journeys')}
+    finally:
+        conn.close()
+
+
+def click(session_id, page, order, second):
+    return {'type': 'click', 'session_id': session_id, 'page': page, 'sequence_order': order,
+            'timestamp': f'2025-07-01T10:00:{second:02d}Z'}
+
+
+def test_journey_row():
+    steps = [('/', None, '2025-07-01T10:00:00Z', 1, '2025-07-01'),
+             ('pdf/td1.pdf', 'td1.pdf', '2025-07-01T10:00:40Z', 2, '2025-07-01')]
+    row = journey_row('s1', steps, ('2025-07-01T09:59:50Z', None, None, '2025-07-01'))
+    assert row[0] == 's1'
+    assert row[1] == '/ → pdf/td1.pdf'
+    assert json.loads(row[2])[1] == {'page': 'pdf/td1.pdf', 'file': 'td1.pdf',
+                                     'timestamp': '2025-07-01T10:00:40Z', 'sequence_order': 2}
+    assert row[3:] == (2, 50, '2025-07-01')
+    assert journey_row('s2', [])[1:] == ('', '[]', 0, 0, None)
+
+
+def test_session_end_closes_journey(client):
+    http, db_path, sessionizer, _ = client
+    http.post('/api/track', json={'type': 'session_start', 'session_id': 's1'})
+    # Clics arrivés dans le désordre : le parcours suit sequence_order
+    http.post('/api/track', json=[click('s1', 'pdf/td2.pdf', 3, 30), click('s1', '/', 1, 0)])
+    http.post('/api/track', json=click('s1', 'pdf/td1.pdf', 2, 10))
+    assert sessionizer.sweep() == 0
+
+    http.post('/api/track', json={'type': 'session_end', 'session_id': 's1', 'duration_seconds': 45})
+    assert sessionizer.sweep() == 1
+    path, clicks, duration, _ = journeys(db_path)['s1']
+    assert (path, clicks, duration) == ('/ → pdf/td1.pdf → pdf/td2.pdf', 3, 45)
+
+
+def test_feed_starts_sweep_thread(make_backend):
+    """Application importée par un serveur WSGI (pas de __main__) : le premier événement démarre le thread"""
+    http, db_path = make_backend(after_commit=api_backend.events_committed)
+    api_backend.SESSIONIZER.sweep_interval = 0.05
+    assert api_backend.SESSIONIZER._thread is None
+    http.post('/api/track', json=[{'type': 'session_start', 'session_id': 's1'}, click('s1', '/', 1, 0),
+                                  {'type': 'session_end', 'session_id': 's1'}])
+    assert api_backend.SESSIONIZER._thread.is_alive()
+    deadline = time.monotonic() + 5
+    while 's1' not in journeys(db_path) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert journeys(db_path)['s1'][:2] == ('/', 1)
+
+
+def test_late_event_rewrites_journey(client):
+    http, db_path, sessionizer, _ = client
+    http.post('/api/track', json=[{'type': 'session_start', 'session_id': 's1'}, click('s1', '/', 1, 0),
+                                  {'type': 'session_end', 'session_id': 's1'}])
+    sessionizer.sweep()
+    http.post('/api/track', json=click('s1', 'drawing/a.jpg', 2, 20))
+    assert sessionizer.sweep() == 1
+    assert journeys(db_path)['s1'][:3] == ('/ → drawing/a.jpg', 2, 20)
+    assert sessionizer.open_sessions == 0
+
+
+def test_inactivity_timeout(client):
+    http, db_path, sessionizer, clock = client
+    http.post('/api/track', json=[{'type': 'session_start', 'session_id': 's1'}, click('s1', '/', 1, 0)])
+    clock.now = 1000
+    http.post('/api/track', json=click('s2', '/', 1, 0))
+    clock.now = 1800
+    assert sessionizer.sweep() == 1
+    assert set(journeys(db_path)) == {'s1'}
+    assert sessionizer.open_sessions == 1
+
+    sessionizer.stop()
+    assert journeys(db_path)['s2'][:2] == ('/', 1)
+
+
+def test_rebuild_and_migration_dedupe(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'analytics.db')
+    monkeypatch.setattr(api_backend, 'DATABASE_PATH', db_path)
+    monkeypatch.setattr(api_backend, 'MIGRATIONS', api_backend.MIGRATIONS[:2])
+    api_backend.init_database()
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("INSERT INTO user_journeys (session_id, journey_path) VALUES ('s1', 'ancien'), ('s1', 'doublon')")
+        conn.execute("INSERT INTO detailed_clicks (session_id, page, sequence_order, date) "
+                     "VALUES ('s1', 'b', 2, '2025-07-01'), ('s1', 'a', 1, '2025-07-01')")
+    conn.close()
+
+    monkeypatch.undo()
+    monkeypatch.setattr(api_backend, 'DATABASE_PATH', db_path)
+    api_backend.init_database()
+    assert journeys(db_path) == {'s1': ('a → b', 2, 0, '2025-07-01')}
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        assert rebuild_journeys(conn) == 1
+    assert conn.execute('SELECT COUNT(*) FROM user_journeys').fetchone()[0] == 1
+    conn.close()
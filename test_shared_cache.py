@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests du cache stale-while-revalidate des dashboards (shared_cache.py)
+"""
+
+import threading
+
+import pytest
+
+import shared_cache
+from shared_cache import SharedCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Loader:
+    """Loader bloqué jusqu'à `release()` ; compte ses appels"""
+
+    def __init__(self, values):
+        self.values = iter(values)
+        self.calls = 0
+        self.gate = threading.Event()
+        self.started = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.gate.wait(5)
+        value = next(self.values)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def release(self):
+        self.gate.set()
+
+
+def wait_refresh(cache, key='k'):
+    flight = cache._entries[key].flight
+    if flight is not None:
+        try:
+            flight.result(5)
+        except Exception:
+            pass
+
+
+def test_concurrent_cold_reads_share_one_load():
+    cache = SharedCache(soft_ttl=10, hard_ttl=100)
+    loader = Loader(['v1'])
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('k', loader).value)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    loader.started.wait(5)
+    loader.release()
+    for thread in threads:
+        thread.join(5)
+    assert results == ['v1'] * 8
+    assert loader.calls == 1
+
+
+def test_stale_value_served_during_single_refresh():
+    clock = FakeClock()
+    cache = SharedCache(soft_ttl=10, hard_ttl=100, clock=clock)
+    loader = Loader(['v1', 'v2'])
+    loader.release()
+    assert cache.get('k', loader).value == 'v1'
+
+    loader.gate.clear()
+    clock.now = 15
+    for _ in range(5):
+        served = cache.get('k', loader)
+        assert (served.value, served.age, served.staleness) == ('v1', 15, 5)
+    loader.release()
+    wait_refresh(cache)
+    assert loader.calls == 2  # une seule mise à jour pour les cinq lectures
+    served = cache.get('k', loader)
+    assert served.value == 'v2' and not served.stale
+    assert cache.refreshes == 2
+
+
+def test_failed_refresh_keeps_last_good_value():
+    clock = FakeClock()
+    cache = SharedCache(soft_ttl=10, hard_ttl=100, retry_delay=30, clock=clock)
+    loader = Loader(['v1', OSError('miroir indisponible'), 'v2'])
+    loader.release()
+    cache.get('k', loader)
+
+    clock.now = 20
+    assert cache.get('k', loader).value == 'v1'
+    wait_refresh(cache)
+    assert cache.failures == 1
+    clock.now = 40  # délai de nouvelle tentative non écoulé
+    assert cache.get('k', loader).value == 'v1'
+    assert loader.calls == 2
+
+    clock.now = 100  # expiration dure : la lecture attend, et l'échec précédent est retenté
+    served = cache.get('k', loader)
+    assert (served.value, served.age) == ('v2', 0)
+    assert loader.calls == 3
+
+
+def test_hard_expiry_raises_when_refresh_fails():
+    clock = FakeClock()
+    cache = SharedCache(soft_ttl=10, hard_ttl=100, retry_delay=30, clock=clock)
+    loader = Loader(['v1', OSError('hors ligne')])
+    loader.release()
+    cache.get('k', loader)
+    clock.now = 150
+    with pytest.raises(OSError):
+        cache.get('k', loader)
+    with pytest.raises(OSError):  # pas de nouvel essai avant retry_delay
+        cache.get('k', loader)
+    assert loader.calls == 2
+
+
+def test_version_change_marks_value_stale():
+    clock = FakeClock()
+    cache = SharedCache(soft_ttl=None, hard_ttl=60, clock=clock)
+    loader = Loader(['v1', 'v2'])
+    loader.release()
+    assert cache.get('k', loader, version='a').version == 'a'
+
+    clock.now = 1000  # pas d'expiration par l'âge : la version est la même
+    assert not cache.get('k', loader, version='a').stale
+    loader.gate.clear()
+    cache.get('k', loader, version='b')
+    clock.now = 1030
+    served = cache.get('k', loader, version='b')
+    assert (served.value, served.version, served.staleness) == ('v1', 'a', 30)
+    loader.release()
+    wait_refresh(cache)
+    served = cache.get('k', loader, version='b')
+    assert (served.value, served.version, served.stale) == ('v2', 'b', False)
+
+
+def test_invalidate_and_describe(monkeypatch):
+    monkeypatch.setattr(shared_cache, '_CACHES', {})
+    clock = FakeClock()
+    cache = shared_cache.get_cache('test', soft_ttl=10, hard_ttl=100, clock=clock)
+    assert shared_cache.get_cache('test') is cache
+    loader = Loader(['v1', 'v2'])
+    loader.release()
+    cache.get('k', loader)
+    clock.now = 25
+    assert cache.stats() == {'k': (25, 15)}
+    assert cache.describe() == ['k : chargée il y a 25 s, périmée depuis 15 s', '1 mise(s) à jour, 0 échec(s)']
+
+    cache.invalidate('k')
+    assert cache.get('k', loader).value == 'v2'
@@ -0,0 +1,144 @@
+# write_queue.py - File d'écriture en commit groupé pour l'API analytics
+import queue
+import threading
+import time
+
+
+class WriteTicket:
+    """Accusé de réception d'un lot : permet d'attendre son commit"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.error = None
+
+    def _resolve(self, error=None):
+        self.error = error
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """Attend le commit ; retourne False si le délai est dépassé"""
+        return self._done.wait(timeout)
+
+    @property
+    def committed(self):
+        return self._done.is_set() and self.error is None
+
+
+class GroupCommitWriter:
+    """Thread d'écriture qui vide une file en mémoire par transactions groupées
+
+    Un lot est écrit dès que `max_batch` événements sont en attente ou que
+    `max_delay` secondes se sont écoulées depuis le premier événement du lot.
+    `flush(conn, items)` reçoit la connexion et la liste des éléments à écrire ;
+    le commit est fait ici, une seule fois par lot. `after_commit(items)`, si
+    fourni, est appelé avec les éléments d'un lot une fois celui-ci commité ;
+    il ne doit pas lever d'exception (le thread d'écriture s'arrêterait).
+    `on_batch(count, commit_seconds, error)`, si fourni, reçoit après chaque
+    lot sa taille, la durée du commit (None s'il n'a pas eu lieu) et l'erreur
+    éventuelle ; même contrainte.
+    `max_queue` borne le nombre d'événements en attente (et non le nombre
+    d'appels à submit) : au-delà, submit lève queue.Full.
+    """
+
+    def __init__(self, pool, flush, max_batch=500, max_delay=0.05, max_queue=10000, after_commit=None,
+                 on_batch=None):
+        self.pool = pool
+        self.flush = flush
+        self.after_commit = after_commit
+        self.on_batch = on_batch
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_queue = max_queue
+        self._queue = queue.Queue()
+        self._queued_items = 0
+        self._count_lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name='group-commit-writer', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        """Arrête le thread après avoir écrit ce qui reste dans la file"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, items):
+        """Met des éléments en file ; lève queue.Full si max_queue événements seraient dépassés"""
+        ticket = WriteTicket()
+        if not items:
+            ticket._resolve()
+            return ticket
+        items = list(items)
+        with self._count_lock:
+            if self._queued_items + len(items) > self.max_queue:
+                raise queue.Full
+            self._queued_items += len(items)
+        self.start()
+        self._queue.put_nowait((items, ticket))
+        return ticket
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    @property
+    def pending_items(self):
+        """Événements en file ou en cours d'écriture"""
+        return self._queued_items
+
+    def _collect(self):
+        """Attend un premier lot puis accumule jusqu'au seuil de taille ou de temps"""
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        count = len(first[0])
+        deadline = time.monotonic() + self.max_delay
+        while count < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(entry)
+            count += len(entry[0])
+        return batch
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if not batch:
+                continue
+
+            items = [item for entry_items, _ in batch for item in entry_items]
+            error = None
+            commit_seconds = None
+            try:
+                with self.pool.connection() as conn:
+                    self.flush(conn, items)
+                    start = time.perf_counter()
+                    conn.commit()
+                    commit_seconds = time.perf_counter() - start
+            except Exception as e:
+                error = e
+            if self.on_batch is not None:
+                self.on_batch(len(items), commit_seconds, error)
+            if error is None and self.after_commit is not None:
+                self.after_commit(items)
+
+            with self._count_lock:
+                self._queued_items -= len(items)
+            for _, ticket in batch:
+                ticket._resolve(error)